@@ -0,0 +1 @@
+"""Offline benchmarks and local API fakes for the Social Garden SOW Backend"""
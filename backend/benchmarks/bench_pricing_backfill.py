@@ -0,0 +1,239 @@
+"""
+Pricing Backfill Benchmark
+Runs the extract-pricing.py pipeline (chunked read, document totals across a
+process pool, one CASE update per chunk) against a synthetic sows table in
+SQLite, so extraction changes can be measured and checked without the
+production MySQL instance.
+
+Each worker count runs in a fresh interpreter, so the peak resident set
+reported (ru_maxrss, a lifetime high-water mark) covers that run alone.
+
+Documents vary in size, nest pricing tables inside lists, and come with and
+without the editor's TOTAL row; some have no pricing table at all. Every
+total written is checked against an independent json.loads + recursive walk
+with the same pricing rule.
+
+Usage: python -m benchmarks.bench_pricing_backfill --rows 2000 --workers 1 4 --chunk-size 500
+       python -m benchmarks.bench_pricing_backfill --extractor services.pricing_extraction:document_total
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from services.pricing_extraction import CENTS, PRICING_TABLE_TYPE, bulk_total_update, parallel_map
+
+PARAGRAPH = 'Implementation of HubSpot Marketing Hub for lead nurturing, reporting and CRM hygiene. '
+ROLES = ['Tech - Head Of - Senior Project Management', 'Tech - Delivery - Project Coordination',
+         'Tech - Producer - Copywriting', 'Tech - Specialist - Integration', 'Account Management - Account Director']
+
+
+def pricing_table(rng: random.Random, with_total_row: bool) -> Dict[str, Any]:
+    rows = [
+        {'role': rng.choice(ROLES), 'description': PARAGRAPH[:60],
+         'hours': rng.choice([2, 4.5, 8, 12, 20, 37.5]), 'rate': rng.choice([120, 150, 180, 220])}
+        for _ in range(rng.randint(3, 14))
+    ]
+    if with_total_row:
+        rows.append({'role': 'TOTAL', 'hours': sum(row['hours'] * row['rate'] for row in rows), 'rate': 0})
+    return {'type': PRICING_TABLE_TYPE, 'attrs': {'rows': rows, 'discount': rng.choice([0, 0, 5, 10])}}
+
+
+def sow_document(rng: random.Random, kilobytes: int) -> str:
+    """Prose up to roughly `kilobytes`, with 0-4 pricing tables, some nested in lists"""
+    blocks: List[Any] = []
+    for _ in range(max(1, kilobytes * 1024 // 420)):
+        blocks.append({'type': 'paragraph', 'content': [{'type': 'text', 'text': PARAGRAPH * 4}]})
+    for _ in range(rng.choice([0, 1, 1, 1, 2, 4])):
+        table = pricing_table(rng, with_total_row=rng.random() < 0.6)
+        if rng.random() < 0.3:
+            table = {'type': 'bulletList', 'content': [{'type': 'listItem', 'content': [table]}]}
+        blocks.insert(rng.randrange(len(blocks) + 1), table)
+    return json.dumps({'type': 'doc', 'content': blocks})
+
+
+def build_database(path: str, rows: int, seed: int) -> int:
+    """Synthetic sows table; returns the bytes of content written"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('DROP TABLE IF EXISTS sows')
+    conn.execute("""
+        CREATE TABLE sows (
+          id TEXT PRIMARY KEY,
+          title TEXT NOT NULL,
+          content TEXT NOT NULL,
+          total_investment NUMERIC DEFAULT 0,
+          has_pricing_table INTEGER AS (content LIKE '%editablePricingTable%') STORED,
+          pricing_total NUMERIC,
+          updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute('CREATE INDEX idx_pricing_investment ON sows (has_pricing_table, total_investment)')
+    content_bytes = 0
+    for n in range(rows):
+        # Mostly small documents with a long tail of large ones
+        document = sow_document(rng, min(4096, int(rng.lognormvariate(3.5, 1.0)) + 1))
+        content_bytes += len(document)
+        conn.execute('INSERT INTO sows (id, title, content) VALUES (?, ?, ?)', (f'sow-{n:07d}', f'SOW {n}', document))
+    conn.commit()
+    conn.close()
+    return content_bytes
+
+
+def reference_total(content: str) -> Optional[Decimal]:
+    """Independent check: full json.loads, recursive walk, the same pricing rule"""
+    def walk(node: Any) -> Decimal:
+        if isinstance(node, list):
+            return sum((walk(child) for child in node), Decimal('0'))
+        if not isinstance(node, dict):
+            return Decimal('0')
+        if node.get('type') != PRICING_TABLE_TYPE:
+            return walk(node.get('content') or [])
+        total, priced, stated = Decimal('0'), False, None
+        for row in (node.get('attrs') or {}).get('rows') or []:
+            role = str(row.get('role') or '').strip()
+            hours, rate = Decimal(str(row.get('hours') or 0)), Decimal(str(row.get('rate') or 0))
+            if role and 'total' in role.lower():
+                stated = stated if stated is not None or hours <= 0 else hours
+            elif role and hours > 0 and rate > 0:
+                total += Decimal(str(row['total'])) if row.get('total') else hours * rate
+                priced = True
+        # No priced rows: the TOTAL row's hours are the table's amount
+        return total if priced else stated or Decimal('0')
+
+    total = walk(json.loads(content))
+    return total.quantize(CENTS) if total > 0 else None
+
+
+def load_extractor(spec: str) -> Callable[[str], Optional[Decimal]]:
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def run_backfill(path: str, extract: Callable, workers: int, chunk_size: int) -> Dict[str, Any]:
+    """extract-pricing.py's loop on SQLite: stream, parse across the pool, bulk update per chunk"""
+    conn = sqlite3.connect(path)
+    write_conn = sqlite3.connect(path)
+    conn.execute("UPDATE sows SET total_investment = 0, pricing_total = NULL")
+    conn.commit()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    scanned = updated = content_bytes = 0
+    started = time.perf_counter()
+    try:
+        cursor = conn.execute("SELECT id, content FROM sows WHERE has_pricing_table = 1 AND total_investment = 0")
+        while True:
+            sows = cursor.fetchmany(chunk_size)
+            if not sows:
+                break
+            totals = parallel_map(extract, [content for _, content in sows], pool, workers)
+            updates = [(sow_id, str(total)) for (sow_id, _), total in zip(sows, totals) if total and total > 0]
+            if updates:
+                sql, params = bulk_total_update(updates)
+                write_conn.execute(sql.replace('%s', '?'), params)
+                write_conn.commit()
+            scanned += len(sows)
+            updated += len(updates)
+            content_bytes += sum(len(content) for _, content in sows)
+    finally:
+        if pool:
+            pool.shutdown()
+        conn.close()
+        write_conn.close()
+    elapsed = time.perf_counter() - started
+    return {'scanned': scanned, 'updated': updated, 'bytes': content_bytes, 'seconds': elapsed}
+
+
+def verify(path: str) -> int:
+    """Rows whose written total differs from reference_total"""
+    conn = sqlite3.connect(path)
+    mismatches = 0
+    for sow_id, content, total in conn.execute("SELECT id, content, total_investment FROM sows"):
+        expected = reference_total(content) or Decimal('0')
+        if Decimal(str(total or 0)).quantize(CENTS) != expected.quantize(CENTS):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  mismatch {sow_id}: wrote {total}, expected {expected}")
+    conn.close()
+    return mismatches
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set of this process and of its largest (reaped) pool worker; ru_maxrss is KiB on Linux"""
+    return {
+        'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'worker_peak_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }
+
+
+def run_isolated(path: str, extractor: str, workers: int, chunk_size: int) -> Dict[str, Any]:
+    """run_backfill in a fresh interpreter, so its peak memory is not an earlier run's"""
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_pricing_backfill', '--db', path, '--extractor', extractor,
+         '--chunk-size', str(chunk_size), '--run-once', str(workers)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the pricing backfill against a synthetic SQLite sows table')
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--extractor', default='services.pricing_extraction:document_total',
+                        help='module:function taking a TipTap JSON string, returning a Decimal total or None')
+    parser.add_argument('--db', help='SQLite file to (re)build; a temporary file by default')
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--no-verify', action='store_true', help='Skip the reference check of written totals')
+    # Internal: one run_backfill on an existing --db, printed as JSON
+    parser.add_argument('--run-once', type=int, metavar='WORKERS', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_once:
+        result = run_backfill(args.db, load_extractor(args.extractor), args.run_once, args.chunk_size)
+        print(json.dumps({**result, **peak_rss_mb()}))
+        return
+
+    load_extractor(args.extractor)  # fail here, not in every run
+    scratch = None if args.db else tempfile.mkdtemp(prefix='pricing-bench-')
+    path = args.db or os.path.join(scratch, 'sows.sqlite')
+    started = time.perf_counter()
+    content_bytes = build_database(path, args.rows, args.seed)
+    print(f"Built {args.rows} SOWs, {content_bytes / 1024 / 1024:.1f} MB of content in "
+          f"{time.perf_counter() - started:.1f}s")
+
+    print("=" * 94)
+    print(f"{'workers':>7} {'scanned':>8} {'updated':>8} {'seconds':>8} {'rows/s':>9} {'MB/s':>7} "
+          f"{'peak MB':>8} {'worker MB':>10} {'mismatches':>11}")
+    print("-" * 94)
+    try:
+        for workers in args.workers:
+            result = run_isolated(path, args.extractor, workers, args.chunk_size)
+            mismatches = '-' if args.no_verify else verify(path)
+            seconds = max(result['seconds'], 1e-9)
+            worker_peak = f"{result['worker_peak_mb']:.0f}" if workers > 1 else '-'
+            print(f"{workers:>7} {result['scanned']:>8} {result['updated']:>8} {seconds:>8.2f} "
+                  f"{result['scanned'] / seconds:>9.0f} {result['bytes'] / 1024 / 1024 / seconds:>7.1f} "
+                  f"{result['peak_mb']:>8.0f} {worker_peak:>10} {mismatches:>11}")
+    finally:
+        if scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+    print("=" * 94)
+
+
+if __name__ == '__main__':
+    main()
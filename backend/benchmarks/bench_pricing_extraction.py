@@ -0,0 +1,97 @@
+"""
+Pricing Extraction Benchmark
+Time to total a stored TipTap document against its size: json.loads plus a
+recursive walk (what the backfill scripts used to do), against
+services.pricing_extraction on the raw string (subtree decoding) and on an
+already decoded document (stack walk).
+
+Usage: python -m benchmarks.bench_pricing_extraction --sizes-mb 0.5 2 8 --tables 6
+"""
+
+import argparse
+import json
+import statistics
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+
+from services.pricing_extraction import PRICING_TABLE_TYPE, document_pricing, price_table
+
+PARAGRAPH = 'Implementation of HubSpot Marketing Hub for lead nurturing, reporting and CRM hygiene. ' * 4
+
+
+def pricing_node(index: int) -> Dict[str, Any]:
+    rows = [{'role': f'Role {r}', 'hours': 5 + r, 'rate': 180, 'description': PARAGRAPH[:80]} for r in range(10)]
+    rows.append({'role': 'Total', 'hours': sum(row['hours'] * 180 for row in rows), 'rate': 0})
+    return {'type': PRICING_TABLE_TYPE, 'attrs': {'rows': rows, 'discount': index % 3}}
+
+
+def large_document(target_bytes: int, tables: int) -> str:
+    """Prose-heavy document with pricing tables spread through it, half nested in lists"""
+    paragraph = {'type': 'paragraph', 'content': [{'type': 'text', 'text': PARAGRAPH, 'marks': [{'type': 'bold'}]}]}
+    paragraphs = max(tables, target_bytes // len(json.dumps(paragraph)))
+    content: List[Any] = []
+    every = max(1, paragraphs // tables)
+    for n in range(paragraphs):
+        content.append(paragraph)
+        if n % every == 0 and n // every < tables:
+            table = pricing_node(n)
+            if (n // every) % 2:
+                table = {'type': 'bulletList', 'content': [{'type': 'listItem', 'content': [table]}]}
+            content.append(table)
+    return json.dumps({'type': 'doc', 'content': content})
+
+
+def recursive_total(document: Any) -> Decimal:
+    """json.loads baseline: recursive walk over every node"""
+    if isinstance(document, list):
+        return sum((recursive_total(node) for node in document), Decimal('0'))
+    if not isinstance(document, dict):
+        return Decimal('0')
+    if document.get('type') == PRICING_TABLE_TYPE:
+        return price_table(document)['subtotal']
+    return recursive_total(document.get('content') or [])
+
+
+def median_ms(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark TipTap pricing extraction against document size')
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[0.5, 2, 8])
+    parser.add_argument('--tables', type=int, default=6, help='Pricing tables per document')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 84)
+    print(f"{'MB':>6} {'tables':>7} {'loads+walk ms':>14} {'scan ms':>9} {'walk ms':>9} {'speedup':>8} {'scan MB/s':>10} {'total':>12}")
+    print("-" * 84)
+    for size_mb in args.sizes_mb:
+        raw = large_document(int(size_mb * 1024 * 1024), args.tables)
+        decoded = json.loads(raw)
+
+        expected = recursive_total(decoded)
+        pricing = document_pricing(raw)
+        if pricing['total'] != expected or document_pricing(decoded)['total'] != expected:
+            raise SystemExit(f"Totals disagree: {pricing['total']} vs {expected}")
+
+        baseline_ms = median_ms(lambda: recursive_total(json.loads(raw)), args.repeat)
+        scan_ms = median_ms(lambda: document_pricing(raw), args.repeat)
+        walk_ms = median_ms(lambda: document_pricing(decoded), args.repeat)
+
+        mb = len(raw) / (1024 * 1024)
+        print(
+            f"{mb:>6.2f} {len(pricing['tables']):>7} {baseline_ms:>14.1f} {scan_ms:>9.2f} {walk_ms:>9.2f} "
+            f"{baseline_ms / scan_ms:>7.0f}x {mb / (scan_ms / 1000):>10.0f} {pricing['total']:>12,.2f}"
+        )
+    print("=" * 84)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Request Parsing Benchmark
+Measures parse + validate time against payload size for the API's largest
+request bodies: FastAPI's default path (json.loads, then model_validate over
+the dicts) against orjson.loads + model_validate and model_validate_json on
+the raw bytes, plus response serialization with the stdlib json module
+against orjson. request_models.json_body takes the orjson path.
+
+Usage: python -m benchmarks.bench_request_parsing --sizes-mb 0.1 1 4 8 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+import orjson
+
+from request_models import ExcelExportRequest, PDFRequest, ProfessionalPDFRequest
+
+PARAGRAPH = 'Implementation of HubSpot Marketing Hub for lead nurturing, reporting and CRM hygiene. ' * 4
+
+
+def tiptap_document(blocks: int) -> Dict[str, Any]:
+    """Editor document of headings, paragraphs and a pricing table per scope"""
+    content = []
+    for n in range(blocks):
+        content.append({'type': 'heading', 'attrs': {'level': 2}, 'content': [{'type': 'text', 'text': f'Scope {n}'}]})
+        content.append({'type': 'paragraph', 'content': [{'type': 'text', 'text': PARAGRAPH, 'marks': [{'type': 'bold'}]}]})
+        content.append({
+            'type': 'editablePricingTable',
+            'attrs': {'rows': [{'role': f'Role {r}', 'hours': 10 + r, 'rate': 180} for r in range(8)], 'discount': 5},
+        })
+    return {'type': 'doc', 'content': content}
+
+
+def pdf_payload(blocks: int) -> Dict[str, Any]:
+    return {
+        'html_content': f'<h2>Scope</h2><p>{PARAGRAPH}</p>' * blocks * 3,
+        'filename': 'benchmark',
+        'content': tiptap_document(blocks),
+        'final_investment_target_text': '$25,000 +GST',
+    }
+
+
+def professional_pdf_payload(blocks: int) -> Dict[str, Any]:
+    return {
+        'projectTitle': 'Benchmark Project',
+        'clientName': 'Benchmark Client',
+        'discount': 5,
+        'scopes': [
+            {
+                'id': n,
+                'title': f'Scope {n}',
+                'description': PARAGRAPH,
+                'items': [
+                    {'description': f'Task {r}', 'role': f'Role {r}', 'hours': 10 + r, 'cost': 1800.0}
+                    for r in range(12)
+                ],
+                'deliverables': [f'Deliverable {d}' for d in range(8)],
+                'assumptions': [f'Assumption {a}' for a in range(6)],
+            }
+            for n in range(blocks)
+        ],
+    }
+
+
+def excel_payload(blocks: int) -> Dict[str, Any]:
+    return {
+        'filename': 'benchmark.xlsx',
+        'sowData': {
+            'title': 'Benchmark Project',
+            'client': 'Benchmark Client',
+            'pricingRows': [{'role': f'Role {r}', 'hours': 10, 'rate': 180, 'total': 1800} for r in range(blocks * 8)],
+            'discount': {'type': 'percentage', 'value': 5},
+            'deliverables': [PARAGRAPH for _ in range(blocks)],
+            'assumptions': [f'Assumption {a}' for a in range(blocks)],
+        },
+    }
+
+
+PAYLOADS = {
+    'generate-pdf': (PDFRequest, pdf_payload),
+    'generate-professional-pdf': (ProfessionalPDFRequest, professional_pdf_payload),
+    'export-excel': (ExcelExportRequest, excel_payload),
+}
+
+
+def sized_body(build: Callable[[int], Dict[str, Any]], target_bytes: int) -> bytes:
+    """Grow a payload until its JSON encoding reaches the target size"""
+    blocks = max(1, target_bytes // len(orjson.dumps(build(1))))
+    return orjson.dumps(build(blocks))
+
+
+def best_of(fn: Callable[[], Any], repeat: int) -> float:
+    """Median wall time in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark request body parsing against payload size')
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[0.1, 1, 4, 8])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--payload', choices=sorted(PAYLOADS), nargs='+', default=sorted(PAYLOADS))
+    args = parser.parse_args()
+
+    rows: List[str] = []
+    for name in args.payload:
+        model, build = PAYLOADS[name]
+        for size_mb in args.sizes_mb:
+            body = sized_body(build, int(size_mb * 1024 * 1024))
+            parsed = model.model_validate_json(body)
+            dumped = parsed.model_dump()
+
+            stdlib_ms = best_of(lambda: model.model_validate(json.loads(body)), args.repeat)
+            orjson_ms = best_of(lambda: model.model_validate(orjson.loads(body)), args.repeat)
+            raw_ms = best_of(lambda: model.model_validate_json(body), args.repeat)
+            json_out_ms = best_of(lambda: json.dumps(dumped).encode(), args.repeat)
+            orjson_out_ms = best_of(lambda: orjson.dumps(dumped), args.repeat)
+
+            mb = len(body) / (1024 * 1024)
+            rows.append(
+                f"{name:<26} {mb:>6.2f} {stdlib_ms:>10.1f} {orjson_ms:>10.1f} {raw_ms:>10.1f} "
+                f"{stdlib_ms / orjson_ms:>6.1f}x {mb / (orjson_ms / 1000):>7.0f} "
+                f"{json_out_ms:>9.1f} {orjson_out_ms:>9.1f}"
+            )
+
+    print("=" * 100)
+    # Median ms per body; gain and MB/s are for json_body's orjson path
+    print(f"{'Payload':<26} {'MB':>6} {'json+val':>10} {'orjson+val':>10} {'val_json':>10} "
+          f"{'gain':>7} {'MB/s':>7} {'json out':>9} {'orjson out':>9}")
+    print("-" * 100)
+    for row in rows:
+        print(row)
+    print("=" * 100)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Google Sheets Export Benchmark
+Measures sheets/second and API calls per sheet for GoogleSheetsGenerator
+against the local fake API (or any GOOGLE_API_BASE_URL).
+
+Usage: python -m benchmarks.bench_sheets --sheets 50 --concurrency 4 --latency-ms 80
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from benchmarks.fake_google_api import start_server
+
+
+def sample_sow(index: int, pricing_rows: int) -> Dict[str, Any]:
+    """Synthetic SOW shaped like a /create-sheet request"""
+    return {
+        'client_name': f'Benchmark Client {index}',
+        'service_name': 'HubSpot Implementation',
+        'sow_data': {
+            'overview': 'Implementation of HubSpot Marketing Hub for lead nurturing. ' * 10,
+            'deliverables': '\n'.join(f'Deliverable {n}' for n in range(15)),
+            'outcomes': 'Improved lead conversion and reporting visibility.',
+            'phases': 'Discovery, Build, Launch, Optimise',
+            'pricing': [
+                {'description': f'Role {n}', 'role': f'Role {n}', 'hours': 10, 'rate': 180, 'amount': 1800}
+                for n in range(pricing_rows)
+            ],
+            'assumptions': 'Client provides timely access to systems.',
+            'timeline': '8 weeks',
+        },
+    }
+
+
+def fetch_stats(base_url: str, path: str = '__stats') -> Dict[str, Any]:
+    with urllib.request.urlopen(f"{base_url.rstrip('/')}/{path}") as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Google Sheets exports against the fake API')
+    parser.add_argument('--sheets', type=int, default=20, help='Number of SOW sheets to create')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--pricing-rows', type=int, default=12)
+    parser.add_argument('--mode', choices=['build', 'template', 'upload', 'bulk'], default='build')
+    parser.add_argument('--base-url', default=None, help='Use an already running fake instead of starting one')
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--project-quota', type=float, default=100000, help='Limiter quota per minute (project)')
+    parser.add_argument('--user-quota', type=float, default=100000, help='Limiter quota per minute (user)')
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_server(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            throttle_rate=args.throttle_rate,
+            retry_after=0,
+        )
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # Configure before the services package builds its shared limiter
+    os.environ['GOOGLE_API_BASE_URL'] = base_url
+    os.environ['GOOGLE_API_PROJECT_QUOTA_PER_MINUTE'] = str(args.project_quota)
+    os.environ['GOOGLE_API_USER_QUOTA_PER_MINUTE'] = str(args.user_quota)
+    os.environ['GOOGLE_API_BACKOFF_BASE_SECONDS'] = '0.05'
+    # Fresh export cache and snapshot store: every export does its real API work
+    store_dir = tempfile.mkdtemp(prefix='sheets-bench-')
+    os.environ['SHEET_EXPORT_STORE_PATH'] = os.path.join(store_dir, 'exports.sqlite3')
+    if args.mode == 'template':
+        os.environ['GOOGLE_SHEETS_TEMPLATE_ID'] = 'benchmark-template'
+    if args.mode == 'upload':
+        os.environ['GOOGLE_SHEETS_UPLOAD_XLSX'] = 'true'
+
+    from services.google_api_client import get_rate_limiter
+    from services.google_sheets_generator import GoogleSheetsGenerator
+
+    fetch_stats(base_url, '__reset')
+    sows = [sample_sow(n, args.pricing_rows) for n in range(args.sheets)]
+    generator = GoogleSheetsGenerator(access_token='benchmark-token')
+
+    started = time.perf_counter()
+    if args.mode == 'bulk':
+        generator.create_bulk_sow_sheet('Benchmark Portfolio', sows)
+    else:
+        def export(sow):
+            return generator.create_sow_sheet(sow['client_name'], sow['service_name'], sow['sow_data'],
+                                              force_new=True)
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(export, sows))
+    elapsed = time.perf_counter() - started
+
+    stats = fetch_stats(base_url)
+    limiter = get_rate_limiter().get_metrics()
+
+    print("=" * 60)
+    print(f"Mode:               {args.mode}")
+    print(f"SOWs exported:      {args.sheets} (concurrency {args.concurrency})")
+    print(f"Elapsed:            {elapsed:.2f}s")
+    print(f"Sheets/second:      {args.sheets / elapsed:.2f}")
+    print(f"API calls:          {stats['total_calls']} ({stats['total_calls'] / args.sheets:.2f} per SOW)")
+    print(f"429s injected:      {stats['total_throttled']} (retries {limiter['retries']})")
+    print(f"Request bytes:      {stats['bytes_received']:,} ({stats['bytes_received'] / args.sheets:,.0f} per SOW)")
+    print(f"Calls by endpoint:  {json.dumps(stats['calls'], sort_keys=True)}")
+    print("=" * 60)
+
+    if server:
+        server.shutdown()
+    shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
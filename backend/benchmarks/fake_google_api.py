@@ -0,0 +1,231 @@
+"""
+Fake Google Sheets/Drive API
+Local stand-in for the Sheets v4, Drive v3 and OAuth endpoints used by the
+services package, for offline load testing without burning real quota.
+
+Point the backend at it with:
+    GOOGLE_API_BASE_URL=http://127.0.0.1:8099
+
+Usage: python -m benchmarks.fake_google_api --port 8099 --latency-ms 80 --throttle-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+# (method, path pattern, endpoint name)
+ROUTES = [
+    ('POST', r'^/v4/spreadsheets$', 'spreadsheets.create'),
+    ('POST', r'^/v4/spreadsheets/(?P<id>[^/:]+):batchUpdate$', 'spreadsheets.batchUpdate'),
+    ('POST', r'^/v4/spreadsheets/(?P<id>[^/:]+)/values:batchUpdate$', 'spreadsheets.values.batchUpdate'),
+    ('GET', r'^/drive/v3/files/(?P<id>[^/]+)$', 'files.get'),
+    ('PATCH', r'^/drive/v3/files/(?P<id>[^/]+)$', 'files.update'),
+    ('POST', r'^/drive/v3/files/(?P<id>[^/]+)/copy$', 'files.copy'),
+    ('POST', r'^/upload/drive/v3/files$', 'files.create'),
+    ('POST', r'^/drive/v3/files/(?P<id>[^/]+)/permissions$', 'permissions.create'),
+    ('POST', r'^/token$', 'oauth.token'),
+    ('GET', r'^/oauth2/v2/userinfo$', 'oauth.userinfo'),
+]
+
+
+class FakeGoogleState:
+    """Shared counters, fake latency and 429 injection"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: Optional[float] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.calls = Counter()
+        self.throttled = Counter()
+        self.bytes_received = 0
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.calls.clear()
+            self.throttled.clear()
+            self.bytes_received = 0
+            self.files.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'calls': dict(self.calls),
+                'throttled': dict(self.throttled),
+                'total_calls': sum(self.calls.values()),
+                'total_throttled': sum(self.throttled.values()),
+                'bytes_received': self.bytes_received,
+            }
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    """Routes requests to canned Sheets/Drive/OAuth responses"""
+
+    server_version = 'FakeGoogleAPI/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def state(self) -> FakeGoogleState:
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        with self.state.lock:
+            self.state.bytes_received += len(raw)
+        if self.headers.get('Content-Type', '').startswith('application/json') and raw:
+            return json.loads(raw)
+        return raw
+
+    def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, method: str, path: str) -> Tuple[Optional[str], Dict[str, str]]:
+        for route_method, pattern, name in ROUTES:
+            match = re.match(pattern, path)
+            if route_method == method and match:
+                return name, match.groupdict()
+        return None, {}
+
+    def _dispatch(self, method: str):
+        path = self.path.split('?', 1)[0]
+        if path == '/__stats':
+            return self._send(200, self.state.stats())
+        if path == '/__reset':
+            self.state.reset()
+            return self._send(200, {'status': 'reset'})
+
+        name, params = self._route(method, path)
+        body = self._read_body()
+        if name is None:
+            return self._send(404, {'error': {'code': 404, 'message': f'No fake for {method} {path}', 'status': 'NOT_FOUND'}})
+
+        delay = self.state.latency_ms + random.uniform(0, self.state.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        if self.state.throttle_rate and random.random() < self.state.throttle_rate:
+            with self.state.lock:
+                self.state.throttled[name] += 1
+            headers = {'Retry-After': str(self.state.retry_after)} if self.state.retry_after is not None else {}
+            return self._send(429, {
+                'error': {
+                    'code': 429,
+                    'message': "Quota exceeded for quota metric 'Write requests' (fake)",
+                    'status': 'RESOURCE_EXHAUSTED',
+                }
+            }, headers)
+
+        with self.state.lock:
+            self.state.calls[name] += 1
+        self._send(200, self._respond(name, params, body))
+
+    def _respond(self, name: str, params: Dict[str, str], body: Any) -> Dict[str, Any]:
+        if name == 'spreadsheets.create':
+            sheet_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.files[sheet_id] = {'parents': ['root']}
+            sheets = body.get('sheets') or [{'properties': {'sheetId': 0, 'title': 'Sheet1'}}]
+            return {
+                'spreadsheetId': sheet_id,
+                'properties': body.get('properties', {}),
+                'sheets': sheets,
+                'spreadsheetUrl': f'https://docs.google.com/spreadsheets/d/{sheet_id}/edit',
+            }
+        if name == 'spreadsheets.batchUpdate':
+            return {'spreadsheetId': params['id'], 'replies': [{} for _ in body.get('requests', [])]}
+        if name == 'spreadsheets.values.batchUpdate':
+            data = body.get('data', [])
+            return {
+                'spreadsheetId': params['id'],
+                'totalUpdatedRanges': len(data),
+                'totalUpdatedCells': sum(len(row) for item in data for row in item.get('values', [])),
+            }
+        if name in ('files.get', 'files.update'):
+            with self.state.lock:
+                parents = self.state.files.get(params['id'], {}).get('parents', ['root'])
+            return {'id': params['id'], 'parents': parents}
+        if name == 'files.copy':
+            copy_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.files[copy_id] = {'parents': (body or {}).get('parents', ['root'])}
+            return {'id': copy_id}
+        if name == 'files.create':
+            # Multipart upload: JSON metadata part followed by the file bytes
+            file_id = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.files[file_id] = {'parents': ['root'], 'size': len(body or b'')}
+            return {'id': file_id}
+        if name == 'permissions.create':
+            return {'id': uuid.uuid4().hex}
+        if name == 'oauth.token':
+            return {
+                'access_token': f'fake-{uuid.uuid4().hex}',
+                'refresh_token': f'fake-refresh-{uuid.uuid4().hex}',
+                'expires_in': 3599,
+                'token_type': 'Bearer',
+            }
+        if name == 'oauth.userinfo':
+            return {'email': 'benchmark@socialgarden.com.au', 'verified_email': True}
+        return {}
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, **state_options) -> ThreadingHTTPServer:
+    """Start the fake in a background thread; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), FakeGoogleHandler)
+    server.daemon_threads = True
+    server.state = FakeGoogleState(**state_options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local fake of the Google Sheets/Drive APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Fixed latency added to every call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra latency per call')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of calls answered with 429')
+    parser.add_argument('--retry-after', type=float, default=None, help='Retry-After seconds sent with 429s')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeGoogleHandler)
+    server.state = FakeGoogleState(args.latency_ms, args.jitter_ms, args.throttle_rate, args.retry_after)
+    print(f"Fake Google API listening on http://{args.host}:{args.port} (stats at /__stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
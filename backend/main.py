@@ -1,22 +1,56 @@
 import base64
 import os
+import threading
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 import weasyprint
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import FileResponse, ORJSONResponse, RedirectResponse, StreamingResponse
 from jinja2 import Template
-from pydantic import BaseModel
+from request_models import (
+    BulkSheetRequest,
+    ExcelExportRequest,
+    OAuthTokenRequest,
+    PDFRequest,
+    ProfessionalPDFRequest,
+    SheetRequest,
+    SheetRequestOAuth,
+    SheetSyncRequest,
+    json_body,
+)
+from services.google_api_client import get_rate_limiter
+from services.request_decompression import RequestDecompressionMiddleware, get_decompression_metrics
+from services.excel_export import XLSX_MIME_TYPE, iter_file_chunks, spool_export_workbook
+from services.excel_template import get_excel_template
 from services.google_oauth_handler import get_oauth_handler
-from services.google_sheets_generator import create_sow_sheet
+from services.oauth_token_store import get_oauth_sessions
+from services.pricing_engine import quote_rows
+from services.pricing_extraction import CENTS, document_pricing, export_pricing_rows
+from services.rate_card import get_rate_card_cache, reprice_enabled
+from services.google_sheets_generator import (
+    create_bulk_sow_sheet,
+    create_sow_sheet,
+    sync_sow_sheet,
+)
+from services.sheet_export_store import get_export_cache
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI(title="Social Garden PDF & Sheets Service")
+# orjson for every JSON response; request bodies are parsed from raw bytes (request_models)
+app = FastAPI(
+    title="Social Garden PDF & Sheets Service",
+    default_response_class=ORJSONResponse,
+)
+
+# Accept gzip/zstd request bodies (large html_content / TipTap uploads);
+# added before CORS so its error responses still carry CORS headers
+app.add_middleware(RequestDecompressionMiddleware)
 
 # Enable CORS for frontend requests
 # 🔒 Security: Only allow requests from our frontend domain
@@ -34,30 +68,35 @@ app.add_middleware(
 )
 
 
-class PDFRequest(BaseModel):
-    html_content: str
-    filename: str = "document"
-    show_pricing_summary: bool = (
-        True  # 🎯 Smart PDF Export: flag to control pricing summary visibility
-    )
-    content: Optional[Dict[str, Any]] = (
-        None  # TipTap JSON content for enforcement checks
-    )
-    final_investment_target_text: Optional[str] = (
-        None  # 🎯 Authoritative final price to display in PDF
-    )
-
-
-class SheetRequest(BaseModel):
-    client_name: str
-    service_name: str
-    overview: Optional[str] = ""
-    deliverables: Optional[str] = ""
-    outcomes: Optional[str] = ""
-    phases: Optional[str] = ""
-    pricing: Optional[list] = None
-    assumptions: Optional[str] = ""
-    timeline: Optional[str] = ""
+@app.on_event("startup")
+def load_excel_template_index():
+    """Scan (or load the cached index of) the Excel template before the first export"""
+    try:
+        get_excel_template()
+    except Exception as e:
+        print(f"WARNING: Excel template index not loaded at startup: {e}")
+
+
+@app.on_event("startup")
+def load_rate_card():
+    """
+    Fetch the rate card in the background: the frontend serving it may not be
+    up yet, and an unreachable card is retried on use
+    """
+    threading.Thread(target=get_rate_card_cache().get, name="rate-card-load", daemon=True).start()
+
+
+def sheet_sow_data(request) -> Dict[str, Any]:
+    """SOW sections of a sheet request in the shape the sheets generator expects"""
+    return {
+        "overview": request.overview,
+        "deliverables": request.deliverables,
+        "outcomes": request.outcomes,
+        "phases": request.phases,
+        "pricing": request.pricing or [],
+        "assumptions": request.assumptions,
+        "timeline": request.timeline,
+    }
 
 
 # HTML template - Clean template with only logo and footer
@@ -93,7 +132,7 @@ SOW_TEMPLATE = """
                     </td>
                 </tr>
             </table>
-            <p style="color:#6b7280; font-size: 0.85em; margin-top: 4px;">This final project value is authoritative and supersedes any computed totals.</p>
+            <p style="color:#6b7280; font-size: 0.85em; margin-top: 4px;">{{ summary_note }}</p>
             {% endif %}
         </div>
 
@@ -379,7 +418,7 @@ hr {
 
 
 @app.post("/generate-pdf")
-async def generate_pdf(request: PDFRequest):
+async def generate_pdf(request: PDFRequest = Depends(json_body(PDFRequest))):
     try:
         print("=== DEBUG: PDF Generation Request ===")
         print(f"📄 Filename: {request.filename}")
@@ -388,10 +427,25 @@ async def generate_pdf(request: PDFRequest):
         print(f"�📊 HTML Content Length: {len(request.html_content)}")
         print("=== Has table tag:", "<table" in request.html_content.lower(), "===")
 
-        # 🎯 CRITICAL FIX: When final_investment_target_text is provided,
-        # strip any computed summary sections from the HTML to avoid duplicates
+        # The summary shows the authoritative target when one is given,
+        # otherwise the total of the editor's pricing tables, in place of
+        # whatever summary the browser computed into the HTML
+        summary_text = request.final_investment_target_text
+        summary_note = "This final project value is authoritative and supersedes any computed totals."
+        if request.content:
+            pricing = document_pricing(request.content)
+            print(
+                f"💰 Pricing tables: {len(pricing['tables'])} | "
+                f"Document total (ex GST): ${pricing['total']:,.2f}"
+            )
+            if not summary_text and request.show_pricing_summary and pricing['total'] > 0:
+                summary_text = f"${pricing['total'].quantize(CENTS):,.2f} +GST"
+                summary_note = "Total of the document's pricing tables, excluding GST."
+
+        # 🎯 CRITICAL FIX: When a summary value is set, strip any computed
+        # summary sections from the HTML to avoid duplicates
         html_content = request.html_content
-        if request.final_investment_target_text:
+        if summary_text:
             import re
 
             # Remove any <h4>Summary</h4> section and its following table/paragraph
@@ -403,7 +457,7 @@ async def generate_pdf(request: PDFRequest):
                 flags=re.IGNORECASE | re.DOTALL,
             )
             print(
-                "✅ Stripped computed summary section from HTML (final_investment_target_text provided)"
+                "✅ Stripped computed summary section from HTML (summary value set)"
             )
 
         # Load and encode the Social Garden logo
@@ -423,7 +477,8 @@ async def generate_pdf(request: PDFRequest):
             html_content=html_content,
             css_content=DEFAULT_CSS,
             logo_base64=logo_base64,
-            final_investment_target_text=request.final_investment_target_text,
+            final_investment_target_text=summary_text,
+            summary_note=summary_note,
         )
 
         # Generate PDF with WeasyPrint
@@ -461,21 +516,34 @@ async def health_check():
     return {"status": "healthy", "service": "Social Garden PDF Service"}
 
 
+@app.get("/metrics/google-api")
+async def google_api_metrics():
+    """Google API throttling and retry counters"""
+    return get_rate_limiter().get_metrics()
+
+
+@app.get("/metrics/request-decompression")
+async def request_decompression_metrics():
+    """Compressed request counts, bytes and ratios per Content-Encoding"""
+    return get_decompression_metrics().get_metrics()
+
+
+# Sheet exports block on Google API calls and the rate limiter's waits and
+# backoff: plain def handlers, so FastAPI runs them in its threadpool
 @app.post("/create-sheet")
-async def create_sheet(request: SheetRequest):
+def create_sheet(request: SheetRequest = Depends(json_body(SheetRequest))):
     """Create a formatted Google Sheet from SOW data"""
     try:
-        sow_data = {
-            "overview": request.overview,
-            "deliverables": request.deliverables,
-            "outcomes": request.outcomes,
-            "phases": request.phases,
-            "pricing": request.pricing or [],
-            "assumptions": request.assumptions,
-            "timeline": request.timeline,
-        }
+        sow_data = sheet_sow_data(request)
 
-        result = create_sow_sheet(request.client_name, request.service_name, sow_data)
+        result = create_sow_sheet(
+            request.client_name,
+            request.service_name,
+            sow_data,
+            use_template=request.use_template,
+            upload_xlsx=request.upload_xlsx,
+            force_new=request.force_new,
+        )
         return result
 
     except ValueError as e:
@@ -499,24 +567,95 @@ async def oauth_authorize():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-class OAuthTokenRequest(BaseModel):
-    code: str
+@app.post("/sync-sheet")
+def sync_sheet(request: SheetSyncRequest = Depends(json_body(SheetSyncRequest))):
+    """Update an exported Google Sheet in place, sending only changed sections"""
+    try:
+        if request.session:
+            # The signed-in user's own Drive, as for /create-sheet-oauth
+            generator = get_oauth_sessions().get_sheets_generator(request.session)
+            return generator.sync_sow_sheet(
+                request.sheet_id,
+                request.client_name,
+                request.service_name,
+                sheet_sow_data(request),
+            )
+
+        result = sync_sow_sheet(
+            request.sheet_id,
+            request.client_name,
+            request.service_name,
+            sheet_sow_data(request),
+            access_token=request.access_token,
+        )
+        return result
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+
+        error_detail = f"Sheet sync failed: {str(e)}\n{traceback.format_exc()}"
+        print(error_detail)
+        raise HTTPException(status_code=500, detail=f"Sheet sync failed: {str(e)}")
+
+
+@app.get("/metrics/rate-card")
+async def rate_card_metrics():
+    """Version, size and age of the in-memory rate card index"""
+    return get_rate_card_cache().get_status()
+
+
+@app.post("/rate-card/invalidate")
+async def invalidate_rate_card(version: Optional[str] = None):
+    """Rate card edited: refetch it on the next export (a no-op if `version` is already held)"""
+    invalidated = get_rate_card_cache().invalidate(version)
+    return {"invalidated": invalidated}
+
+
+async def check_line_items(rows: list, label: str) -> list:
+    """Line items validated (and, with RATE_CARD_REPRICE=true, repriced) against the rate card"""
+    # A stale or invalidated card is refetched with blocking I/O: off the event loop
+    rate_card = await run_in_threadpool(get_rate_card_cache().get)
+    if rate_card is None:
+        return rows
+    reprice = reprice_enabled()
+    checked, issues = rate_card.price_rows(rows, reprice=reprice)
+    for issue in issues:
+        print(f"⚠️ [RATE CARD] {label}: {issue}")
+    if issues:
+        print(f"💳 [RATE CARD] {label}: {len(issues)} of {len(rows)} line items "
+              f"{'repriced or unmatched' if reprice else 'disagree'} (version {rate_card.version})")
+    return checked
+
+
+@app.delete("/sheets/{sheet_id}/cache")
+async def invalidate_sheet_cache(sheet_id: str):
+    """Forget cached exports of a sheet so the next export creates a new one"""
+    removed = get_export_cache().invalidate(sheet_id)
+    return {"sheet_id": sheet_id, "invalidated": removed}
+
+
+@app.delete("/oauth/sessions/{session}")
+async def oauth_revoke_session(session: str):
+    """Sign out: forget a session's stored tokens"""
+    revoked = get_oauth_sessions().revoke_session(session)
+    return {"revoked": revoked}
 
 
 @app.post("/oauth/token")
-async def oauth_token(request: OAuthTokenRequest):
-    """Exchange OAuth code for access token"""
+async def oauth_token(request: OAuthTokenRequest = Depends(json_body(OAuthTokenRequest))):
+    """Exchange OAuth code for a session handle; the tokens stay server side"""
     try:
         oauth_handler = get_oauth_handler()
         token_dict = oauth_handler.exchange_code_for_token(request.code)
 
-        # Encode token for safe transmission
-        encoded_token = oauth_handler.encode_token(token_dict)
+        oauth_sessions = get_oauth_sessions()
+        session = oauth_sessions.create_session(token_dict)
 
         return {
-            "token": encoded_token,
-            "access_token": token_dict.get("access_token"),
-            "expires_in": token_dict.get("expires_in"),
+            "session": session,
+            "session_expires_in": int(oauth_sessions.session_ttl),
         }
     except Exception as e:
         print(f"ERROR exchanging token: {str(e)}")
@@ -525,67 +664,35 @@ async def oauth_token(request: OAuthTokenRequest):
         )
 
 
-class SOWItem(BaseModel):
-    description: str  # REQUIRED
-    role: str
-    hours: float
-    cost: float
-
-
-class SOWScope(BaseModel):
-    id: int  # REQUIRED
-    title: str
-    description: str
-    items: list[SOWItem]
-    deliverables: list[str]
-    assumptions: list[str]  # REQUIRED
-
-
-class ProfessionalPDFRequest(BaseModel):
-    projectTitle: str
-    scopes: list[SOWScope]
-    discount: float = 0
-    clientName: Optional[str] = None
-    company: Optional[str] = "Social Garden"
-    budgetNotes: Optional[str] = None
-    authoritativeTotal: Optional[float] = None  # 🎯 AI-calculated authoritative total
-
-
-class SheetRequestOAuth(BaseModel):
-    client_name: str
-    service_name: str
-    overview: Optional[str] = ""
-    deliverables: Optional[str] = ""
-    outcomes: Optional[str] = ""
-    phases: Optional[str] = ""
-    pricing: Optional[list] = None
-    assumptions: Optional[str] = ""
-    timeline: Optional[str] = ""
-    access_token: str
-
-
 @app.post("/create-sheet-oauth")
-async def create_sheet_oauth(request: SheetRequestOAuth):
+def create_sheet_oauth(request: SheetRequestOAuth = Depends(json_body(SheetRequestOAuth))):
     """Create a formatted Google Sheet using OAuth token"""
     try:
-        if not request.access_token:
-            raise ValueError("access_token is required")
-
-        sow_data = {
-            "overview": request.overview,
-            "deliverables": request.deliverables,
-            "outcomes": request.outcomes,
-            "phases": request.phases,
-            "pricing": request.pricing or [],
-            "assumptions": request.assumptions,
-            "timeline": request.timeline,
-        }
+        if not request.session and not request.access_token:
+            raise ValueError("session or access_token is required")
+
+        sow_data = sheet_sow_data(request)
+
+        if request.session:
+            # Refreshes the token if needed and reuses the session's clients
+            generator = get_oauth_sessions().get_sheets_generator(request.session)
+            return generator.create_sow_sheet(
+                request.client_name,
+                request.service_name,
+                sow_data,
+                use_template=request.use_template,
+                upload_xlsx=request.upload_xlsx,
+                force_new=request.force_new,
+            )
 
         result = create_sow_sheet(
             request.client_name,
             request.service_name,
             sow_data,
             access_token=request.access_token,
+            use_template=request.use_template,
+            upload_xlsx=request.upload_xlsx,
+            force_new=request.force_new,
         )
         return result
 
@@ -599,8 +706,41 @@ async def create_sheet_oauth(request: SheetRequestOAuth):
         raise HTTPException(status_code=500, detail=f"Sheet creation failed: {str(e)}")
 
 
+@app.post("/create-sheet-bulk")
+def create_sheet_bulk(request: BulkSheetRequest = Depends(json_body(BulkSheetRequest))):
+    """Export many SOWs into one Google Sheet, one tab each plus a summary tab"""
+    try:
+        title = request.title or f"SOW Portfolio - {datetime.now().strftime('%d %b %Y')}"
+        sows = [
+            {
+                "client_name": sow.client_name,
+                "service_name": sow.service_name,
+                "sow_data": sheet_sow_data(sow),
+            }
+            for sow in request.sows
+        ]
+
+        if request.session:
+            generator = get_oauth_sessions().get_sheets_generator(request.session)
+            return generator.create_bulk_sow_sheet(title, sows)
+
+        result = create_bulk_sow_sheet(title, sows, access_token=request.access_token)
+        return result
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+
+        error_detail = f"Bulk sheet creation failed: {str(e)}\n{traceback.format_exc()}"
+        print(error_detail)
+        raise HTTPException(
+            status_code=500, detail=f"Bulk sheet creation failed: {str(e)}"
+        )
+
+
 @app.post("/generate-professional-pdf")
-async def generate_professional_pdf(request: ProfessionalPDFRequest):
+async def generate_professional_pdf(request: ProfessionalPDFRequest = Depends(json_body(ProfessionalPDFRequest))):
     """Generate professional multi-scope PDF using structured data"""
     try:
         print("=== DEBUG: Professional PDF Generation Request ===")
@@ -646,157 +786,47 @@ async def generate_professional_pdf(request: ProfessionalPDFRequest):
         # Render the template with Jinja2
         template = Template(template_content)
 
-        # Calculate totals
-        calculated_subtotal = sum(
-            sum(item.cost for item in scope.items) for scope in request.scopes
+        # Item costs checked against the rate card before anything is totalled
+        for scope in request.scopes:
+            checked = await check_line_items([item.model_dump() for item in scope.items], f"Scope {scope.id}")
+            for item, row in zip(scope.items, checked):
+                item.cost = row["cost"]
+
+        # Scope items through the shared pricing engine: discount validation,
+        # GST and the authoritative total are the same rules /export-excel uses
+        pricing = quote_rows(
+            [
+                {"hours": item.hours, "cost": item.cost, "scope": scope.id}
+                for scope in request.scopes
+                for item in scope.items
+            ],
+            discount=request.discount,
+            authoritative_total=request.authoritativeTotal,
         )
-
-        # 🎯 Use authoritative total if provided (from AI), otherwise use calculated
-        if request.authoritativeTotal is not None:
-            print(
-                f"🎯 Using authoritative total from AI: ${request.authoritativeTotal:.2f}"
-            )
-            # Use authoritative total as final amount, scale other components proportionally
-            total = request.authoritativeTotal
-            gst_amount = total * (10 / 110)  # GST portion of total (10/110 = ~9.09%)
-            subtotal_after_discount = total * (
-                100 / 110
-            )  # Pre-GST portion (100/110 = ~90.91%)
-            discount_amount = calculated_subtotal - subtotal_after_discount
-            subtotal = (
-                calculated_subtotal  # Keep original calculated subtotal for display
-            )
-
-            # CRITICAL FIX: Validate discount calculation to prevent negative values
-            if discount_amount < 0 or discount_amount > subtotal:
-                print(
-                    f"⚠️ Invalid discount amount detected: {discount_amount}, recalculating with validation"
-                )
-                # Apply the same validation logic as the else branch
-                try:
-                    discount_percent = (
-                        float(request.discount) if request.discount is not None else 0.0
-                    )
-                except (ValueError, TypeError):
-                    discount_percent = 0.0
-
-                if discount_percent < 0 or discount_percent > 50:
-                    discount_percent = 0.0
-
-                discount_amount = subtotal * (discount_percent / 100.0)
-                subtotal_after_discount = subtotal - discount_amount
-                gst_amount = subtotal_after_discount * 0.10
-                total = subtotal_after_discount + gst_amount
-
-                print(
-                    f"✅ Recalculated with {discount_percent}% discount: ${total:.2f}"
-                )
-        else:
-            print(f"🧮 Using calculated totals: ${calculated_subtotal:.2f}")
-            subtotal = calculated_subtotal
-
-            # 🎯 CRITICAL FIX: Comprehensive discount validation and calculation
-            print(f"🔍 [DISCOUNT DEBUG] Raw discount value: {request.discount}")
-            print(f"🔍 [DISCOUNT DEBUG] Discount type: {type(request.discount)}")
-
-            # Ensure discount is a valid number
-            try:
-                discount_percent = (
-                    float(request.discount) if request.discount is not None else 0.0
-                )
-            except (ValueError, TypeError):
-                print(
-                    f"❌ [DISCOUNT ERROR] Invalid discount format: {request.discount}, defaulting to 0%"
-                )
-                discount_percent = 0.0
-
-            # Validate discount range - must be between 0 and 50% (cap at 50% for safety)
-            if discount_percent < 0:
-                print(
-                    f"⚠️ [DISCOUNT ERROR] Negative discount {discount_percent}%, setting to 0%"
-                )
-                discount_percent = 0.0
-            elif discount_percent >= 100:
-                print(
-                    f"❌ [DISCOUNT ERROR] Impossible discount {discount_percent}%, setting to 0%"
-                )
-                discount_percent = 0.0
-            elif discount_percent > 50:
-                print(
-                    f"⚠️ [DISCOUNT ERROR] Excessive discount {discount_percent}%, capping at 50%"
-                )
-                discount_percent = 50.0
-
-            print(
-                f"✅ [DISCOUNT VALIDATED] Final discount percentage: {discount_percent}%"
-            )
-
-            # Calculate discount amount with validation
-            discount_amount = subtotal * (discount_percent / 100.0)
-
-            # Ensure discount amount doesn't exceed subtotal
-            if discount_amount > subtotal:
-                print(
-                    f"❌ [DISCOUNT ERROR] Discount amount ${discount_amount:.2f} exceeds subtotal ${subtotal:.2f}"
-                )
-                discount_amount = 0.0
-                discount_percent = 0.0
-
-            subtotal_after_discount = subtotal - discount_amount
-
-            # Ensure subtotal after discount is not negative
-            if subtotal_after_discount < 0:
-                print(
-                    f"❌ [DISCOUNT ERROR] Negative subtotal after discount, resetting calculations"
-                )
-                discount_amount = 0.0
-                discount_percent = 0.0
-                subtotal_after_discount = subtotal
-
-            gst_amount = subtotal_after_discount * 0.10
-            total = subtotal_after_discount + gst_amount
-
-            # Final validation - ensure all values are positive
-            if total < 0 or gst_amount < 0 or subtotal_after_discount < 0:
-                print(
-                    f"❌ [DISCOUNT ERROR] Negative final values detected, resetting to no discount"
-                )
-                discount_amount = 0.0
-                discount_percent = 0.0
-                subtotal_after_discount = subtotal
-                gst_amount = subtotal * 0.10
-                total = subtotal + gst_amount
-
-            print(f"💰 [DISCOUNT SUMMARY] Subtotal: ${subtotal:.2f}")
+        if request.authoritativeTotal is not None and not pricing["authoritative"]:
             print(
-                f"💰 [DISCOUNT SUMMARY] Discount ({discount_percent}%): -${discount_amount:.2f}"
+                f"⚠️ Authoritative total ${request.authoritativeTotal:.2f} implies an invalid discount "
+                f"against ${pricing['subtotal']:.2f}, using the {pricing['discount_percent']}% discount"
             )
-            print(
-                f"💰 [DISCOUNT SUMMARY] After Discount: ${subtotal_after_discount:.2f}"
-            )
-            print(f"💰 [DISCOUNT SUMMARY] GST (10%): ${gst_amount:.2f}")
-            print(f"💰 [DISCOUNT SUMMARY] Total: ${total:.2f}")
-
-        # Use the validated discount percentage for template rendering
-        validated_discount = (
-            discount_percent
-            if "discount_percent" in locals()
-            else (request.discount if request.discount is not None else 0)
-        )
+        print(f"💰 [PRICING] Subtotal: ${pricing['subtotal']:.2f}")
+        print(f"💰 [PRICING] Discount ({pricing['discount_percent']}%): -${pricing['discount']:.2f}")
+        print(f"💰 [PRICING] After Discount: ${pricing['after_discount']:.2f}")
+        print(f"💰 [PRICING] GST (10%): ${pricing['gst']:.2f}")
+        print(f"💰 [PRICING] Total: ${pricing['total']:.2f}")
 
         full_html = template.render(
             projectTitle=request.projectTitle,
             scopes=request.scopes,
-            discount=validated_discount,
+            discount=float(pricing["discount_percent"]),
             clientName=request.clientName,
             company=request.company,
             budgetNotes=request.budgetNotes,
             logo_base64=logo_base64,
-            subtotal=subtotal,
-            discount_amount=discount_amount,
-            subtotal_after_discount=subtotal_after_discount,
-            gst_amount=gst_amount,
-            total=total,
+            subtotal=float(pricing["subtotal"]),
+            discount_amount=float(pricing["discount"]),
+            subtotal_after_discount=float(pricing["after_discount"]),
+            gst_amount=float(pricing["gst"]),
+            total=float(pricing["total"]),
         )
 
         # Generate PDF with WeasyPrint
@@ -840,146 +870,37 @@ async def generate_professional_pdf(request: ProfessionalPDFRequest):
 
 
 @app.post("/export-excel")
-async def create_excel_file(request: dict):
+async def create_excel_file(
+    request: ExcelExportRequest = Depends(json_body(ExcelExportRequest)),
+):
     """Generate Excel file from SOW data"""
     try:
-        # Import xlsxwriter (install if needed: pip install xlsxwriter)
         import io
 
-        import xlsxwriter
-
         # Get SOW data from request
-        sow_data = request.get("sowData", {})
-        filename = request.get("filename", "sow-export.xlsx")
-
-        # Create workbook in memory
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
-
-        # Create worksheets
-        # 1. Overview worksheet
-        overview_ws = workbook.add_worksheet("Overview")
-        overview_ws.write("A1", "Statement of Work")
-        overview_ws.write("A2", f"Client: {sow_data.get('client', 'N/A')}")
-        overview_ws.write("A3", f"Title: {sow_data.get('title', 'N/A')}")
-        overview_ws.write("A4", f"Date: {datetime.now().strftime('%Y-%m-%d')}")
-
-        # 2. Pricing worksheet
-        pricing_ws = workbook.add_worksheet("Pricing")
-
-        # Header formatting
-        header_format = workbook.add_format(
-            {"bold": True, "bg_color": "#4F81BD", "font_color": "white", "border": 1}
-        )
-
-        # Write headers
-        pricing_ws.write(0, 0, "Role", header_format)
-        pricing_ws.write(0, 1, "Hours", header_format)
-        pricing_ws.write(0, 2, "Rate (AUD)", header_format)
-        pricing_ws.write(0, 3, "Total (AUD)", header_format)
-
-        # Extract pricing data
-        pricing_rows = sow_data.get("pricingRows", [])
-
-        # Write pricing data
-        row_num = 1
-        total_hours = 0
-        subtotal = 0
-
-        for row in pricing_rows:
-            role = row.get("role", "N/A")
-            hours = float(row.get("hours", 0))
-            rate = float(row.get("rate", 0))
-            total = float(row.get("total", hours * rate))
-
-            pricing_ws.write(row_num, 0, role)
-            pricing_ws.write(row_num, 1, hours)
-            pricing_ws.write(row_num, 2, rate)
-            pricing_ws.write(row_num, 3, total)
-
-            total_hours += hours
-            subtotal += total
-            row_num += 1
-
-        # Add empty row
-        row_num += 1
-
-        # Calculate totals
-        discount_info = sow_data.get("discount", {})
-        discount_amount = 0
-
-        if discount_info:
-            discount_type = discount_info.get("type", "")
-            discount_value = float(discount_info.get("value", 0))
-
-            if discount_type == "percentage" and discount_value > 0:
-                discount_amount = subtotal * (discount_value / 100)
-            elif discount_type == "fixed" and discount_value > 0:
-                discount_amount = discount_value
-
-        grand_total = subtotal - discount_amount
-        gst_amount = grand_total * 0.1
-        total_with_gst = grand_total + gst_amount
-
-        # Write totals
-        totals_format = workbook.add_format({"bold": True})
-
-        pricing_ws.write(row_num, 0, "Total Hours", totals_format)
-        pricing_ws.write(row_num, 1, total_hours)
-        row_num += 1
-
-        pricing_ws.write(row_num, 2, "Sub-Total (excl. GST)", totals_format)
-        pricing_ws.write(row_num, 3, subtotal)
-        row_num += 1
-
-        if discount_amount > 0:
-            discount_label = (
-                f"Discount ({discount_value}%)"
-                if discount_type == "percentage"
-                else "Discount"
-            )
-            pricing_ws.write(row_num, 2, discount_label, totals_format)
-            pricing_ws.write(row_num, 3, discount_amount)
-            row_num += 1
-
-        pricing_ws.write(row_num, 2, "Grand Total (excl. GST)", totals_format)
-        pricing_ws.write(row_num, 3, grand_total)
-        row_num += 1
-
-        pricing_ws.write(row_num, 2, "GST (10%)", totals_format)
-        pricing_ws.write(row_num, 3, gst_amount)
-        row_num += 1
-
-        pricing_ws.write(row_num, 2, "Total Inc. GST", totals_format)
-        pricing_ws.write(row_num, 3, total_with_gst)
-
-        # 3. Deliverables worksheet (if available)
-        if "deliverables" in sow_data and sow_data["deliverables"]:
-            deliverables_ws = workbook.add_worksheet("Deliverables")
-            deliverables_ws.write(0, 0, "Deliverables", header_format)
-
-            for i, deliverable in enumerate(sow_data["deliverables"], 1):
-                deliverables_ws.write(i, 0, deliverable)
-
-        # 4. Assumptions worksheet (if available)
-        if "assumptions" in sow_data and sow_data["assumptions"]:
-            assumptions_ws = workbook.add_worksheet("Assumptions")
-            assumptions_ws.write(0, 0, "Assumptions", header_format)
-
-            for i, assumption in enumerate(sow_data["assumptions"], 1):
-                assumptions_ws.write(i, 0, assumption)
-
-        # Close workbook
-        workbook.close()
-
-        # Reset buffer position
-        output.seek(0)
-
-        # Return file
-        return FileResponse(
-            io.BytesIO(output.getvalue()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            filename=filename,
+        sow_data = request.sowData.export_dict()
+        if not sow_data.get("pricingRows") and request.sowData.content:
+            # Priced from the editor document, nested tables included
+            sow_data["pricingRows"] = export_pricing_rows(request.sowData.content)
+        filename = request.filename.replace('"', "")
+        if sow_data.get("pricingRows"):
+            sow_data["pricingRows"] = await check_line_items(sow_data["pricingRows"], filename)
+
+        # Constant-memory writer unless the caller opts into the branded template
+        template = get_excel_template() if request.useTemplate else None
+
+        # Built once into a spool and streamed out in chunks, never copied
+        spool = spool_export_workbook(sow_data, template)
+        size = spool.seek(0, io.SEEK_END)
+        spool.seek(0)
+
+        return StreamingResponse(
+            iter_file_chunks(spool),
+            media_type=XLSX_MIME_TYPE,
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "Content-Length": str(size),
+            },
         )
 
     except Exception as e:
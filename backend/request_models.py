@@ -0,0 +1,188 @@
+"""
+Request Models
+Pydantic models for the API's request bodies, parsed from the raw body bytes
+by json_body. Editor payloads (html_content, TipTap content, many scopes) run
+to several megabytes, where FastAPI's stdlib json.loads is a measurable part
+of latency. orjson.loads + model_validate beat both that path and
+model_validate_json on pydantic-core 2.5 for every body we send, by the
+widest margin on free-form TipTap trees (benchmarks/bench_request_parsing.py).
+"""
+
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+import orjson
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def json_body(model: Type[ModelT]) -> Callable:
+    """
+    Dependency parsing the request body into `model` from raw bytes
+
+    Usage: async def endpoint(request: PDFRequest = Depends(json_body(PDFRequest)))
+    Invalid JSON or fields are answered with FastAPI's usual 422 body.
+    """
+
+    async def parse(request: Request) -> ModelT:
+        body = await request.body()
+        try:
+            return model.model_validate(orjson.loads(body))
+        except orjson.JSONDecodeError as e:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body",), "msg": f"Invalid JSON: {e}"}]
+            )
+        except ValidationError as e:
+            raise RequestValidationError(
+                # Inputs are left out: they can echo a multi-megabyte body back
+                [
+                    {**error, "loc": ("body", *error["loc"])}
+                    for error in e.errors(include_url=False, include_input=False)
+                ]
+            )
+
+    parse.__name__ = f"parse_{model.__name__}"
+    return parse
+
+
+class PDFRequest(BaseModel):
+    html_content: str
+    filename: str = "document"
+    show_pricing_summary: bool = (
+        True  # 🎯 Smart PDF Export: flag to control pricing summary visibility
+    )
+    content: Optional[Dict[str, Any]] = (
+        None  # TipTap JSON content for enforcement checks
+    )
+    final_investment_target_text: Optional[str] = (
+        None  # 🎯 Authoritative final price to display in PDF
+    )
+
+
+class SheetRequest(BaseModel):
+    client_name: str
+    service_name: str
+    overview: Optional[str] = ""
+    deliverables: Optional[str] = ""
+    outcomes: Optional[str] = ""
+    phases: Optional[str] = ""
+    pricing: Optional[list] = None
+    assumptions: Optional[str] = ""
+    timeline: Optional[str] = ""
+    use_template: Optional[bool] = None  # Copy branded master sheet (None = auto)
+    upload_xlsx: Optional[bool] = None  # Build the workbook locally, upload in one Drive call (None = auto)
+    force_new: bool = False  # Bypass the export dedupe cache
+
+
+class SheetSyncRequest(BaseModel):
+    sheet_id: str
+    client_name: str
+    service_name: str
+    overview: Optional[str] = ""
+    deliverables: Optional[str] = ""
+    outcomes: Optional[str] = ""
+    phases: Optional[str] = ""
+    pricing: Optional[list] = None
+    assumptions: Optional[str] = ""
+    timeline: Optional[str] = ""
+    session: Optional[str] = None  # Handle from /oauth/token (preferred)
+    access_token: Optional[str] = None  # Raw token; service account when neither is sent
+
+
+class OAuthTokenRequest(BaseModel):
+    code: str
+
+
+class SOWItem(BaseModel):
+    description: str  # REQUIRED
+    role: str
+    hours: float
+    cost: float
+
+
+class SOWScope(BaseModel):
+    id: int  # REQUIRED
+    title: str
+    description: str
+    items: list[SOWItem]
+    deliverables: list[str]
+    assumptions: list[str]  # REQUIRED
+
+
+class ProfessionalPDFRequest(BaseModel):
+    projectTitle: str
+    scopes: list[SOWScope]
+    discount: float = 0
+    clientName: Optional[str] = None
+    company: Optional[str] = "Social Garden"
+    budgetNotes: Optional[str] = None
+    authoritativeTotal: Optional[float] = None  # 🎯 AI-calculated authoritative total
+
+
+class SheetRequestOAuth(BaseModel):
+    client_name: str
+    service_name: str
+    overview: Optional[str] = ""
+    deliverables: Optional[str] = ""
+    outcomes: Optional[str] = ""
+    phases: Optional[str] = ""
+    pricing: Optional[list] = None
+    assumptions: Optional[str] = ""
+    timeline: Optional[str] = ""
+    use_template: Optional[bool] = None  # Copy branded master sheet (None = auto)
+    upload_xlsx: Optional[bool] = None  # Build the workbook locally, upload in one Drive call (None = auto)
+    force_new: bool = False  # Bypass the export dedupe cache
+    session: Optional[str] = None  # Handle from /oauth/token (preferred)
+    access_token: Optional[str] = None  # Raw token, when no session is kept
+
+
+class BulkSheetRequest(BaseModel):
+    title: Optional[str] = None
+    sows: list[SheetRequest]
+    session: Optional[str] = None  # Handle from /oauth/token (preferred)
+    access_token: Optional[str] = None  # Raw token; service account when neither is sent
+
+
+# /export-excel body, built by frontend/app/api/sow/[id]/export-excel.
+# Strict, except numbers: hours, rates and discounts also arrive as numeric
+# strings ("10") from the editor, and are coerced to floats.
+class ExcelPricingRow(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    role: str = "N/A"
+    hours: float = Field(0, strict=False)
+    rate: float = Field(0, strict=False)
+    total: Optional[float] = Field(None, strict=False)  # Adjusted line total; hours * rate when omitted
+
+
+class ExcelDiscount(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    type: str = ""  # "percentage" or "fixed"
+    value: float = Field(0, strict=False)
+
+
+class ExcelSOWData(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    title: Optional[str] = None
+    client: Optional[str] = None
+    pricingRows: list[ExcelPricingRow] = []
+    discount: Optional[ExcelDiscount] = None
+    deliverables: list[str] = []
+    assumptions: list[str] = []
+    content: Optional[Dict[str, Any]] = None  # TipTap document, priced when pricingRows is empty
+
+    def export_dict(self) -> Dict[str, Any]:
+        """Fields the caller sent, in the dict shape the workbook writers read"""
+        return self.model_dump(exclude_unset=True, exclude_none=True, exclude={"content"})
+
+
+class ExcelExportRequest(BaseModel):
+    model_config = ConfigDict(strict=True)
+
+    sowData: ExcelSOWData = ExcelSOWData()
+    filename: str = "sow-export.xlsx"
+    useTemplate: bool = False  # Fill the branded template (services.excel_template) instead of streaming
@@ -1,5 +1,5 @@
 """Services package for Social Garden SOW Backend"""
 
-from .google_sheets_generator import create_sow_sheet, GoogleSheetsGenerator
+from .google_sheets_generator import create_sow_sheet, create_bulk_sow_sheet, sync_sow_sheet, GoogleSheetsGenerator
 
-__all__ = ['create_sow_sheet', 'GoogleSheetsGenerator']
+__all__ = ['create_sow_sheet', 'create_bulk_sow_sheet', 'sync_sow_sheet', 'GoogleSheetsGenerator']
@@ -0,0 +1,261 @@
+"""
+Excel Export Service
+xlsxwriter workbooks for SOW exports: the /export-excel download and the
+Social Garden branded layout uploaded to Drive as a Google Sheet
+"""
+
+import io
+import os
+import tempfile
+from datetime import datetime
+from typing import IO, Any, Dict, Iterator, List
+
+import xlsxwriter
+
+from .pricing_engine import quote_rows
+
+XLSX_MIME_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Finished exports stay in memory up to this size, then spill to a temp file
+DEFAULT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Social Garden branding colors (same palette as the Google Sheets generator)
+SG_GREEN = "#1CBF79"
+SG_DARK = "#0e2e33"
+SG_LIGHT_GRAY = "#f5f5f5"
+
+# Column widths in pixels of a branded SOW sheet, columns A-F
+BRANDED_COLUMN_WIDTHS = [200, 150, 150, 150, 150, 100]
+CURRENCY_FORMAT = "$#,##0.00"
+
+
+class Formula(str):
+    """A formula the workbook or sheet builder wrote itself; any other text is literal"""
+
+
+def write_cell(worksheet, row: int, col: int, value: Any, cell_format=None):
+    """Write a value by type; only Formula values become formulas, other text stays text"""
+    if value is None or value == "":
+        worksheet.write_blank(row, col, None, cell_format)
+    elif isinstance(value, Formula):
+        worksheet.write_formula(row, col, value, cell_format)
+    elif isinstance(value, (int, float)):
+        worksheet.write_number(row, col, value, cell_format)
+    else:
+        worksheet.write_string(row, col, str(value), cell_format)
+
+
+def spool_export_workbook(sow_data: Dict[str, Any], template=None) -> IO[bytes]:
+    """
+    Workbook served by /export-excel, in a temporary spool rewound to the start
+
+    Args:
+        sow_data: Dictionary with title, client, pricingRows, discount,
+            deliverables and assumptions
+        template: Indexed ExcelTemplate to fill (services.excel_template);
+            the plain generated workbook is used when None
+
+    Returns:
+        Spooled temporary file holding the .xlsx; the caller closes it
+    """
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=int(os.getenv("EXCEL_EXPORT_SPOOL_MAX_BYTES", DEFAULT_SPOOL_MAX_BYTES))
+    )
+    try:
+        if template is not None:
+            template.fill(sow_data, spool)
+        else:
+            write_export_workbook(sow_data, spool)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def iter_file_chunks(fileobj: IO[bytes], chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Stream a file in chunks, closing it once fully read"""
+    try:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def write_export_workbook(sow_data: Dict[str, Any], output: IO[bytes]):
+    """
+    Write the /export-excel workbook to a file object
+    constant_memory flushes each row as soon as the next one starts, so
+    memory stays flat however many pricing rows there are; rows must be
+    written top to bottom
+    """
+    # Role, client and list text come from the request: never parsed as formulas
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True, "strings_to_formulas": False})
+
+    # 1. Overview worksheet
+    overview_ws = workbook.add_worksheet("Overview")
+    overview_ws.write("A1", "Statement of Work")
+    overview_ws.write("A2", f"Client: {sow_data.get('client', 'N/A')}")
+    overview_ws.write("A3", f"Title: {sow_data.get('title', 'N/A')}")
+    overview_ws.write("A4", f"Date: {datetime.now().strftime('%Y-%m-%d')}")
+
+    # 2. Pricing worksheet
+    pricing_ws = workbook.add_worksheet("Pricing")
+
+    # Header formatting
+    header_format = workbook.add_format(
+        {"bold": True, "bg_color": "#4F81BD", "font_color": "white", "border": 1}
+    )
+
+    # Write headers
+    pricing_ws.write(0, 0, "Role", header_format)
+    pricing_ws.write(0, 1, "Hours", header_format)
+    pricing_ws.write(0, 2, "Rate (AUD)", header_format)
+    pricing_ws.write(0, 3, "Total (AUD)", header_format)
+
+    # Extract pricing data; line amounts and totals come from the pricing engine
+    pricing_rows = sow_data.get("pricingRows", [])
+    discount_info = sow_data.get("discount") or {}
+    pricing = quote_rows(pricing_rows, discount=discount_info)
+
+    # Write pricing data
+    row_num = 1
+
+    for row, total in zip(pricing_rows, pricing["lines"]):
+        pricing_ws.write(row_num, 0, row.get("role", "N/A"))
+        pricing_ws.write(row_num, 1, float(row.get("hours", 0)))
+        pricing_ws.write(row_num, 2, float(row.get("rate", 0)))
+        pricing_ws.write(row_num, 3, float(total))
+        row_num += 1
+
+    # Add empty row
+    row_num += 1
+
+    total_hours = float(pricing["total_hours"])
+    subtotal = float(pricing["subtotal"])
+    discount_amount = float(pricing["discount"])
+    grand_total = float(pricing["after_discount"])
+    gst_amount = float(pricing["gst"])
+    total_with_gst = float(pricing["total"])
+
+    # Write totals
+    totals_format = workbook.add_format({"bold": True})
+
+    pricing_ws.write(row_num, 0, "Total Hours", totals_format)
+    pricing_ws.write(row_num, 1, total_hours)
+    row_num += 1
+
+    pricing_ws.write(row_num, 2, "Sub-Total (excl. GST)", totals_format)
+    pricing_ws.write(row_num, 3, subtotal)
+    row_num += 1
+
+    if discount_amount > 0:
+        discount_label = (
+            f"Discount ({pricing['discount_percent']}%)"
+            if discount_info.get("type") == "percentage"
+            else "Discount"
+        )
+        pricing_ws.write(row_num, 2, discount_label, totals_format)
+        pricing_ws.write(row_num, 3, discount_amount)
+        row_num += 1
+
+    pricing_ws.write(row_num, 2, "Grand Total (excl. GST)", totals_format)
+    pricing_ws.write(row_num, 3, grand_total)
+    row_num += 1
+
+    pricing_ws.write(row_num, 2, "GST (10%)", totals_format)
+    pricing_ws.write(row_num, 3, gst_amount)
+    row_num += 1
+
+    pricing_ws.write(row_num, 2, "Total Inc. GST", totals_format)
+    pricing_ws.write(row_num, 3, total_with_gst)
+
+    # 3. Deliverables worksheet (if available)
+    if "deliverables" in sow_data and sow_data["deliverables"]:
+        deliverables_ws = workbook.add_worksheet("Deliverables")
+        deliverables_ws.write(0, 0, "Deliverables", header_format)
+
+        for i, deliverable in enumerate(sow_data["deliverables"], 1):
+            deliverables_ws.write(i, 0, deliverable)
+
+    # 4. Assumptions worksheet (if available)
+    if "assumptions" in sow_data and sow_data["assumptions"]:
+        assumptions_ws = workbook.add_worksheet("Assumptions")
+        assumptions_ws.write(0, 0, "Assumptions", header_format)
+
+        for i, assumption in enumerate(sow_data["assumptions"], 1):
+            assumptions_ws.write(i, 0, assumption)
+
+    workbook.close()
+
+
+def build_branded_workbook(header: List[str], sections: List[Dict[str, Any]]) -> bytes:
+    """
+    Single-sheet workbook with the Social Garden SOW layout, cell for cell the
+    same as a sheet formatted through the Sheets API
+
+    Args:
+        header: CLIENT / SERVICE / DATE header cells (row 3)
+        sections: Dicts with title, row (0-based title row) and either
+            content (text) or table (pricing rows, formulas included) with
+            total_rows, the number of trailing totals rows
+
+    Returns:
+        The .xlsx file contents
+    """
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {"in_memory": True, "strings_to_formulas": False})
+    worksheet = workbook.add_worksheet("SOW")
+
+    brand_format = workbook.add_format({
+        "bold": True, "font_size": 18, "font_color": "white", "bg_color": SG_GREEN,
+        "align": "center", "valign": "vcenter",
+    })
+    title_format = workbook.add_format({
+        "bold": True, "font_size": 14, "font_color": SG_DARK, "bg_color": SG_LIGHT_GRAY,
+    })
+    content_format = workbook.add_format({"text_wrap": True, "valign": "top"})
+    table_header_format = workbook.add_format({"bold": True, "font_color": "white", "bg_color": SG_DARK})
+    currency_format = workbook.add_format({"num_format": CURRENCY_FORMAT})
+    totals_format = workbook.add_format({"bold": True})
+    totals_currency_format = workbook.add_format({"bold": True, "num_format": CURRENCY_FORMAT})
+
+    for col, width in enumerate(BRANDED_COLUMN_WIDTHS):
+        worksheet.set_column_pixels(col, col, width)
+    worksheet.freeze_panes(4, 0)
+
+    # Branding header
+    worksheet.set_row_pixels(0, 50)
+    worksheet.merge_range(0, 0, 0, 5, "SOCIAL GARDEN", brand_format)
+    for col, value in enumerate(header):
+        write_cell(worksheet, 2, col, value)
+
+    for section in sections:
+        row = section["row"]
+        # Blank merge, then a typed write, so text starting with '=' stays text
+        worksheet.merge_range(row, 0, row, 5, "", title_format)
+        worksheet.write_string(row, 0, section["title"], title_format)
+
+        table = section.get("table")
+        if table is None:
+            worksheet.merge_range(row + 1, 0, row + 1, 5, "", content_format)
+            worksheet.write_string(row + 1, 0, section.get("content") or "", content_format)
+            continue
+
+        totals_start = len(table) - section.get("total_rows", 0)
+        for offset, table_row in enumerate(table):
+            for col, value in enumerate(table_row):
+                if offset == 0:
+                    cell_format = table_header_format
+                elif offset >= totals_start:
+                    cell_format = totals_currency_format if col >= 2 else totals_format
+                else:
+                    cell_format = currency_format if col >= 2 else None
+                write_cell(worksheet, row + 1 + offset, col, value, cell_format)
+
+    workbook.close()
+    return output.getvalue()
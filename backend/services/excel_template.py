@@ -0,0 +1,475 @@
+"""
+Excel Template Engine
+Fills the branded Social Garden SOW workbook (frontend/public/templates) for
+/export-excel. The template is scanned once, with read-only iter_rows, into
+an anchor index cached as JSON; requests only load the in-memory template
+bytes and write data at the indexed cells.
+
+scripts/inspect_excel_template.py imports this module directly, with
+services/ on sys.path, so its one sibling import (pricing_engine, itself
+free of package imports) falls back to an absolute import.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.utils import get_column_letter
+
+try:
+    from .pricing_engine import quote_rows
+except ImportError:
+    # Loaded as a top-level module by scripts/
+    from pricing_engine import quote_rows
+
+INDEX_VERSION = 1
+
+TEMPLATE_DEFAULT = Path(__file__).resolve().parents[2] / 'frontend' / 'public' / 'templates' / 'Social_Garden_SOW_Template.xlsx'
+INDEX_DEFAULT = '/tmp/excel_template_index.json'
+
+# Only the top-left of each sheet is searched for table headers
+SCAN_MAX_ROWS = 100
+SCAN_MAX_COLS = 20
+
+# Header layouts recognised as the summary table and a scope pricing table.
+# The first of each is the generic layout, the second the one the branded
+# template actually uses.
+HEADERS_SUMMARY = {"SCOPE", "TOTAL HOURS", "SUBTOTAL (EX. GST)", "GST (10%)", "TOTAL (INC. GST)"}
+HEADERS_SCOPE = {"ROLE", "HOURS", "RATE (AUD)", "TOTAL (AUD)"}
+SUMMARY_LAYOUTS = [
+    HEADERS_SUMMARY,
+    {"PROJECT DATES", "TOTAL HOURS", "AVG. HOURLY RATE", "DISCOUNT", "TOTAL COST"},
+]
+SCOPE_LAYOUTS = [
+    HEADERS_SCOPE,
+    {"ITEMS", "ROLE", "HOURS", "HOURLY RATE", "TOTAL COST +GST"},
+]
+
+# Column role -> header texts that mark it
+SUMMARY_FIELDS = {
+    'scope': {"SCOPE"},
+    'hours': {"TOTAL HOURS"},
+    'rate': {"AVG. HOURLY RATE"},
+    'total': {"TOTAL COST", "SUBTOTAL (EX. GST)"},
+}
+SCOPE_FIELDS = {
+    'items': {"ITEMS"},
+    'role': {"ROLE"},
+    'hours': {"HOURS"},
+    'rate': {"HOURLY RATE", "RATE (AUD)"},
+    'total': {"TOTAL COST +GST", "TOTAL (AUD)"},
+}
+
+# Same-sheet A1 references (not preceded by a sheet name or part of a function name)
+CELL_REFERENCE = re.compile(r"(?<![A-Za-z0-9_!])(\$?[A-Z]{1,3}\$?)(\d+)(?![\d(])")
+DISCOUNT_REFERENCE = re.compile(r"-\s*\((\$?[A-Z]{1,3}\$?\d+)\s*\*")
+
+
+def normalize(v: Any) -> str:
+    return (str(v) if v is not None else "").strip().upper()
+
+
+def find_header_anchor(rows: List[Tuple], expected: set) -> Tuple[int, int]:
+    """
+    Return (row, col) of the header's top-left cell if a row contains most
+    expected headers; rows are iter_rows(values_only=True) tuples, 1-based
+    """
+    for r, row in enumerate(rows, start=1):
+        row_vals = [normalize(v) for v in row]
+        match = sum(1 for h in expected if h in row_vals)
+        if match >= max(3, len(expected) - 1):
+            # first column where an expected header appears
+            for c, v in enumerate(row_vals, start=1):
+                if v in expected:
+                    return r, c
+    return -1, -1
+
+
+def last_data_row(rows: List[Tuple], start_row: int, key_col: int) -> int:
+    """Heuristic: walk down from start_row+1 until a few consecutive empty rows are found."""
+    if start_row < 1:
+        return start_row
+    last, empty_streak = start_row, 0
+    for r in range(start_row + 1, len(rows) + 1):
+        row = rows[r - 1]
+        v = row[key_col - 1] if key_col - 1 < len(row) else None
+        if v is None or str(v).strip() == "":
+            empty_streak += 1
+            if empty_streak >= 5:
+                break
+        else:
+            empty_streak = 0
+            last = r
+    return last
+
+
+def _cell(rows: List[Tuple], r: int, c: int) -> Any:
+    if r < 1 or r > len(rows) or c - 1 >= len(rows[r - 1]):
+        return None
+    return rows[r - 1][c - 1]
+
+
+def _field_columns(header: Tuple, fields: Dict[str, set]) -> Dict[str, int]:
+    columns = {}
+    for c, v in enumerate(header, start=1):
+        for field, names in fields.items():
+            if normalize(v) in names and field not in columns:
+                columns[field] = c
+    return columns
+
+
+def _detect_table(rows: List[Tuple], layouts: List[set], fields: Dict[str, set]) -> Optional[Dict[str, Any]]:
+    """Header, data rows and TOTAL row of the first matching layout"""
+    for layout in layouts:
+        header_row, header_col = find_header_anchor(rows, layout)
+        if header_row == -1:
+            continue
+        total_row = None
+        for r in range(header_row + 1, len(rows) + 1):
+            if any(normalize(v) == "TOTAL" for v in rows[r - 1][:2]):
+                total_row = r
+                break
+        if total_row is None:
+            total_row = last_data_row(rows, header_row, header_col) + 1
+        return {
+            'header_row': header_row,
+            'header_col': header_col,
+            'first_data_row': header_row + 1,
+            'total_row': total_row,
+            'columns': _field_columns(rows[header_row - 1], fields),
+        }
+    return None
+
+
+def _scope_extras(rows: List[Tuple], table: Dict[str, Any]) -> Dict[str, Any]:
+    """Title, price overview and notes cells laid out below a scope table"""
+    extras: Dict[str, Any] = {}
+    if table['header_row'] > 1:
+        extras['title_cell'] = f"A{table['header_row'] - 1}"
+
+    for r in range(table['total_row'] + 1, len(rows) + 1):
+        for c, v in enumerate(rows[r - 1], start=1):
+            text = normalize(v)
+            if 'overview_row' not in extras and text == "TOTAL COST":
+                # Overview values sit on the next row; its total cost formula
+                # subtracts (discount cell * subtotal)
+                extras['overview_row'] = r + 1
+                formula = _cell(rows, r + 1, c)
+                match = DISCOUNT_REFERENCE.search(formula) if isinstance(formula, str) else None
+                if match:
+                    extras['discount_cell'] = match.group(1).replace('$', '')
+            if c == 1 and 'notes_cell' not in extras and ("ASSUMPTION" in text or "CONDITION" in text):
+                extras['notes_cell'] = f"A{r}"
+    return extras
+
+
+def _summary_extras(rows: List[Tuple], table: Dict[str, Any]) -> Dict[str, Any]:
+    """Title and overview cells above the summary table"""
+    extras: Dict[str, Any] = {}
+    for r in range(1, table['header_row']):
+        text = normalize(_cell(rows, r, 1))
+        if not text:
+            continue
+        if text.startswith("OVERVIEW"):
+            extras.setdefault('overview_cell', f"A{r}")
+        else:
+            extras.setdefault('title_cell', f"A{r}")
+    return extras
+
+
+def _defined_names(wb) -> Dict[str, List[str]]:
+    """Workbook defined names -> 'Sheet!A1' destinations (openpyxl 3.0 and 3.1)"""
+    names = wb.defined_names
+    items = names.items() if hasattr(names, 'items') else [(dn.name, dn) for dn in names.definedName]
+    result = {}
+    for name, dn in items:
+        try:
+            result[name] = [f"{title}!{coord}" for title, coord in dn.destinations]
+        except Exception:
+            result[name] = [dn.attr_text]
+    return result
+
+
+def scan_template(path: Path) -> Dict[str, Any]:
+    """
+    Build the anchor index of a template: one read-only pass per sheet
+    over the top-left SCAN_MAX_ROWS x SCAN_MAX_COLS cells
+    """
+    content = Path(path).read_bytes()
+    wb = load_workbook(io.BytesIO(content), read_only=True)
+    try:
+        index: Dict[str, Any] = {
+            'version': INDEX_VERSION,
+            'template_path': str(path),
+            'template_sha256': hashlib.sha256(content).hexdigest(),
+            'sheets': wb.sheetnames,
+            'defined_names': _defined_names(wb),
+            'summary': None,
+            'scopes': [],
+        }
+        for ws in wb.worksheets:
+            rows = list(ws.iter_rows(min_row=1, max_row=SCAN_MAX_ROWS, max_col=SCAN_MAX_COLS, values_only=True))
+            table = _detect_table(rows, SCOPE_LAYOUTS, SCOPE_FIELDS)
+            if table:
+                index['scopes'].append({'sheet': ws.title, **table, **_scope_extras(rows, table)})
+                continue
+            table = _detect_table(rows, SUMMARY_LAYOUTS, SUMMARY_FIELDS)
+            if table and index['summary'] is None:
+                index['summary'] = {'sheet': ws.title, **table, **_summary_extras(rows, table)}
+        return index
+    finally:
+        wb.close()
+
+
+def load_or_build_index(template_path: Path, index_path: Path) -> Dict[str, Any]:
+    """Cached index when it matches the template's hash, otherwise rescan and rewrite it"""
+    digest = hashlib.sha256(Path(template_path).read_bytes()).hexdigest()
+    try:
+        index = json.loads(Path(index_path).read_text())
+        if index.get('version') == INDEX_VERSION and index.get('template_sha256') == digest:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    index = scan_template(template_path)
+    try:
+        Path(index_path).write_text(json.dumps(index, indent=2, ensure_ascii=False))
+    except OSError as e:
+        print(f"WARNING: Could not cache Excel template index at {index_path}: {str(e)}")
+    return index
+
+
+def shift_formula_rows(formula: str, from_row: int, delta: int, to_row: Optional[int] = None) -> str:
+    """Move same-sheet row references in from_row..to_row (default: all below) down by delta"""
+    def shift(match):
+        column, row = match.group(1), int(match.group(2))
+        moves = row >= from_row and (to_row is None or row <= to_row)
+        return f"{column}{row + delta if moves else row}"
+
+    # Quoted sheet names and string literals are left untouched
+    parts = re.split(r"('(?:[^']|'')*'|\"[^\"]*\")", formula)
+    return ''.join(part if i % 2 else CELL_REFERENCE.sub(shift, part) for i, part in enumerate(parts))
+
+
+def set_text(cell, value: Any):
+    """Caller text as a string cell: openpyxl takes any str starting with '=' as a formula"""
+    cell.value = value
+    if isinstance(value, str):
+        cell.data_type = 's'
+
+
+class ExcelTemplate:
+    """Template bytes plus anchor index, ready to fill per request"""
+
+    def __init__(self, template_path: Path, index: Dict[str, Any]):
+        self.template_path = template_path
+        self.index = index
+        self.content = Path(template_path).read_bytes()
+        if not index['scopes']:
+            raise ValueError(f"No scope pricing table found in Excel template {template_path}")
+
+    def fill(self, sow_data: Dict[str, Any], output: IO[bytes]):
+        """
+        Write one SOW into a copy of the template
+
+        Args:
+            sow_data: /export-excel sowData (title, client, pricingRows,
+                discount, deliverables, assumptions)
+            output: File object the .xlsx is saved to
+        """
+        wb = load_workbook(io.BytesIO(self.content))
+        scope = dict(self.index['scopes'][0])
+        ws = wb[scope['sheet']]
+
+        # The template ships worked examples after the blank scope sheet
+        for example in self.index['scopes'][1:]:
+            if example['sheet'] in wb.sheetnames:
+                del wb[example['sheet']]
+
+        title = sow_data.get('title') or sow_data.get('client') or ''
+        if scope.get('title_cell'):
+            set_text(ws[scope['title_cell']], title)
+
+        pricing_rows = [row for row in sow_data.get('pricingRows', []) if isinstance(row, dict)]
+        scope = self._fit_rows(ws, scope, len(pricing_rows))
+        self._write_pricing(ws, scope, pricing_rows, sow_data)
+
+        if self.index.get('summary'):
+            self._write_summary(wb[self.index['summary']['sheet']], self.index['summary'], scope, sow_data)
+
+        wb.save(output)
+
+    def _fit_rows(self, ws, scope: Dict[str, Any], row_count: int) -> Dict[str, Any]:
+        """Insert rows above TOTAL when the pricing table outgrows the template"""
+        first, total_row = scope['first_data_row'], scope['total_row']
+        extra = row_count - (total_row - first)
+        if extra <= 0:
+            return scope
+
+        ws.insert_rows(total_row, extra)
+
+        # openpyxl moves cells but not merges or formula references
+        for merged in list(ws.merged_cells.ranges):
+            if merged.min_row >= total_row:
+                merged.shift(row_shift=extra)
+            elif merged.min_row >= first and merged.max_row >= total_row - 1:
+                ref = f"{get_column_letter(merged.min_col)}{merged.min_row}:{get_column_letter(merged.max_col)}{merged.max_row + extra}"
+                ws.unmerge_cells(str(merged))
+                ws.merge_cells(ref)
+        for row in ws.iter_rows(min_row=total_row + extra):
+            for cell in row:
+                if isinstance(cell.value, str) and cell.value.startswith('='):
+                    cell.value = shift_formula_rows(cell.value, total_row, extra)
+        # TOTAL row ranges ending on the last data row now end on the new one
+        for cell in ws[total_row + extra]:
+            if isinstance(cell.value, str) and cell.value.startswith('='):
+                cell.value = shift_formula_rows(cell.value, total_row - 1, extra, to_row=total_row - 1)
+
+        scope = dict(scope, total_row=total_row + extra)
+        for key in ('overview_row',):
+            if key in scope:
+                scope[key] += extra
+        for key in ('discount_cell', 'notes_cell'):
+            if key in scope:
+                scope[key] = shift_formula_rows(scope[key], total_row, extra)
+        return scope
+
+    @staticmethod
+    def _write_pricing(ws, scope: Dict[str, Any], pricing_rows: List[Dict[str, Any]], sow_data: Dict[str, Any]):
+        columns = scope['columns']
+        first, total_row = scope['first_data_row'], scope['total_row']
+        hours_col, rate_col, total_col = columns.get('hours'), columns.get('rate'), columns.get('total')
+
+        for r in range(first, total_row):
+            item = pricing_rows[r - first] if r - first < len(pricing_rows) else None
+            hours = float(item.get('hours', 0)) if item else None
+            rate = float(item.get('rate', 0)) if item else None
+            values = {
+                'role': item.get('role', 'N/A') if item else None,
+                'hours': hours,
+                'rate': rate,
+                'total': None,
+            }
+            if item:
+                # Live formula unless the caller sent an adjusted total
+                if 'total' in item or not (hours_col and rate_col):
+                    values['total'] = float(item.get('total', hours * rate))
+                else:
+                    values['total'] = f"={get_column_letter(hours_col)}{r}*{get_column_letter(rate_col)}{r}"
+            for field, value in values.items():
+                if field in columns:
+                    # Assigned directly: ws.cell(value=None) would leave example data
+                    cell = ws.cell(row=r, column=columns[field])
+                    if field == 'role':
+                        set_text(cell, value)
+                    else:
+                        cell.value = value
+
+        # Totals always cover exactly the data rows
+        for field, col in ((f, columns.get(f)) for f in ('hours', 'total')):
+            if col:
+                letter = get_column_letter(col)
+                ws.cell(row=total_row, column=col, value=f"=SUM({letter}{first}:{letter}{total_row - 1})")
+
+        # The template's deliverables and assumptions are examples: replaced,
+        # or cleared when the SOW has none
+        deliverables = sow_data.get('deliverables') or []
+        if 'items' in columns:
+            lines = deliverables if isinstance(deliverables, list) else [deliverables]
+            ws.cell(row=first, column=columns['items']).value = (
+                "\n".join(f"+ {line}" for line in lines) if deliverables else None
+            )
+
+        assumptions = sow_data.get('assumptions') or []
+        if scope.get('notes_cell'):
+            lines = assumptions if isinstance(assumptions, list) else [assumptions]
+            ws[scope['notes_cell']] = (
+                "Deliverable Assumptions:\n" + "\n".join(f"- {line}" for line in lines) if assumptions else None
+            )
+
+        discount = sow_data.get('discount') or {}
+        if scope.get('discount_cell') and discount:
+            # The template's formula takes a fraction of the subtotal; the
+            # pricing engine validates and caps it like every other export
+            pricing = quote_rows(pricing_rows, discount=discount)
+            if pricing['discount'] > 0:
+                ws[scope['discount_cell']] = (
+                    float(pricing['discount_percent']) / 100 if discount.get('type') == 'percentage'
+                    else float(pricing['discount'] / pricing['subtotal'])
+                )
+
+    @staticmethod
+    def _write_summary(ws, summary: Dict[str, Any], scope: Dict[str, Any], sow_data: Dict[str, Any]):
+        columns = summary['columns']
+        first, total_row = summary['first_data_row'], summary['total_row']
+        sheet_ref = "'" + scope['sheet'].replace("'", "''") + "'"
+
+        client, title = sow_data.get('client') or '', sow_data.get('title') or ''
+        if summary.get('title_cell'):
+            set_text(ws[summary['title_cell']], client or title)
+
+        # The template's overview is an example with [CLIENT]-style placeholders
+        if summary.get('overview_cell'):
+            subject = " for ".join(part for part in (title, client) if part)
+            set_text(ws[summary['overview_cell']], f"Overview:\nThis scope of work details {subject}." if subject else None)
+
+        # One row for the single scope; example rows, project dates included,
+        # are cleared, as are text placeholders on the TOTAL row
+        for r in range(first, total_row):
+            for col in range(1, ws.max_column + 1):
+                ws.cell(row=r, column=col).value = None
+        for cell in ws[total_row][1:]:
+            if isinstance(cell.value, str) and not cell.value.startswith('='):
+                cell.value = None
+
+        hours_col = scope['columns'].get('hours')
+        cost_col = scope['columns'].get('total')
+        title_cell = scope.get('title_cell')
+        scope_cell = ws.cell(row=first, column=columns.get('scope', 1))
+        if title_cell:
+            scope_cell.value = f"={sheet_ref}!{title_cell}"
+        else:
+            set_text(scope_cell, sow_data.get('title', ''))
+        if 'hours' in columns and hours_col:
+            ws.cell(row=first, column=columns['hours'], value=f"={sheet_ref}!{get_column_letter(hours_col)}{scope['total_row']}")
+        if 'total' in columns and cost_col:
+            # Discounted overview total when the template has one
+            cost_ref = f"{get_column_letter(cost_col)}{scope.get('overview_row', scope['total_row'])}"
+            ws.cell(row=first, column=columns['total'], value=f"={sheet_ref}!{cost_ref}")
+        if 'rate' in columns and 'hours' in columns and 'total' in columns:
+            hours_ref = f"{get_column_letter(columns['hours'])}{first}"
+            total_ref = f"{get_column_letter(columns['total'])}{first}"
+            ws.cell(row=first, column=columns['rate'], value=f"=IFERROR({total_ref}/{hours_ref},0)")
+
+
+_excel_template: Optional[ExcelTemplate] = None
+_excel_template_loaded = False
+_excel_template_lock = threading.Lock()
+
+
+def get_excel_template() -> Optional[ExcelTemplate]:
+    """
+    Process-wide template, indexed on first use (call at startup to keep it
+    off the request path); None when no template is available
+    """
+    global _excel_template, _excel_template_loaded
+    with _excel_template_lock:
+        if not _excel_template_loaded:
+            _excel_template_loaded = True
+            template_path = Path(os.getenv('EXCEL_TEMPLATE_PATH', str(TEMPLATE_DEFAULT)))
+            index_path = Path(os.getenv('EXCEL_TEMPLATE_INDEX_PATH', INDEX_DEFAULT))
+            if not template_path.exists():
+                print(f"WARNING: Excel template not found at {template_path}, using plain workbook export")
+            else:
+                try:
+                    _excel_template = ExcelTemplate(template_path, load_or_build_index(template_path, index_path))
+                    print(f"DEBUG: Excel template indexed: {template_path}")
+                except Exception as e:
+                    print(f"WARNING: Could not index Excel template {template_path}: {str(e)}")
+        return _excel_template
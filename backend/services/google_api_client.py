@@ -0,0 +1,341 @@
+"""
+Google API Client Helpers
+Service construction, endpoint overrides, pooled keep-alive HTTP transports,
+and quota-aware rate limiting and retry shared by every Google API call
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+import urllib.parse
+import weakref
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import google_auth_httplib2
+import httplib2
+import requests
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Google quotas are per minute: Sheets defaults to 300 req/min per project
+# and 60 req/min per user per project
+DEFAULT_PROJECT_QUOTA_PER_MINUTE = 300
+DEFAULT_USER_QUOTA_PER_MINUTE = 60
+# Per-user buckets kept, least recently used dropped first: users are token
+# fingerprints for raw OAuth tokens, which rotate hourly
+MAX_USER_BUCKETS = 1024
+
+# Production endpoints, swapped for GOOGLE_API_BASE_URL (e.g. the local fake
+# in benchmarks/fake_google_api.py) when it is set
+GOOGLE_TOKEN_URL = 'https://oauth2.googleapis.com/token'
+GOOGLE_USERINFO_URL = 'https://www.googleapis.com/oauth2/v2/userinfo'
+
+# Path each API lives under, relative to the base URL
+SERVICE_PATHS = {
+    'sheets': '',
+    'drive': 'drive/v3/',
+}
+
+# Responses worth retrying: quota exhaustion for any request; transient
+# server errors only for requests that are safe to replay, since a create,
+# copy or upload can fail after Google has made the file
+SERVER_ERROR_STATUS_CODES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'PUT', 'DELETE'}
+
+# HTTP transport defaults: (connect, read) timeouts and keep-alive pool size
+DEFAULT_HTTP_CONNECT_TIMEOUT_SECONDS = 5.0
+DEFAULT_HTTP_READ_TIMEOUT_SECONDS = 30.0
+DEFAULT_HTTP_POOL_SIZE = 20
+
+
+def api_base_url() -> Optional[str]:
+    """Base URL override for all Google endpoints, or None for production"""
+    base_url = os.getenv('GOOGLE_API_BASE_URL')
+    return base_url.rstrip('/') + '/' if base_url else None
+
+
+def http_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout in seconds for every Google HTTP call"""
+    return (
+        float(os.getenv('GOOGLE_HTTP_CONNECT_TIMEOUT_SECONDS', DEFAULT_HTTP_CONNECT_TIMEOUT_SECONDS)),
+        float(os.getenv('GOOGLE_HTTP_READ_TIMEOUT_SECONDS', DEFAULT_HTTP_READ_TIMEOUT_SECONDS)),
+    )
+
+
+def is_idempotent(request) -> bool:
+    """
+    Whether a googleapiclient request can be replayed without side effects:
+    GET/PUT/DELETE, and values writes (values:batchUpdate, batchClear), which
+    set cells to the given values; values:append adds rows and is not
+    """
+    method = str(getattr(request, 'method', '') or '').upper()
+    if method in IDEMPOTENT_METHODS:
+        return True
+    path = urllib.parse.urlsplit(str(getattr(request, 'uri', '') or '')).path
+    return '/values' in path and not path.endswith(':append')
+
+
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Process-wide keep-alive session for OAuth token and userinfo calls
+    Connection errors are retried for any method, 5xx only for GETs: an
+    authorization code must not be replayed after the server has seen it
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            pool_size = int(os.getenv('GOOGLE_HTTP_POOL_SIZE', DEFAULT_HTTP_POOL_SIZE))
+            retry = Retry(
+                total=3,
+                connect=3,
+                read=1,
+                status=3,
+                backoff_factor=0.3,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=frozenset({'GET'}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_session = session
+        return _http_session
+
+
+# httplib2 connections are not thread-safe, so each thread keeps its own
+# keep-alive Http and one authorized wrapper per credentials object on it
+_thread_transports = threading.local()
+
+
+def authorized_http(credentials) -> google_auth_httplib2.AuthorizedHttp:
+    """This thread's keep-alive transport for a set of credentials"""
+    wrappers = getattr(_thread_transports, 'wrappers', None)
+    if wrappers is None:
+        wrappers = _thread_transports.wrappers = weakref.WeakKeyDictionary()
+        _thread_transports.http = httplib2.Http(timeout=http_timeout()[1])
+    wrapper = wrappers.get(credentials)
+    if wrapper is None:
+        wrapper = wrappers[credentials] = google_auth_httplib2.AuthorizedHttp(
+            credentials, http=_thread_transports.http
+        )
+    return wrapper
+
+
+def build_service(name: str, version: str, credentials):
+    """
+    Build a Google API client, pointed at GOOGLE_API_BASE_URL when set
+    Requests run on the calling thread's pooled transport, so one service
+    object can be shared by concurrent exports
+    """
+    base_url = api_base_url()
+
+    def request_builder(http, postproc, uri, *args, **kwargs):
+        if base_url:
+            # Media uploads get only the override's host swapped in, keeping
+            # https; use the override's scheme too (e.g. the plain-http fake)
+            uri = urllib.parse.urlparse(uri)._replace(scheme=urllib.parse.urlparse(base_url).scheme).geturl()
+        return HttpRequest(authorized_http(credentials), postproc, uri, *args, **kwargs)
+
+    if base_url:
+        return build(
+            name,
+            version,
+            credentials=credentials,
+            client_options={'api_endpoint': base_url + SERVICE_PATHS.get(name, '')},
+            cache_discovery=False,
+            requestBuilder=request_builder,
+        )
+    return build(name, version, credentials=credentials, requestBuilder=request_builder)
+
+
+def token_url() -> str:
+    """OAuth token endpoint"""
+    base_url = api_base_url()
+    return base_url + 'token' if base_url else GOOGLE_TOKEN_URL
+
+
+def userinfo_url() -> str:
+    """OAuth userinfo endpoint"""
+    base_url = api_base_url()
+    return base_url + 'oauth2/v2/userinfo' if base_url else GOOGLE_USERINFO_URL
+
+
+class TokenBucket:
+    """Thread-safe token bucket that lets callers reserve tokens ahead of time"""
+
+    def __init__(self, rate_per_minute: float, capacity: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket, going into debt if needed
+        Returns: seconds the caller must wait before using them
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def drain(self, seconds: float):
+        """Push the bucket into debt so nobody calls again for `seconds`"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class GoogleApiRateLimiter:
+    """Per-project and per-user token buckets plus retry with jittered backoff"""
+
+    def __init__(self):
+        self.headroom = float(os.getenv('GOOGLE_API_QUOTA_HEADROOM', '0.9'))
+        self.project_quota = float(os.getenv('GOOGLE_API_PROJECT_QUOTA_PER_MINUTE', DEFAULT_PROJECT_QUOTA_PER_MINUTE))
+        self.user_quota = float(os.getenv('GOOGLE_API_USER_QUOTA_PER_MINUTE', DEFAULT_USER_QUOTA_PER_MINUTE))
+        self.max_retries = int(os.getenv('GOOGLE_API_MAX_RETRIES', '5'))
+        self.backoff_base = float(os.getenv('GOOGLE_API_BACKOFF_BASE_SECONDS', '1.0'))
+        self.backoff_cap = float(os.getenv('GOOGLE_API_BACKOFF_MAX_SECONDS', '32.0'))
+
+        self._project_buckets: Dict[str, TokenBucket] = {}
+        self._user_buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {
+            'calls': 0,
+            'retries': 0,
+            'throttled_responses': 0,
+            'server_errors': 0,
+            'failures': 0,
+            'limiter_waits': 0,
+            'limiter_wait_seconds': 0.0,
+            'backoff_seconds': 0.0,
+        }
+
+    def _bucket(self, buckets: Dict[str, TokenBucket], key: str, quota: float,
+                max_entries: Optional[int] = None) -> TokenBucket:
+        with self._lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                # Sustained rate just under quota, with a burst of ~5 seconds worth
+                rate = quota * self.headroom
+                bucket = TokenBucket(rate, capacity=max(1.0, rate / 12.0))
+                buckets[key] = bucket
+            if max_entries is not None:
+                buckets.move_to_end(key)
+                while len(buckets) > max_entries:
+                    buckets.popitem(last=False)
+            return bucket
+
+    def _record(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._metrics[name] += value
+
+    def _retry_delay(self, error: HttpError, attempt: int) -> float:
+        """Honor Retry-After when Google sends it, otherwise full-jitter backoff"""
+        retry_after = error.resp.get('retry-after') if error.resp is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def execute(self, request, project: str = 'default', user: Optional[str] = None) -> Any:
+        """Execute a googleapiclient request inside the project/user quota"""
+        buckets = [self._bucket(self._project_buckets, project, self.project_quota)]
+        if user:
+            buckets.append(self._bucket(self._user_buckets, user, self.user_quota, MAX_USER_BUCKETS))
+
+        retry_server_errors = is_idempotent(request)
+        attempt = 0
+        while True:
+            wait = max(bucket.reserve() for bucket in buckets)
+            if wait > 0:
+                self._record(limiter_waits=1, limiter_wait_seconds=wait)
+                time.sleep(wait)
+
+            self._record(calls=1)
+            try:
+                return request.execute()
+            except HttpError as e:
+                status = e.resp.status if e.resp is not None else None
+                if status == 429:
+                    self._record(throttled_responses=1)
+                elif status in SERVER_ERROR_STATUS_CODES:
+                    self._record(server_errors=1)
+
+                retryable = status == 429 or (status in SERVER_ERROR_STATUS_CODES and retry_server_errors)
+                if not retryable or attempt >= self.max_retries:
+                    self._record(failures=1)
+                    raise
+
+                delay = self._retry_delay(e, attempt)
+                if status == 429:
+                    # Everyone sharing the quota backs off, not just this caller
+                    for bucket in buckets:
+                        bucket.drain(delay)
+                print(f"WARNING: Google API returned {status}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                self._record(retries=1, backoff_seconds=delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Snapshot of throttling counters and current bucket levels"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            project_buckets = dict(self._project_buckets)
+            user_buckets = dict(self._user_buckets)
+        metrics['project_buckets'] = {key: round(b.tokens, 2) for key, b in project_buckets.items()}
+        metrics['user_buckets'] = len(user_buckets)
+        return metrics
+
+
+_rate_limiter: Optional[GoogleApiRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> GoogleApiRateLimiter:
+    """Process-wide limiter so every generator shares the same quota buckets"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = GoogleApiRateLimiter()
+        return _rate_limiter
+
+
+def execute_request(request, project: str = 'default', user: Optional[str] = None) -> Any:
+    """Rate-limited, retrying replacement for request.execute()"""
+    return get_rate_limiter().execute(request, project=project, user=user)
+
+
+def token_fingerprint(access_token: str) -> str:
+    """Stable, non-reversible key for an access token"""
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
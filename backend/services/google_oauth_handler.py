@@ -6,11 +6,18 @@ Handles OAuth authentication flow for Google Sheets access
 import os
 import json
 import base64
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, Tuple
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-import requests
+
+from .google_api_client import (
+    build_service, get_http_session, http_timeout, token_fingerprint, token_url, userinfo_url
+)
+
+DEFAULT_USERINFO_CACHE_TTL_SECONDS = 300
+MAX_USERINFO_CACHE_ENTRIES = 1024
 
 class GoogleOAuthHandler:
     """Handle OAuth flow and token management"""
@@ -27,27 +34,35 @@ class GoogleOAuthHandler:
         
         if not all([self.client_id, self.client_secret, self.redirect_uri]):
             raise ValueError("Google OAuth credentials not configured in environment")
-    
-    def get_authorization_url(self, state: str = None) -> tuple:
-        """
-        Generate Google OAuth authorization URL
-        Returns: (auth_url, state)
-        """
-        flow = Flow.from_client_config(
+        
+        # Flow is built once; authorization_url mutates its session state
+        self.flow = Flow.from_client_config(
             {
                 "installed": {
                     "client_id": self.client_id,
                     "client_secret": self.client_secret,
                     "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
+                    "token_uri": token_url(),
                     "redirect_uris": [self.redirect_uri]
                 }
             },
             scopes=self.scopes,
             redirect_uri=self.redirect_uri
         )
+        self._flow_lock = threading.Lock()
         
-        auth_url, state = flow.authorization_url(access_type='offline', prompt='consent')
+        # Access token fingerprint -> (email, expires at)
+        self.userinfo_ttl = float(os.getenv('OAUTH_USERINFO_CACHE_TTL_SECONDS', DEFAULT_USERINFO_CACHE_TTL_SECONDS))
+        self._userinfo_cache: Dict[str, Tuple[str, float]] = {}
+        self._userinfo_lock = threading.Lock()
+    
+    def get_authorization_url(self, state: str = None) -> tuple:
+        """
+        Generate Google OAuth authorization URL
+        Returns: (auth_url, state)
+        """
+        with self._flow_lock:
+            auth_url, state = self.flow.authorization_url(access_type='offline', prompt='consent', state=state)
         return auth_url, state
     
     def exchange_code_for_token(self, code: str) -> Dict[str, Any]:
@@ -57,15 +72,16 @@ class GoogleOAuthHandler:
         """
         try:
             # Use requests directly to avoid scope validation issues
-            token_response = requests.post(
-                "https://oauth2.googleapis.com/token",
+            token_response = get_http_session().post(
+                token_url(),
                 data={
                     "code": code,
                     "client_id": self.client_id,
                     "client_secret": self.client_secret,
                     "redirect_uri": self.redirect_uri,
                     "grant_type": "authorization_code"
-                }
+                },
+                timeout=http_timeout()
             )
             
             if not token_response.ok:
@@ -77,7 +93,7 @@ class GoogleOAuthHandler:
             credentials = Credentials(
                 token=token_data.get('access_token'),
                 refresh_token=token_data.get('refresh_token'),
-                token_uri="https://oauth2.googleapis.com/token",
+                token_uri=token_url(),
                 client_id=self.client_id,
                 client_secret=self.client_secret,
                 scopes=self.scopes
@@ -88,33 +104,82 @@ class GoogleOAuthHandler:
                 'access_token': credentials.token,
                 'refresh_token': credentials.refresh_token,
                 'token_type': 'Bearer',
-                'expires_in': credentials.expiry,
+                'expires_in': token_data.get('expires_in'),
                 'scope': ' '.join(self.scopes)
             }
         except Exception as e:
             raise Exception(f"Failed to exchange code for token: {str(e)}")
     
+    def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
+        """
+        Get a new access token without user interaction
+        Returns: token dictionary with access_token, expires_in and, if
+        Google rotated it, a new refresh_token
+        """
+        try:
+            token_response = get_http_session().post(
+                token_url(),
+                data={
+                    "refresh_token": refresh_token,
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "grant_type": "refresh_token"
+                },
+                timeout=http_timeout()
+            )
+            
+            if not token_response.ok:
+                raise Exception(f"Token refresh failed: {token_response.text}")
+            
+            token_data = token_response.json()
+            return {
+                'access_token': token_data.get('access_token'),
+                'refresh_token': token_data.get('refresh_token'),
+                'token_type': 'Bearer',
+                'expires_in': token_data.get('expires_in'),
+            }
+        except Exception as e:
+            raise Exception(f"Failed to refresh access token: {str(e)}")
+    
     def get_sheets_service(self, access_token: str):
         """Get Google Sheets service with access token"""
         credentials = Credentials(token=access_token)
-        return build('sheets', 'v4', credentials=credentials)
+        return build_service('sheets', 'v4', credentials)
     
     def get_drive_service(self, access_token: str):
         """Get Google Drive service with access token"""
         credentials = Credentials(token=access_token)
-        return build('drive', 'v3', credentials=credentials)
+        return build_service('drive', 'v3', credentials)
     
     def get_user_email(self, access_token: str) -> str:
-        """Get authenticated user's email address"""
+        """Get authenticated user's email address, cached per token for a few minutes"""
+        fingerprint = token_fingerprint(access_token)
+        now = time.time()
+        with self._userinfo_lock:
+            cached = self._userinfo_cache.get(fingerprint)
+            if cached and cached[1] > now:
+                return cached[0]
+        
         try:
-            response = requests.get(
-                'https://www.googleapis.com/oauth2/v2/userinfo',
-                headers={'Authorization': f'Bearer {access_token}'}
+            response = get_http_session().get(
+                userinfo_url(),
+                headers={'Authorization': f'Bearer {access_token}'},
+                timeout=http_timeout()
             )
             response.raise_for_status()
-            return response.json().get('email')
+            email = response.json().get('email')
         except Exception as e:
             raise Exception(f"Failed to get user email: {str(e)}")
+        
+        if self.userinfo_ttl > 0:
+            with self._userinfo_lock:
+                if len(self._userinfo_cache) >= MAX_USERINFO_CACHE_ENTRIES:
+                    # Expired entries first; if none, drop the oldest insert
+                    expired = [key for key, (_, expires_at) in self._userinfo_cache.items() if expires_at <= now]
+                    for key in expired or [next(iter(self._userinfo_cache))]:
+                        del self._userinfo_cache[key]
+                self._userinfo_cache[fingerprint] = (email, now + self.userinfo_ttl)
+        return email
     
     @staticmethod
     def encode_token(token_dict: Dict[str, Any]) -> str:
@@ -129,6 +194,14 @@ class GoogleOAuthHandler:
         return json.loads(json_str)
 
 
-def get_oauth_handler():
-    """Factory function to get OAuth handler"""
-    return GoogleOAuthHandler()
+_oauth_handler: Optional[GoogleOAuthHandler] = None
+_oauth_handler_lock = threading.Lock()
+
+
+def get_oauth_handler() -> GoogleOAuthHandler:
+    """Process-wide OAuth handler; env and Flow config are read once"""
+    global _oauth_handler
+    with _oauth_handler_lock:
+        if _oauth_handler is None:
+            _oauth_handler = GoogleOAuthHandler()
+        return _oauth_handler
@@ -3,32 +3,89 @@ Google Sheets Generator Service
 Handles creating formatted Google Sheets from SOW data
 """
 
+import io
 import json
 import os
-from typing import Optional, Dict, Any
+import re
+from typing import Optional, Dict, Any, List
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload
 from datetime import datetime
 
+from .excel_export import XLSX_MIME_TYPE, Formula, build_branded_workbook
+from .google_api_client import build_service, execute_request, token_fingerprint
+from .pricing_engine import quote_rows
+from .sheet_export_store import get_export_cache, get_snapshot_store, sow_content_hash
+
 # Social Garden branding colors
 SG_GREEN = "#1CBF79"
 SG_DARK = "#0e2e33"
 SG_LIGHT_GRAY = "#f5f5f5"
 
+# Row layout of a SOW tab: (sow_data key, section title, earliest start row).
+# Sections move further down when a long pricing table would overlap them.
+SOW_SECTIONS = [
+    ('overview', "Overview", 8),
+    ('deliverables', "What's Included", 15),
+    ('outcomes', "Project Outcomes", 22),
+    ('phases', "Project Phases", 29),
+    ('pricing', "Pricing Summary", 36),
+    ('assumptions', "Assumptions", 50),
+    ('timeline', "Timeline", 56),
+]
+
+# Keep each batchUpdate body under Google's recommended 2 MB payload
+MAX_BATCH_PAYLOAD_BYTES = int(os.getenv('GOOGLE_SHEETS_MAX_BATCH_BYTES', 2 * 1024 * 1024))
+MAX_BULK_TABS = 200
+
+# Drive converts uploads to this type into a native Google Sheet
+GOOGLE_SHEETS_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+
+# Pricing is written as a real table: header, one row per item, then totals
+PRICING_TABLE_HEADER = ['Role', 'Hours', 'Rate (AUD)', 'Total (AUD)']
+PRICING_TOTAL_ROWS = 3
+# A1 ranges covering a pricing table (role text plus Formula cells)
+PRICING_TABLE_RANGE = re.compile(r"^(?:'(?:[^']|'')*'!)?A\d+:D\d+$")
+
+# Named ranges expected in the pre-branded master spreadsheet (template mode).
+# The master carries all merges, colours, column widths and frozen rows, so an
+# export only has to copy it and write values into these ranges.
+TEMPLATE_NAMED_RANGES = {
+    'client': 'SOW_CLIENT',
+    'service': 'SOW_SERVICE',
+    'date': 'SOW_DATE',
+    'overview': 'SOW_OVERVIEW',
+    'deliverables': 'SOW_DELIVERABLES',
+    'outcomes': 'SOW_OUTCOMES',
+    'phases': 'SOW_PHASES',
+    'pricing': 'SOW_PRICING',
+    'assumptions': 'SOW_ASSUMPTIONS',
+    'timeline': 'SOW_TIMELINE',
+}
+
 class GoogleSheetsGenerator:
     """Generate formatted Google Sheets from SOW data"""
     
-    def __init__(self, access_token: str = None):
-        """Initialize Google Sheets client with OAuth access token or service account"""
+    def __init__(self, access_token: str = None, template_id: str = None, quota_user: str = None):
+        """
+        Initialize Google Sheets client with OAuth access token or service account
+
+        quota_user keys the per-user quota bucket; it defaults to a fingerprint
+        of the access token, which changes whenever the token is refreshed
+        """
         if access_token:
             # Use OAuth token
             print(f"DEBUG: Using OAuth token for authentication")
             self.credentials = Credentials(token=access_token)
-            self.sheets_service = build('sheets', 'v4', credentials=self.credentials)
-            self.drive_service = build('drive', 'v3', credentials=self.credentials)
+            self.sheets_service = build_service('sheets', 'v4', self.credentials)
+            self.drive_service = build_service('drive', 'v3', self.credentials)
+            
+            # Quota buckets: OAuth client project, one bucket per user
+            self.quota_project = os.getenv('GOOGLE_OAUTH_CLIENT_ID', 'default')
+            self.quota_user = quota_user or token_fingerprint(access_token)
             print("DEBUG: OAuth credentials initialized")
         else:
             # Fallback to service account (original code)
@@ -53,8 +110,12 @@ class GoogleSheetsGenerator:
                 print("DEBUG: Credentials created successfully")
                 
                 # Build service clients
-                self.sheets_service = build('sheets', 'v4', credentials=self.credentials)
-                self.drive_service = build('drive', 'v3', credentials=self.credentials)
+                self.sheets_service = build_service('sheets', 'v4', self.credentials)
+                self.drive_service = build_service('drive', 'v3', self.credentials)
+                
+                # Quota buckets: service account project and identity
+                self.quota_project = service_account_info.get('project_id') or 'default'
+                self.quota_user = service_account_info.get('client_email')
                 print("DEBUG: Service clients built successfully")
             except json.JSONDecodeError as e:
                 raise ValueError(f"Failed to parse service account JSON: {str(e)}")
@@ -65,8 +126,23 @@ class GoogleSheetsGenerator:
         
         self.auto_share_email = os.getenv('GOOGLE_SHEETS_AUTO_SHARE_EMAIL')
         print(f"DEBUG: Auto-share email: {self.auto_share_email}")
+        
+        # Pre-branded master spreadsheet for template-copy mode (optional)
+        self.template_id = template_id or os.getenv('GOOGLE_SHEETS_TEMPLATE_ID')
+        
+        # Build the workbook locally and upload it in one Drive call (optional)
+        self.upload_xlsx = os.getenv('GOOGLE_SHEETS_UPLOAD_XLSX', 'false').lower() == 'true'
+        
+        # Unchanged SOWs map back to the sheet already exported for this identity
+        self.export_cache = get_export_cache()
+        self.cache_owner = self.quota_user or self.quota_project
+        
+        # What was last written to each sheet, for incremental sync
+        self.snapshots = get_snapshot_store()
     
-    def create_sow_sheet(self, client_name: str, service_name: str, sow_data: Dict[str, Any]) -> Dict[str, str]:
+    def create_sow_sheet(self, client_name: str, service_name: str, sow_data: Dict[str, Any],
+                         use_template: Optional[bool] = None, upload_xlsx: Optional[bool] = None,
+                         force_new: bool = False) -> Dict[str, str]:
         """
         Create a formatted SOW in Google Sheets
         
@@ -74,41 +150,47 @@ class GoogleSheetsGenerator:
             client_name: Client name for sheet naming
             service_name: Service name for sheet naming
             sow_data: Dictionary containing SOW content sections
+            use_template: Copy the branded master instead of formatting from
+                scratch. Defaults to True whenever a template is configured.
+            upload_xlsx: Build the branded workbook locally and upload it as
+                a Google Sheet in a single Drive call. Defaults to
+                GOOGLE_SHEETS_UPLOAD_XLSX; ignored in template mode.
+            force_new: Skip the dedupe cache and always create a new sheet
             
         Returns:
             Dictionary with sheet_id, sheet_url, and share_link
         """
+        if use_template is None:
+            use_template = bool(self.template_id)
+        if use_template and not self.template_id:
+            raise ValueError("Template mode requires GOOGLE_SHEETS_TEMPLATE_ID to be set")
+        if upload_xlsx is None:
+            upload_xlsx = self.upload_xlsx
+        
+        mode = 'template' if use_template else 'upload' if upload_xlsx else 'build'
+        
+        # Identical content already exported the same way: hand back that sheet, no API calls
+        content_hash = sow_content_hash(client_name, service_name, sow_data, self._export_mode(mode))
+        if not force_new:
+            cached = self.export_cache.lookup(self.cache_owner, content_hash)
+            if cached:
+                print(f"DEBUG: Export cache hit, reusing sheet {cached['sheet_id']}")
+                return {**cached, 'status': 'success', 'cached': True}
+        
         try:
-            # Create spreadsheet
-            sheet_id = self._create_spreadsheet(client_name, service_name)
-            
-            # Add header section
-            self._add_header_section(sheet_id, client_name, service_name)
-            
-            # Add content sections
-            if 'overview' in sow_data:
-                self._add_section(sheet_id, "Overview", sow_data['overview'], row=8)
-            
-            if 'deliverables' in sow_data:
-                self._add_section(sheet_id, "What's Included", sow_data['deliverables'], row=15)
-            
-            if 'outcomes' in sow_data:
-                self._add_section(sheet_id, "Project Outcomes", sow_data['outcomes'], row=22)
-            
-            if 'phases' in sow_data:
-                self._add_section(sheet_id, "Project Phases", sow_data['phases'], row=29)
-            
-            if 'pricing' in sow_data:
-                self._add_pricing_section(sheet_id, sow_data['pricing'], row=36)
-            
-            if 'assumptions' in sow_data:
-                self._add_section(sheet_id, "Assumptions", sow_data['assumptions'], row=50)
-            
-            if 'timeline' in sow_data:
-                self._add_section(sheet_id, "Timeline", sow_data['timeline'], row=56)
-            
-            # Apply formatting
-            self._apply_branding_formatting(sheet_id)
+            # Uploaded workbooks share the build layout (values render alike)
+            values = self._render_values(mode, client_name, service_name, sow_data)
+            if use_template:
+                # Copy the branded master and write values only
+                sheet_id = self._copy_template(client_name, service_name)
+                self._write_values(sheet_id, [
+                    {'range': cell_range, 'values': cell_values} for cell_range, cell_values in values.items()
+                ])
+            elif upload_xlsx:
+                sheet_id = self._upload_workbook(client_name, service_name, sow_data, values)
+            else:
+                sheet_id = self._build_sheet(client_name, service_name, sow_data, values)
+            self.snapshots.save(sheet_id, mode, self._placed_sections(sow_data), values)
             
             # Share with auto-share email if configured
             if self.auto_share_email:
@@ -118,14 +200,20 @@ class GoogleSheetsGenerator:
             sheet_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit"
             share_link = f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit?usp=sharing"
             
-            return {
+            result = {
                 'sheet_id': sheet_id,
                 'sheet_url': sheet_url,
                 'share_link': share_link,
                 'status': 'success'
             }
+            self.export_cache.store_result(self.cache_owner, content_hash, result)
+            return result
             
         except HttpError as e:
+            if e.resp.status == 429:
+                raise Exception(
+                    f"Google Sheets API quota exceeded after retries, please try again shortly. Error: {str(e)}"
+                )
             if '403' in str(e):
                 # If permission denied, provide helpful error message
                 print(f"ERROR: Google Sheets API 403 Permission Denied")
@@ -142,10 +230,67 @@ class GoogleSheetsGenerator:
         except Exception as e:
             raise Exception(f"Failed to create SOW sheet: {str(e)}")
     
-    def _create_spreadsheet(self, client_name: str, service_name: str) -> str:
-        """Create a new spreadsheet with SOW naming convention"""
-        title = f"SOW - {client_name} - {service_name} - {datetime.now().strftime('%b %Y')}"
+    def _build_sheet(self, client_name: str, service_name: str, sow_data: Dict[str, Any],
+                     values: Dict[str, list]) -> str:
+        """Create a blank spreadsheet and apply the full branding and content"""
+        # Create spreadsheet
+        sheet_id = self._create_spreadsheet(self._sheet_title(client_name, service_name))
         
+        # Header, every section and branding go out in a single batchUpdate
+        self._batch_update(sheet_id, self._sow_tab_requests(0, client_name, service_name, sow_data))
+        
+        # Pricing table rows and formulas as one values range
+        tables = [
+            {'range': cell_range, 'values': cell_values}
+            for cell_range, cell_values in values.items()
+            if PRICING_TABLE_RANGE.match(cell_range)
+        ]
+        if tables:
+            self._write_values(sheet_id, tables)
+        
+        return sheet_id
+    
+    def _upload_workbook(self, client_name: str, service_name: str, sow_data: Dict[str, Any],
+                         values: Dict[str, list]) -> str:
+        """Build the branded workbook locally and convert it to a Google Sheet in one upload"""
+        sections = []
+        for key, title, row in self._section_layout(sow_data):
+            section = {'title': title, 'row': row}
+            if key == 'pricing':
+                section['table'] = values[self._section_ranges(key, row, sow_data)[1]]
+                section['total_rows'] = PRICING_TOTAL_ROWS
+            else:
+                section['content'] = values[f'A{row + 2}'][0][0]
+            sections.append(section)
+        content = build_branded_workbook(values['A3:C3'][0], sections)
+        
+        body = {'name': self._sheet_title(client_name, service_name), 'mimeType': GOOGLE_SHEETS_MIME_TYPE}
+        folder_id = os.getenv('GOOGLE_SHEETS_FOLDER_ID')
+        if folder_id:
+            body['parents'] = [folder_id]
+        
+        # Multipart (non-resumable) upload: metadata and file in a single request
+        media = MediaIoBaseUpload(io.BytesIO(content), mimetype=XLSX_MIME_TYPE, resumable=False)
+        response = self._execute(self.drive_service.files().create(
+            body=body,
+            media_body=media,
+            fields='id'
+        ))
+        
+        print(f"DEBUG: Uploaded {len(content)} byte workbook as sheet {response['id']}")
+        return response['id']
+    
+    def _export_mode(self, mode: str) -> str:
+        """Dedupe key part for a mode: template copies are per master spreadsheet"""
+        return f'template:{self.template_id}' if mode == 'template' else mode
+    
+    @staticmethod
+    def _sheet_title(client_name: str, service_name: str) -> str:
+        """SOW naming convention shared by every export mode"""
+        return f"SOW - {client_name} - {service_name} - {datetime.now().strftime('%b %Y')}"
+    
+    def _create_spreadsheet(self, title: str, sheets: Optional[List[Dict[str, Any]]] = None) -> str:
+        """Create a new spreadsheet, optionally with its tabs already defined"""
         body = {
             'properties': {
                 'title': title,
@@ -153,45 +298,458 @@ class GoogleSheetsGenerator:
                 'timeZone': 'Australia/Sydney'
             }
         }
+        if sheets:
+            body['sheets'] = sheets
         
         request = self.sheets_service.spreadsheets().create(body=body)
-        response = request.execute()
+        response = self._execute(request)
         sheet_id = response['spreadsheetId']
         
-        # Move sheet to folder if folder ID is set
+        self._move_to_folder(sheet_id)
+        return sheet_id
+    
+    def _move_to_folder(self, sheet_id: str):
+        """Move sheet to folder if folder ID is set"""
         folder_id = os.getenv('GOOGLE_SHEETS_FOLDER_ID')
         if folder_id:
             try:
                 # Get current parents (default location)
-                file_metadata = self.drive_service.files().get(
+                file_metadata = self._execute(self.drive_service.files().get(
                     fileId=sheet_id,
                     fields='parents'
-                ).execute()
+                ))
                 
                 previous_parents = ",".join(file_metadata.get('parents', []))
                 
                 # Move to destination folder
-                self.drive_service.files().update(
+                self._execute(self.drive_service.files().update(
                     fileId=sheet_id,
                     addParents=folder_id,
                     removeParents=previous_parents,
                     fields='id, parents'
-                ).execute()
+                ))
                 
                 print(f"DEBUG: Sheet moved to folder {folder_id}")
             except Exception as e:
                 print(f"WARNING: Could not move sheet to folder: {str(e)}")
+    
+    def _copy_template(self, client_name: str, service_name: str) -> str:
+        """Copy the branded master spreadsheet straight into the target folder"""
+        body = {'name': self._sheet_title(client_name, service_name)}
         
-        return sheet_id
+        # Copying into the folder directly saves the get/update move round trips
+        folder_id = os.getenv('GOOGLE_SHEETS_FOLDER_ID')
+        if folder_id:
+            body['parents'] = [folder_id]
+        
+        response = self._execute(self.drive_service.files().copy(
+            fileId=self.template_id,
+            body=body,
+            fields='id'
+        ))
+        
+        print(f"DEBUG: Copied template {self.template_id} -> {response['id']}")
+        return response['id']
     
-    def _add_header_section(self, sheet_id: str, client_name: str, service_name: str):
-        """Add Social Garden branding header"""
-        requests = [
+    def sync_sow_sheet(self, sheet_id: str, client_name: str, service_name: str,
+                       sow_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Bring an exported sheet up to date by rewriting only the ranges that changed
+        
+        Args:
+            sheet_id: Spreadsheet previously created by create_sow_sheet
+            client_name: Client name
+            service_name: Service name
+            sow_data: Revised SOW content sections
+            
+        Returns:
+            Dictionary with sheet_id, sheet_url, share_link and updated_ranges
+        """
+        snapshot = self.snapshots.load(sheet_id)
+        if snapshot:
+            mode = snapshot['mode']
+            previous, previous_sections = snapshot['values'], self._snapshot_placements(snapshot['sections'])
+        else:
+            # Unknown sheet: no diff base, so every value gets written once
+            mode = 'template' if self.template_id else 'build'
+            previous, previous_sections = {}, None
+        
+        values = self._render_values(mode, client_name, service_name, sow_data)
+        sections = self._placed_sections(sow_data)
+        
+        try:
+            # Sections that are new, moved or resized (a longer pricing table pushes
+            # everything below it down) get their formatting and merges redone
+            requests = []
+            if mode != 'template' and previous_sections is not None:
+                placements = {key: (row, height) for key, row, height in sections}
+                for key, (row, height) in previous_sections.items():
+                    if placements.get(key) != (row, height):
+                        requests += self._clear_block_requests(0, row, height)
+                for key, title, row in self._section_layout(sow_data):
+                    if previous_sections.get(key) != placements[key]:
+                        requests += self._section_format_requests(0, key, title, row, sow_data)
+                        for cell_range in self._section_ranges(key, row, sow_data):
+                            previous.pop(cell_range, None)
+            
+            # Ranges that are gone (e.g. a removed section) are blanked first so
+            # they never overwrite a section that moved on top of them
+            data = [
+                {'range': cell_range, 'values': [[''] * len(row) for row in cell_values]}
+                for cell_range, cell_values in previous.items()
+                if cell_range not in values
+            ]
+            data += [
+                {'range': cell_range, 'values': cell_values}
+                for cell_range, cell_values in values.items()
+                if previous.get(cell_range) != cell_values
+            ]
+            
+            if requests:
+                self._batch_update(sheet_id, requests)
+            if data:
+                self._write_values(sheet_id, data)
+        except HttpError as e:
+            raise Exception(f"Google Sheets API error: {str(e)}")
+        
+        self.snapshots.save(sheet_id, mode, sections, values)
+        
+        result = {
+            'sheet_id': sheet_id,
+            'sheet_url': f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit",
+            'share_link': f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit?usp=sharing",
+            'status': 'success'
+        }
+        
+        # The sheet now holds the revised content, so dedupe against that instead
+        self.export_cache.invalidate(sheet_id)
+        self.export_cache.store_result(
+            self.cache_owner, sow_content_hash(client_name, service_name, sow_data, self._export_mode(mode)), result
+        )
+        
+        print(f"DEBUG: Synced sheet {sheet_id}: {len(data)} ranges, {len(requests)} format requests")
+        return {**result, 'updated_ranges': len(data)}
+    
+    @staticmethod
+    def _present_sections(sow_data: Dict[str, Any]) -> List[str]:
+        """Section keys this SOW will write, in layout order"""
+        return [key for key, _, _ in SOW_SECTIONS if key in sow_data]
+    
+    def _section_layout(self, sow_data: Dict[str, Any]) -> List[tuple]:
+        """(key, title, start row) of each section this SOW writes, in layout order"""
+        layout, next_free_row = [], 0
+        for key, title, min_row in SOW_SECTIONS:
+            if key in sow_data:
+                row = max(min_row, next_free_row)
+                layout.append((key, title, row))
+                # Keep one blank row between a section and the next
+                next_free_row = row + self._section_height(key, sow_data) + 1
+        return layout
+    
+    def _section_height(self, key: str, sow_data: Dict[str, Any]) -> int:
+        """Rows a section occupies, title included"""
+        if key == 'pricing':
+            return 2 + len(self._pricing_rows(sow_data[key])) + PRICING_TOTAL_ROWS
+        return 2
+    
+    def _placed_sections(self, sow_data: Dict[str, Any]) -> List[list]:
+        """[key, row, height] of each section, as recorded in the snapshot"""
+        return [
+            [key, row, self._section_height(key, sow_data)]
+            for key, _, row in self._section_layout(sow_data)
+        ]
+    
+    @staticmethod
+    def _snapshot_placements(sections: list) -> Dict[str, tuple]:
+        """Section placements from a snapshot; older snapshots only stored keys"""
+        defaults = {key: row for key, _, row in SOW_SECTIONS}
+        placements = {}
+        for entry in sections:
+            if isinstance(entry, str):
+                placements[entry] = (defaults[entry], 2)
+            else:
+                key, row, height = entry
+                placements[key] = (row, height)
+        return placements
+    
+    def _section_ranges(self, key: str, row: int, sow_data: Dict[str, Any]) -> List[str]:
+        """A1 ranges a build-mode section writes"""
+        if key == 'pricing':
+            last_row = row + self._section_height(key, sow_data)
+            return [f'A{row + 1}', f'A{row + 2}:D{last_row}']
+        return [f'A{row + 1}', f'A{row + 2}']
+    
+    def _section_content(self, key: str, sow_data: Dict[str, Any]) -> str:
+        """Cell text for a section"""
+        if key == 'pricing':
+            return self._format_pricing_table(sow_data[key])
+        return sow_data[key] or ''
+    
+    def _render_values(self, mode: str, client_name: str, service_name: str,
+                       sow_data: Dict[str, Any]) -> Dict[str, list]:
+        """
+        Every value an export writes, keyed by the range it lands in
+        (named ranges in template mode, A1 ranges of the fixed layout otherwise)
+        """
+        header = [
+            f'CLIENT: {client_name}',
+            f'SERVICE: {service_name}',
+            f"DATE: {datetime.now().strftime('%d %b %Y')}",
+        ]
+        
+        if mode == 'template':
+            values = {
+                TEMPLATE_NAMED_RANGES['client']: [[header[0]]],
+                TEMPLATE_NAMED_RANGES['service']: [[header[1]]],
+                TEMPLATE_NAMED_RANGES['date']: [[header[2]]],
+            }
+            for key in self._present_sections(sow_data):
+                values[TEMPLATE_NAMED_RANGES[key]] = [[self._section_content(key, sow_data)]]
+            return values
+        
+        values = {'A3:C3': [header]}
+        for key, title, row in self._section_layout(sow_data):
+            values[f'A{row + 1}'] = [[title]]
+            if key == 'pricing':
+                table_range = self._section_ranges(key, row, sow_data)[1]
+                values[table_range] = self._pricing_table_values(sow_data[key], row + 2)
+            else:
+                values[f'A{row + 2}'] = [[self._section_content(key, sow_data)]]
+        return values
+    
+    def create_bulk_sow_sheet(self, title: str, sows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Export many SOWs into one spreadsheet, one tab per SOW plus a summary tab
+        
+        Args:
+            title: Spreadsheet title
+            sows: List of dicts with client_name, service_name and sow_data
+            
+        Returns:
+            Dictionary with sheet_id, sheet_url, share_link and the created tabs
+        """
+        if not sows:
+            raise ValueError("At least one SOW is required for a bulk export")
+        if len(sows) > MAX_BULK_TABS:
+            raise ValueError(f"Bulk export is limited to {MAX_BULK_TABS} SOWs per spreadsheet")
+        
+        try:
+            # Tabs are declared up front so the create call builds them all
+            used_titles = {'summary'}
+            tabs = []
+            for tab_id, sow in enumerate(sows, start=1):
+                tabs.append({
+                    'tab_id': tab_id,
+                    'tab_title': self._tab_title(sow['client_name'], sow['service_name'], used_titles),
+                    'client_name': sow['client_name'],
+                    'service_name': sow['service_name'],
+                })
+            
+            sheets = [{'properties': {'sheetId': 0, 'title': 'Summary', 'index': 0}}]
+            sheets += [
+                {'properties': {'sheetId': tab['tab_id'], 'title': tab['tab_title'], 'index': tab['tab_id']}}
+                for tab in tabs
+            ]
+            sheet_id = self._create_spreadsheet(title, sheets=sheets)
+            
+            # Every tab's content and formatting, batched across tabs
+            requests = self._summary_requests(len(sows))
+            for tab, sow in zip(tabs, sows):
+                requests += self._sow_tab_requests(
+                    tab['tab_id'], sow['client_name'], sow['service_name'], sow.get('sow_data', {})
+                )
+            self._batch_update(sheet_id, requests)
+            
+            # Summary totals and every tab's pricing table as formulas, so the
+            # sheet stays live when edited
+            data = [self._summary_values(tabs, sows)]
+            for tab, sow in zip(tabs, sows):
+                data += self._tab_pricing_values(tab['tab_title'], sow.get('sow_data', {}))
+            self._write_values(sheet_id, data)
+            
+            if self.auto_share_email:
+                self._share_sheet(sheet_id, self.auto_share_email, 'user', 'viewer')
+            
+            return {
+                'sheet_id': sheet_id,
+                'sheet_url': f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit",
+                'share_link': f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit?usp=sharing",
+                'tabs': tabs,
+                'status': 'success'
+            }
+            
+        except HttpError as e:
+            raise Exception(f"Google Sheets API error: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Failed to create bulk SOW sheet: {str(e)}")
+    
+    @staticmethod
+    def _tab_title(client_name: str, service_name: str, used_titles: set) -> str:
+        """Unique, Sheets-safe tab title for a SOW"""
+        base = re.sub(r"[\[\]*?/\\:]", " ", f"{client_name} - {service_name}").strip()[:90] or "SOW"
+        tab_title, suffix = base, 2
+        while tab_title.lower() in used_titles:
+            tab_title = f"{base} ({suffix})"
+            suffix += 1
+        used_titles.add(tab_title.lower())
+        return tab_title
+    
+    def _summary_requests(self, sow_count: int) -> List[Dict[str, Any]]:
+        """Formatting for the summary tab header and currency columns"""
+        return [
+            {
+                'repeatCell': {
+                    'range': {'sheetId': 0, 'startRowIndex': 0, 'endRowIndex': 1, 'startColumnIndex': 0, 'endColumnIndex': 5},
+                    'cell': {
+                        'userEnteredFormat': {
+                            'backgroundColor': self._hex_to_rgb(SG_DARK),
+                            'textFormat': {'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}, 'bold': True}
+                        }
+                    },
+                    'fields': 'userEnteredFormat(backgroundColor,textFormat)'
+                }
+            },
+            {
+                'repeatCell': {
+                    'range': {'sheetId': 0, 'startRowIndex': 1, 'endRowIndex': sow_count + 2, 'startColumnIndex': 2, 'endColumnIndex': 5},
+                    'cell': {'userEnteredFormat': {'numberFormat': {'type': 'CURRENCY', 'pattern': '$#,##0.00'}}},
+                    'fields': 'userEnteredFormat.numberFormat'
+                }
+            },
+            {
+                'repeatCell': {
+                    'range': {'sheetId': 0, 'startRowIndex': sow_count + 1, 'endRowIndex': sow_count + 2, 'startColumnIndex': 0, 'endColumnIndex': 5},
+                    'cell': {'userEnteredFormat': {'textFormat': {'bold': True}}},
+                    'fields': 'userEnteredFormat.textFormat.bold'
+                }
+            },
+            {
+                'updateSheetProperties': {
+                    'fields': 'gridProperties.frozenRowCount',
+                    'properties': {'sheetId': 0, 'gridProperties': {'frozenRowCount': 1}}
+                }
+            },
+        ]
+    
+    def _summary_values(self, tabs: List[Dict[str, Any]], sows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Summary tab rows: one per SOW linking to its tab, plus a totals row"""
+        rows = [['Client', 'Service', 'Subtotal (ex. GST)', 'GST (10%)', 'Total (inc. GST)']]
+        for n, (tab, sow) in enumerate(zip(tabs, sows), start=2):
+            client = tab['client_name'].replace('"', '""')
+            rows.append([
+                Formula(f'=HYPERLINK("#gid={tab["tab_id"]}", "{client}")'),
+                tab['service_name'],
+                self._tab_subtotal_cell(tab['tab_title'], sow.get('sow_data', {})),
+                Formula(f'=C{n}*0.1'),
+                Formula(f'=C{n}+D{n}'),
+            ])
+        last = len(sows) + 1
+        rows.append(['TOTAL', '', Formula(f'=SUM(C2:C{last})'), Formula(f'=SUM(D2:D{last})'),
+                     Formula(f'=SUM(E2:E{last})')])
+        return {'range': 'Summary!A1', 'values': rows}
+    
+    @staticmethod
+    def _quoted_tab(tab_title: str) -> str:
+        """Tab title as an A1 sheet reference"""
+        return "'" + tab_title.replace("'", "''") + "'"
+    
+    def _tab_pricing_values(self, tab_title: str, sow_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """A bulk tab's pricing table, addressed to that tab"""
+        return [
+            {'range': f'{self._quoted_tab(tab_title)}!{cell_range}', 'values': cell_values}
+            for cell_range, cell_values in self._render_values('build', '', '', sow_data).items()
+            if PRICING_TABLE_RANGE.match(cell_range)
+        ]
+    
+    def _tab_subtotal_cell(self, tab_title: str, sow_data: Dict[str, Any]) -> Any:
+        """Formula pointing at a tab's pricing subtotal, or 0 without pricing"""
+        for key, _, row in self._section_layout(sow_data):
+            if key == 'pricing':
+                subtotal_row = row + 3 + len(self._pricing_rows(sow_data[key]))
+                return Formula(f'={self._quoted_tab(tab_title)}!D{subtotal_row}')
+        return 0
+    
+    def _sow_tab_requests(self, tab_id: int, client_name: str, service_name: str,
+                          sow_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """All content and formatting requests for one SOW tab"""
+        requests = self._header_requests(tab_id, client_name, service_name)
+        for key, title, row in self._section_layout(sow_data):
+            requests += self._section_format_requests(tab_id, key, title, row, sow_data)
+        requests += self._branding_requests(tab_id)
+        return requests
+    
+    def _section_format_requests(self, tab_id: int, key: str, title: str, row: int,
+                                 sow_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Formatting for one section; pricing table values are written separately"""
+        if key == 'pricing':
+            return (self._section_title_requests(tab_id, title, row)
+                    + self._pricing_table_requests(tab_id, row + 1, len(self._pricing_rows(sow_data[key]))))
+        return self._section_requests(tab_id, title, self._section_content(key, sow_data), row)
+    
+    def _batch_update(self, sheet_id: str, requests: List[Dict[str, Any]]):
+        """Send formatting requests in as few batchUpdate calls as the payload limit allows"""
+        for chunk in self._chunk_by_payload(requests):
+            self._execute(self.sheets_service.spreadsheets().batchUpdate(
+                spreadsheetId=sheet_id,
+                body={'requests': chunk}
+            ))
+    
+    def _write_values(self, sheet_id: str, data: List[Dict[str, Any]]):
+        """
+        Write value ranges, keeping user text literal: each range goes out as
+        RAW with its Formula cells left null, then the Formula cells alone as
+        USER_ENTERED. The API skips null cells, so every cell is written once
+        and text starting with '=', '+' or '@' is never evaluated.
+        """
+        raw, formulas = [], []
+        for item in data:
+            if not any(isinstance(cell, Formula) for row in item['values'] for cell in row):
+                raw.append(item)
+                continue
+            raw.append({
+                'range': item['range'],
+                'values': [[None if isinstance(cell, Formula) else cell for cell in row] for row in item['values']],
+            })
+            formulas.append({
+                'range': item['range'],
+                'values': [[cell if isinstance(cell, Formula) else None for cell in row] for row in item['values']],
+            })
+        if raw:
+            self._values_batch_update(sheet_id, raw)
+        if formulas:
+            self._values_batch_update(sheet_id, formulas, 'USER_ENTERED')
+    
+    def _values_batch_update(self, sheet_id: str, data: List[Dict[str, Any]], value_input_option: str = 'RAW'):
+        """Send value ranges in as few values.batchUpdate calls as the payload limit allows"""
+        for chunk in self._chunk_by_payload(data):
+            self._execute(self.sheets_service.spreadsheets().values().batchUpdate(
+                spreadsheetId=sheet_id,
+                body={'valueInputOption': value_input_option, 'data': chunk}
+            ))
+    
+    @staticmethod
+    def _chunk_by_payload(items: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split items into consecutive chunks whose JSON size stays under the limit"""
+        chunks, current, size = [], [], 0
+        for item in items:
+            item_size = len(json.dumps(item, separators=(',', ':')))
+            if current and size + item_size > MAX_BATCH_PAYLOAD_BYTES:
+                chunks.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += item_size
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _header_requests(self, tab_id: int, client_name: str, service_name: str) -> List[Dict[str, Any]]:
+        """Social Garden branding header"""
+        return [
             # Merge cells for header
             {
                 'mergeCells': {
                     'range': {
-                        'sheetId': 0,
+                        'sheetId': tab_id,
                         'startRowIndex': 0,
                         'endRowIndex': 1,
                         'startColumnIndex': 0,
@@ -203,7 +761,7 @@ class GoogleSheetsGenerator:
             {
                 'updateCells': {
                     'range': {
-                        'sheetId': 0,
+                        'sheetId': tab_id,
                         'rowIndex': 0,
                         'columnIndex': 0
                     },
@@ -232,21 +790,22 @@ class GoogleSheetsGenerator:
             },
             # Set header row height
             {
-                'updateSheetProperties': {
-                    'fields': 'gridProperties.rowData(0)',
-                    'properties': {
-                        'sheetId': 0,
-                        'gridProperties': {
-                            'rowData': [{'pixelSize': 50}]
-                        }
-                    }
+                'updateDimensionProperties': {
+                    'range': {
+                        'sheetId': tab_id,
+                        'dimension': 'ROWS',
+                        'startIndex': 0,
+                        'endIndex': 1
+                    },
+                    'properties': {'pixelSize': 50},
+                    'fields': 'pixelSize'
                 }
             },
             # Add client/service info
             {
                 'updateCells': {
                     'range': {
-                        'sheetId': 0,
+                        'sheetId': tab_id,
                         'rowIndex': 2,
                         'columnIndex': 0
                     },
@@ -263,34 +822,26 @@ class GoogleSheetsGenerator:
                 }
             }
         ]
-        
-        self.sheets_service.spreadsheets().batchUpdate(
-            spreadsheetId=sheet_id,
-            body={'requests': requests}
-        ).execute()
     
-    def _add_section(self, sheet_id: str, title: str, content: str, row: int):
-        """Add a text section to the sheet"""
-        requests = [
+    def _section_requests(self, tab_id: int, title: str, content: str, row: int) -> List[Dict[str, Any]]:
+        """A titled text section"""
+        return self._section_title_requests(tab_id, title, row) + [
+            # Add content
             {
                 'updateCells': {
                     'range': {
-                        'sheetId': 0,
-                        'rowIndex': row,
+                        'sheetId': tab_id,
+                        'rowIndex': row + 1,
                         'columnIndex': 0
                     },
                     'rows': [
                         {
                             'values': [
                                 {
-                                    'userEnteredValue': {'stringValue': title},
+                                    'userEnteredValue': {'stringValue': content},
                                     'userEnteredFormat': {
-                                        'backgroundColor': self._hex_to_rgb(SG_LIGHT_GRAY),
-                                        'textFormat': {
-                                            'fontSize': 14,
-                                            'bold': True,
-                                            'foregroundColor': self._hex_to_rgb(SG_DARK)
-                                        }
+                                        'wrapStrategy': 'WRAP',
+                                        'verticalAlignment': 'TOP'
                                     }
                                 }
                             ]
@@ -302,30 +853,38 @@ class GoogleSheetsGenerator:
             {
                 'mergeCells': {
                     'range': {
-                        'sheetId': 0,
-                        'startRowIndex': row,
-                        'endRowIndex': row + 1,
+                        'sheetId': tab_id,
+                        'startRowIndex': row + 1,
+                        'endRowIndex': row + 2,
                         'startColumnIndex': 0,
                         'endColumnIndex': 6
                     }
                 }
-            },
-            # Add content
+            }
+        ]
+    
+    def _section_title_requests(self, tab_id: int, title: str, row: int) -> List[Dict[str, Any]]:
+        """Shaded, merged section title row"""
+        return [
             {
                 'updateCells': {
                     'range': {
-                        'sheetId': 0,
-                        'rowIndex': row + 1,
+                        'sheetId': tab_id,
+                        'rowIndex': row,
                         'columnIndex': 0
                     },
                     'rows': [
                         {
                             'values': [
                                 {
-                                    'userEnteredValue': {'stringValue': content},
+                                    'userEnteredValue': {'stringValue': title},
                                     'userEnteredFormat': {
-                                        'wrapStrategy': 'WRAP',
-                                        'verticalAlignment': 'TOP'
+                                        'backgroundColor': self._hex_to_rgb(SG_LIGHT_GRAY),
+                                        'textFormat': {
+                                            'fontSize': 14,
+                                            'bold': True,
+                                            'foregroundColor': self._hex_to_rgb(SG_DARK)
+                                        }
                                     }
                                 }
                             ]
@@ -337,87 +896,168 @@ class GoogleSheetsGenerator:
             {
                 'mergeCells': {
                     'range': {
-                        'sheetId': 0,
-                        'startRowIndex': row + 1,
-                        'endRowIndex': row + 2,
+                        'sheetId': tab_id,
+                        'startRowIndex': row,
+                        'endRowIndex': row + 1,
                         'startColumnIndex': 0,
                         'endColumnIndex': 6
                     }
                 }
             }
         ]
+    
+    def _pricing_table_requests(self, tab_id: int, header_row: int, item_count: int) -> List[Dict[str, Any]]:
+        """One shared format pass over a pricing table, however many rows it has"""
+        end_row = header_row + 1 + item_count + PRICING_TOTAL_ROWS
+        totals_row = header_row + 1 + item_count
+        return [
+            {
+                'repeatCell': {
+                    'range': {'sheetId': tab_id, 'startRowIndex': header_row, 'endRowIndex': header_row + 1,
+                              'startColumnIndex': 0, 'endColumnIndex': 4},
+                    'cell': {
+                        'userEnteredFormat': {
+                            'backgroundColor': self._hex_to_rgb(SG_DARK),
+                            'textFormat': {'foregroundColor': {'red': 1, 'green': 1, 'blue': 1}, 'bold': True}
+                        }
+                    },
+                    'fields': 'userEnteredFormat(backgroundColor,textFormat)'
+                }
+            },
+            {
+                'repeatCell': {
+                    'range': {'sheetId': tab_id, 'startRowIndex': header_row + 1, 'endRowIndex': end_row,
+                              'startColumnIndex': 2, 'endColumnIndex': 4},
+                    'cell': {'userEnteredFormat': {'numberFormat': {'type': 'CURRENCY', 'pattern': '$#,##0.00'}}},
+                    'fields': 'userEnteredFormat.numberFormat'
+                }
+            },
+            {
+                'repeatCell': {
+                    'range': {'sheetId': tab_id, 'startRowIndex': totals_row, 'endRowIndex': end_row,
+                              'startColumnIndex': 0, 'endColumnIndex': 4},
+                    'cell': {'userEnteredFormat': {'textFormat': {'bold': True}}},
+                    'fields': 'userEnteredFormat.textFormat.bold'
+                }
+            },
+        ]
+    
+    @staticmethod
+    def _clear_block_requests(tab_id: int, row: int, height: int) -> List[Dict[str, Any]]:
+        """Drop the merges and formatting a section left behind at its old position"""
+        block = {'sheetId': tab_id, 'startRowIndex': row, 'endRowIndex': row + height,
+                 'startColumnIndex': 0, 'endColumnIndex': 6}
+        return [
+            {'unmergeCells': {'range': block}},
+            {'repeatCell': {'range': block, 'cell': {}, 'fields': 'userEnteredFormat'}},
+        ]
+    
+    @staticmethod
+    def _pricing_rows(pricing_data: Optional[list]) -> List[Dict[str, Any]]:
+        """Pricing items normalised to role, hours, rate and amount"""
+        def number(value):
+            try:
+                return float(value) if value not in (None, '') else None
+            except (TypeError, ValueError):
+                return None
         
-        self.sheets_service.spreadsheets().batchUpdate(
-            spreadsheetId=sheet_id,
-            body={'requests': requests}
-        ).execute()
+        rows = []
+        for item in pricing_data or []:
+            if not isinstance(item, dict):
+                continue
+            hours, rate = number(item.get('hours')), number(item.get('rate'))
+            amount = number(item.get('amount', item.get('total')))
+            if amount is None:
+                amount = hours * rate if hours is not None and rate is not None else 0.0
+            rows.append({
+                'role': item.get('role') or item.get('description') or 'Item',
+                'hours': hours,
+                'rate': rate,
+                'amount': amount,
+            })
+        return rows
     
-    def _add_pricing_section(self, sheet_id: str, pricing_data: list, row: int):
-        """Add pricing table to sheet"""
-        # This would be a more complex section with actual pricing table
-        # For now, convert to formatted text
-        pricing_text = self._format_pricing_table(pricing_data)
-        self._add_section(sheet_id, "Pricing Summary", pricing_text, row)
+    def _pricing_table_values(self, pricing_data: Optional[list], header_row: int) -> List[list]:
+        """
+        Pricing table rows for a values.batchUpdate, with line and grand totals
+        as formulas. header_row is the 1-based sheet row of the column headers.
+        """
+        rows = self._pricing_rows(pricing_data)
+        first, last = header_row + 1, header_row + len(rows)
+        subtotal_row = last + 1
+        
+        table = [list(PRICING_TABLE_HEADER)]
+        for n, item in enumerate(rows, start=first):
+            if item['hours'] is not None and item['rate'] is not None:
+                table.append([item['role'], item['hours'], item['rate'], Formula(f'=B{n}*C{n}')])
+            else:
+                table.append([
+                    item['role'],
+                    '' if item['hours'] is None else item['hours'],
+                    '' if item['rate'] is None else item['rate'],
+                    item['amount'],
+                ])
+        table += [
+            ['Subtotal (ex. GST)', Formula(f'=SUM(B{first}:B{last})') if rows else 0, '',
+             Formula(f'=SUM(D{first}:D{last})') if rows else 0],
+            ['GST (10%)', '', '', Formula(f'=D{subtotal_row}*0.1')],
+            ['Total (inc. GST)', '', '', Formula(f'=D{subtotal_row}+D{subtotal_row + 1}')],
+        ]
+        return table
+    
+    def _pricing_subtotal(self, pricing_data: Optional[list]) -> float:
+        """Sum of pricing item amounts (ex. GST), rounded to the cent by the pricing engine"""
+        return float(quote_rows(self._pricing_rows(pricing_data))['subtotal'])
     
     def _format_pricing_table(self, pricing_data: list) -> str:
         """Format pricing data as text"""
         if not pricing_data:
             return "No pricing data available"
         
-        lines = []
-        total = 0
-        
-        for item in pricing_data:
-            if isinstance(item, dict):
-                lines.append(f"{item.get('description', 'Item')}: ${item.get('amount', 0)}")
-                total += float(item.get('amount', 0))
+        lines = [
+            f"{item.get('description', 'Item')}: ${item.get('amount', 0)}"
+            for item in pricing_data
+            if isinstance(item, dict)
+        ]
         
-        lines.append(f"\nTOTAL: ${total:,.2f} + GST")
+        lines.append(f"\nTOTAL: ${self._pricing_subtotal(pricing_data):,.2f} + GST")
         return "\n".join(lines)
     
-    def _apply_branding_formatting(self, sheet_id: str):
-        """Apply Social Garden branding and formatting"""
-        requests = [
+    def _branding_requests(self, tab_id: int) -> List[Dict[str, Any]]:
+        """Social Garden column widths and frozen header rows"""
+        column_widths = [200, 150, 150, 150, 150, 100]
+        return [
             # Set column widths
             {
-                'updateSheetProperties': {
-                    'fields': 'gridProperties.columnData(0)',
-                    'properties': {
-                        'sheetId': 0,
-                        'gridProperties': {
-                            'columnData': [
-                                {'pixelSize': 200},
-                                {'pixelSize': 150},
-                                {'pixelSize': 150},
-                                {'pixelSize': 150},
-                                {'pixelSize': 150},
-                                {'pixelSize': 100}
-                            ]
-                        }
-                    }
+                'updateDimensionProperties': {
+                    'range': {
+                        'sheetId': tab_id,
+                        'dimension': 'COLUMNS',
+                        'startIndex': index,
+                        'endIndex': index + 1
+                    },
+                    'properties': {'pixelSize': width},
+                    'fields': 'pixelSize'
                 }
-            },
+            }
+            for index, width in enumerate(column_widths)
+        ] + [
             # Freeze header rows
             {
                 'updateSheetProperties': {
                     'fields': 'gridProperties.frozenRowCount',
                     'properties': {
-                        'sheetId': 0,
+                        'sheetId': tab_id,
                         'gridProperties': {'frozenRowCount': 4}
                     }
                 }
             }
         ]
-        
-        self.sheets_service.spreadsheets().batchUpdate(
-            spreadsheetId=sheet_id,
-            body={'requests': requests}
-        ).execute()
     
     def _share_sheet(self, sheet_id: str, email: str, role_type: str, role: str):
         """Share sheet with specified email address"""
         try:
-            self.drive_service.permissions().create(
+            self._execute(self.drive_service.permissions().create(
                 fileId=sheet_id,
                 body={
                     'type': role_type,
@@ -425,11 +1065,15 @@ class GoogleSheetsGenerator:
                     'emailAddress': email
                 },
                 fields='id'
-            ).execute()
+            ))
         except HttpError as e:
             # Silently fail on sharing - sheet is still created
             print(f"Warning: Could not share sheet with {email}: {str(e)}")
     
+    def _execute(self, request):
+        """Run a Google API request through the shared quota limiter"""
+        return execute_request(request, project=self.quota_project, user=self.quota_user)
+    
     @staticmethod
     def _hex_to_rgb(hex_color: str) -> dict:
         """Convert hex color to RGB format for Google Sheets API"""
@@ -442,7 +1086,25 @@ class GoogleSheetsGenerator:
         }
 
 
-def create_sow_sheet(client_name: str, service_name: str, sow_data: Dict[str, Any], access_token: str = None) -> Dict[str, str]:
+def create_bulk_sow_sheet(title: str, sows: List[Dict[str, Any]], access_token: str = None) -> Dict[str, Any]:
+    """Helper function to export many SOWs into one spreadsheet"""
+    generator = GoogleSheetsGenerator(access_token=access_token)
+    return generator.create_bulk_sow_sheet(title, sows)
+
+
+def create_sow_sheet(client_name: str, service_name: str, sow_data: Dict[str, Any], access_token: str = None,
+                     use_template: Optional[bool] = None, upload_xlsx: Optional[bool] = None,
+                     force_new: bool = False) -> Dict[str, str]:
     """Helper function to create SOW sheet"""
     generator = GoogleSheetsGenerator(access_token=access_token)
-    return generator.create_sow_sheet(client_name, service_name, sow_data)
+    return generator.create_sow_sheet(
+        client_name, service_name, sow_data,
+        use_template=use_template, upload_xlsx=upload_xlsx, force_new=force_new
+    )
+
+
+def sync_sow_sheet(sheet_id: str, client_name: str, service_name: str, sow_data: Dict[str, Any],
+                   access_token: str = None) -> Dict[str, Any]:
+    """Helper function to sync a revised SOW into its existing sheet"""
+    generator = GoogleSheetsGenerator(access_token=access_token)
+    return generator.sync_sow_sheet(sheet_id, client_name, service_name, sow_data)
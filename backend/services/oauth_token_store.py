@@ -0,0 +1,268 @@
+"""
+OAuth Token Store
+Server-side storage of Google OAuth tokens behind opaque session handles, so
+browsers never hold raw tokens and expired access tokens are refreshed
+instead of sending the user back through consent
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_TOKEN_STORE_PATH = '/tmp/oauth_tokens.sqlite3'
+DEFAULT_SESSION_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_REFRESH_AHEAD_SECONDS = 300
+DEFAULT_ACCESS_TOKEN_LIFETIME_SECONDS = 3600
+MAX_CACHED_CLIENTS = 256
+
+
+def session_key(handle: str) -> str:
+    """Stored key for a session handle; the handle itself is never persisted"""
+    return hashlib.sha256(handle.encode()).hexdigest()
+
+
+class OAuthTokenStore(ABC):
+    """Storage backend interface: token records keyed by hashed session handle"""
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Record for a key, None when missing"""
+
+    @abstractmethod
+    def save(self, key: str, record: Dict[str, Any]):
+        """Insert or replace a record"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove a record; False when it did not exist"""
+
+    @abstractmethod
+    def purge_expired(self, now: float) -> int:
+        """Remove records whose session expired before now; returns the count"""
+
+
+class MemoryOAuthTokenStore(OAuthTokenStore):
+    """Process-local store, for single-worker development"""
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(key)
+            return dict(record) if record else None
+
+    def save(self, key: str, record: Dict[str, Any]):
+        with self._lock:
+            self._records[key] = dict(record)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._records.pop(key, None) is not None
+
+    def purge_expired(self, now: float) -> int:
+        with self._lock:
+            expired = [key for key, record in self._records.items() if record['session_expires_at'] < now]
+            for key in expired:
+                del self._records[key]
+            return len(expired)
+
+
+class SQLiteOAuthTokenStore(OAuthTokenStore):
+    """SQLite-backed store shared by every worker on the host"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('OAUTH_TOKEN_STORE_PATH', DEFAULT_TOKEN_STORE_PATH)
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived transaction per operation; SQLite handles cross-thread locking"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS oauth_sessions (
+                            session_key TEXT PRIMARY KEY,
+                            record TEXT NOT NULL,
+                            session_expires_at REAL NOT NULL
+                        )
+                    """)
+                    conn.commit()
+                    self._schema_ready = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.connect() as conn:
+            row = conn.execute('SELECT record FROM oauth_sessions WHERE session_key = ?', (key,)).fetchone()
+        return json.loads(row['record']) if row else None
+
+    def save(self, key: str, record: Dict[str, Any]):
+        with self.connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO oauth_sessions (session_key, record, session_expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(record), record['session_expires_at']),
+            )
+
+    def delete(self, key: str) -> bool:
+        with self.connect() as conn:
+            return conn.execute('DELETE FROM oauth_sessions WHERE session_key = ?', (key,)).rowcount > 0
+
+    def purge_expired(self, now: float) -> int:
+        with self.connect() as conn:
+            return conn.execute('DELETE FROM oauth_sessions WHERE session_expires_at < ?', (now,)).rowcount
+
+
+# Backends selectable with OAUTH_TOKEN_STORE
+TOKEN_STORE_BACKENDS = {
+    'sqlite': SQLiteOAuthTokenStore,
+    'memory': MemoryOAuthTokenStore,
+}
+
+
+class OAuthSessionManager:
+    """Opaque session handles -> fresh access tokens and ready-built Sheets clients"""
+
+    def __init__(self, store: OAuthTokenStore, oauth_handler=None):
+        self.store = store
+        self._oauth_handler = oauth_handler
+        self.session_ttl = float(os.getenv('OAUTH_SESSION_TTL_SECONDS', DEFAULT_SESSION_TTL_SECONDS))
+        self.refresh_ahead = float(os.getenv('OAUTH_REFRESH_AHEAD_SECONDS', DEFAULT_REFRESH_AHEAD_SECONDS))
+
+        # One lock per session so concurrent requests refresh a token only once
+        self._session_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+        # (session key, access token) -> GoogleSheetsGenerator, least recently used first
+        self._clients: 'OrderedDict[tuple, Any]' = OrderedDict()
+        self._clients_lock = threading.Lock()
+
+    @property
+    def oauth_handler(self):
+        if self._oauth_handler is None:
+            from .google_oauth_handler import get_oauth_handler
+            self._oauth_handler = get_oauth_handler()
+        return self._oauth_handler
+
+    def _session_lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._session_locks.setdefault(key, threading.Lock())
+
+    def create_session(self, token_data: Dict[str, Any]) -> str:
+        """
+        Store a token response from the code exchange
+        Returns: opaque session handle for the client to keep
+        """
+        if not token_data.get('access_token'):
+            raise ValueError("Token response has no access_token")
+
+        now = time.time()
+        handle = secrets.token_urlsafe(32)
+        self.store.save(session_key(handle), {
+            'access_token': token_data['access_token'],
+            'refresh_token': token_data.get('refresh_token'),
+            'expires_at': now + float(token_data.get('expires_in') or DEFAULT_ACCESS_TOKEN_LIFETIME_SECONDS),
+            'scope': token_data.get('scope'),
+            'created_at': now,
+            'session_expires_at': now + self.session_ttl,
+        })
+        return handle
+
+    def get_access_token(self, handle: str) -> str:
+        """Valid access token for a session, refreshed if it expires soon"""
+        key = session_key(handle)
+        record = self.store.load(key)
+        if record is None or record['session_expires_at'] < time.time():
+            raise ValueError("OAuth session not found or expired, please authorize again")
+
+        if record['expires_at'] - time.time() > self.refresh_ahead:
+            return record['access_token']
+
+        with self._session_lock(key):
+            # Another request may have refreshed while we waited
+            record = self.store.load(key) or record
+            if record['expires_at'] - time.time() > self.refresh_ahead:
+                return record['access_token']
+            if not record.get('refresh_token'):
+                if record['expires_at'] > time.time():
+                    return record['access_token']
+                raise ValueError("OAuth session expired and has no refresh token, please authorize again")
+
+            refreshed = self.oauth_handler.refresh_access_token(record['refresh_token'])
+            record['access_token'] = refreshed['access_token']
+            record['expires_at'] = time.time() + float(
+                refreshed.get('expires_in') or DEFAULT_ACCESS_TOKEN_LIFETIME_SECONDS
+            )
+            # Google only sometimes rotates the refresh token
+            if refreshed.get('refresh_token'):
+                record['refresh_token'] = refreshed['refresh_token']
+            self.store.save(key, record)
+            print("DEBUG: Refreshed OAuth access token for session")
+            return record['access_token']
+
+    def get_sheets_generator(self, handle: str):
+        """Sheets generator for a session, reused until its token is refreshed"""
+        from .google_sheets_generator import GoogleSheetsGenerator
+
+        access_token = self.get_access_token(handle)
+        cache_key = (session_key(handle), access_token)
+        with self._clients_lock:
+            generator = self._clients.get(cache_key)
+            if generator is not None:
+                self._clients.move_to_end(cache_key)
+                return generator
+
+        # One quota bucket per session, kept across token refreshes
+        generator = GoogleSheetsGenerator(access_token=access_token, quota_user=cache_key[0][:16])
+        with self._clients_lock:
+            # Drop clients built for this session's previous token
+            for stale in [k for k in self._clients if k[0] == cache_key[0]]:
+                del self._clients[stale]
+            self._clients[cache_key] = generator
+            while len(self._clients) > MAX_CACHED_CLIENTS:
+                self._clients.popitem(last=False)
+        return generator
+
+    def revoke_session(self, handle: str) -> bool:
+        """Forget a session and its cached clients"""
+        key = session_key(handle)
+        with self._clients_lock:
+            for stale in [k for k in self._clients if k[0] == key]:
+                del self._clients[stale]
+        return self.store.delete(key)
+
+    def purge_expired(self) -> int:
+        """Drop sessions past their lifetime; returns sessions removed"""
+        return self.store.purge_expired(time.time())
+
+
+_session_manager: Optional[OAuthSessionManager] = None
+_session_manager_lock = threading.Lock()
+
+
+def get_oauth_sessions() -> OAuthSessionManager:
+    """Process-wide session manager, backend chosen by OAUTH_TOKEN_STORE"""
+    global _session_manager
+    with _session_manager_lock:
+        if _session_manager is None:
+            backend = os.getenv('OAUTH_TOKEN_STORE', 'sqlite').lower()
+            if backend not in TOKEN_STORE_BACKENDS:
+                raise ValueError(f"Unknown OAUTH_TOKEN_STORE '{backend}', expected one of {sorted(TOKEN_STORE_BACKENDS)}")
+            _session_manager = OAuthSessionManager(TOKEN_STORE_BACKENDS[backend]())
+        return _session_manager
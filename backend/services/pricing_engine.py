@@ -0,0 +1,264 @@
+"""
+Pricing Engine
+The one implementation of line totals, scope subtotals, discount, GST and
+final totals, shared by the professional PDF, /export-excel (plain and
+template workbooks) and the Google Sheets text export.
+
+Amounts are computed on columnar NumPy arrays in integer cents (hours in
+thousandths), so there is no float drift and a whole portfolio of SOWs is
+priced in one vectorized pass (quote_many). Inputs are converted and outputs
+returned through Decimal, rounding half up to the cent.
+
+Rules:
+  - A line's amount is its explicit total/amount/cost, else hours x rate
+  - Percentage discounts are validated: not a number, negative or >= 100%
+    means no discount; above MAX_DISCOUNT_PERCENT is capped
+  - Fixed discounts are capped at the subtotal
+  - GST is GST_PERCENT of the discounted subtotal
+  - An authoritative total (inc. GST) is split into GST and the pre-GST
+    amount, the discount being the difference from the subtotal; when that
+    discount would be negative or exceed the subtotal it is ignored
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+GST_PERCENT = 10
+MAX_DISCOUNT_PERCENT = Decimal('50')
+
+CENTS = Decimal('0.01')
+MILLI = Decimal('0.001')
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    """Finite Decimal from an int, float, Decimal or numeric string; None otherwise"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        # Same value as 1/0 (they share a hash, so must convert alike)
+        value = int(value)
+    try:
+        number = value if isinstance(value, Decimal) else Decimal(str(value).strip())
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    return number if number.is_finite() else None
+
+
+def _scaled_present(values: Sequence[Any], quantum: Decimal):
+    """
+    (int64 values in units of quantum, rounded half up; bool mask of the ones present)
+    Each distinct value goes through Decimal once: hours and rates repeat
+    across a portfolio, so the exact conversion is a dict lookup per line
+    """
+    scale = Decimal(1) / quantum
+    try:
+        distinct = set(values)
+    except TypeError:
+        # Unhashable values (lists, dicts) are not numbers
+        values = [value if isinstance(value, (int, float, str, Decimal)) else None for value in values]
+        distinct = set(values)
+    if distinct <= {None, ''}:
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+    units: Dict[Any, int] = {}
+    present: Dict[Any, bool] = {}
+    for value in distinct:
+        number = _decimal(value)
+        units[value] = int((number * scale).quantize(Decimal(1), rounding=ROUND_HALF_UP)) if number is not None else 0
+        present[value] = number is not None
+    return (
+        np.fromiter(map(units.__getitem__, values), dtype=np.int64, count=len(values)),
+        np.fromiter(map(present.__getitem__, values), dtype=bool, count=len(values)),
+    )
+
+
+def _scaled(values: Sequence[Any], quantum: Decimal) -> np.ndarray:
+    return _scaled_present(values, quantum)[0]
+
+
+def to_cents(values: Sequence[Any]) -> np.ndarray:
+    """int64 cents, rounded half up; missing or non-numeric values are 0"""
+    return _scaled(values, CENTS)
+
+
+def from_cents(cents: Any) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _div_half_up(numerator: np.ndarray, denominator: int) -> np.ndarray:
+    """numerator / denominator rounded half up, in integers"""
+    return (numerator * 2 + denominator) // (denominator * 2)
+
+
+def validate_discount_percent(value: Any) -> Decimal:
+    """Percentage discount after validation (see module rules)"""
+    percent = _decimal(value)
+    if percent is None or percent < 0 or percent >= 100:
+        return Decimal('0')
+    return min(percent, MAX_DISCOUNT_PERCENT)
+
+
+def line_cents(hours: np.ndarray, rate_cents: np.ndarray, amount_cents: np.ndarray,
+               has_amount: np.ndarray) -> np.ndarray:
+    """
+    Line amounts in cents
+    hours are in thousandths; explicit amounts win over hours x rate
+    """
+    return np.where(has_amount, amount_cents, _div_half_up(hours * rate_cents, 1000))
+
+
+def group_sums(values: np.ndarray, groups: np.ndarray, size: int) -> np.ndarray:
+    """
+    int64 sum of values per group index (0..size-1)
+    bincount sums in float64, exact for totals below 2**53 cents
+    """
+    return np.rint(np.bincount(groups, weights=values, minlength=size)).astype(np.int64)
+
+
+def price_batch(lines: np.ndarray, quote_ids: np.ndarray, n_quotes: int,
+                discount_basis_points: np.ndarray, fixed_discount_cents: np.ndarray,
+                has_fixed_discount: np.ndarray, authoritative_cents: np.ndarray,
+                has_authoritative: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized totals for many quotes; every array is int64 cents unless noted
+
+    Args:
+        lines: line amounts, one per line
+        quote_ids: quote index (0..n_quotes-1) of each line
+        discount_basis_points: validated percentage discount x 100, per quote
+        fixed_discount_cents / has_fixed_discount: fixed discounts (bool mask)
+        authoritative_cents / has_authoritative: totals inc. GST that win (bool mask)
+
+    Returns:
+        subtotal, discount, after_discount, gst and total per quote
+    """
+    subtotal = group_sums(lines, quote_ids, n_quotes)
+    priced = np.maximum(subtotal, 0)
+
+    discount = np.where(
+        has_fixed_discount,
+        np.minimum(np.maximum(fixed_discount_cents, 0), priced),
+        _div_half_up(priced * discount_basis_points, 10000),
+    )
+    after_discount = subtotal - discount
+    gst = _div_half_up(after_discount * GST_PERCENT, 100)
+    total = after_discount + gst
+
+    # Authoritative totals: pre-GST = total x 100 / (100 + GST), GST the rest
+    authoritative_after = _div_half_up(authoritative_cents * 100, 100 + GST_PERCENT)
+    implied_discount = subtotal - authoritative_after
+    use_authoritative = has_authoritative & (implied_discount >= 0) & (implied_discount <= priced)
+
+    return {
+        'subtotal': subtotal,
+        'discount': np.where(use_authoritative, implied_discount, discount),
+        'after_discount': np.where(use_authoritative, authoritative_after, after_discount),
+        'gst': np.where(use_authoritative, authoritative_cents - authoritative_after, gst),
+        'total': np.where(use_authoritative, authoritative_cents, total),
+        'authoritative': use_authoritative,
+    }
+
+
+def _discount_terms(discount: Any):
+    """(basis points, fixed cents or None) from a percent or {'type', 'value'}"""
+    if isinstance(discount, dict):
+        value = _decimal(discount.get('value'))
+        if discount.get('type') == 'fixed':
+            return 0, int((value or 0).quantize(CENTS, rounding=ROUND_HALF_UP) * 100) if value and value > 0 else None
+        if discount.get('type') != 'percentage':
+            return 0, None
+        discount = discount.get('value')
+    return int(validate_discount_percent(discount) * 100), None
+
+
+def quote_many(quotes: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Price many SOWs in one vectorized pass
+
+    Args:
+        quotes: [{'rows': [{'hours', 'rate', 'total'|'amount'|'cost', 'scope'}],
+                  'discount': percent or {'type': 'percentage'|'fixed', 'value'},
+                  'authoritative_total': total inc. GST or None}]
+
+    Returns:
+        Per quote, in order: Decimal subtotal, discount, discount_percent
+        (effective), after_discount, gst, total, total_hours, the line amounts
+        ('lines') and {scope: subtotal} ('scopes')
+    """
+    rows = [row for quote in quotes for row in quote.get('rows') or []]
+    counts = np.array([len(quote.get('rows') or []) for quote in quotes], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts))).tolist()
+    quote_ids = np.repeat(np.arange(len(quotes), dtype=np.int64), counts)
+
+    hours = _scaled([row.get('hours') for row in rows], MILLI)
+    # Explicit amount: the first valid of total, amount, cost
+    amounts, has_amount = _scaled_present([row.get('total') for row in rows], CENTS)
+    for key in ('amount', 'cost'):
+        fallback, has_fallback = _scaled_present([row.get(key) for row in rows], CENTS)
+        use = has_fallback & ~has_amount
+        amounts, has_amount = np.where(use, fallback, amounts), has_amount | use
+    lines = line_cents(hours, to_cents([row.get('rate') for row in rows]), amounts, has_amount)
+
+    terms = [_discount_terms(quote.get('discount')) for quote in quotes]
+    basis_points = [points for points, _ in terms]
+    has_fixed = [fixed_cents is not None for _, fixed_cents in terms]
+    authoritative, has_authoritative = _scaled_present([quote.get('authoritative_total') for quote in quotes], CENTS)
+    totals = {
+        key: array.tolist()
+        for key, array in price_batch(
+            lines, quote_ids, len(quotes),
+            np.array(basis_points, dtype=np.int64),
+            np.array([fixed_cents or 0 for _, fixed_cents in terms], dtype=np.int64),
+            np.array(has_fixed, dtype=bool),
+            authoritative, has_authoritative,
+        ).items()
+    }
+    hours_sums = group_sums(hours, quote_ids, len(quotes)).tolist()
+
+    # Scope subtotals: scopes coded in order of first appearance, then one
+    # dense index over the (quote, scope) pairs present
+    scopes = [row.get('scope') for row in rows]
+    scope_names = list(dict.fromkeys(scopes))
+    scope_codes = {scope: code for code, scope in enumerate(scope_names)}
+    pairs = quote_ids * max(len(scope_names), 1) + np.fromiter(
+        map(scope_codes.__getitem__, scopes), dtype=np.int64, count=len(scopes)
+    )
+    pair_keys, pair_ids = np.unique(pairs, return_inverse=True)
+    scope_sums = group_sums(lines, pair_ids.reshape(-1), len(pair_keys)).tolist()
+
+    line_values = lines.tolist()
+    decimals = {amount: from_cents(amount) for amount in set(line_values)}
+    line_decimals = list(map(decimals.__getitem__, line_values))
+
+    results = []
+    for i in range(len(quotes)):
+        subtotal, discount = totals['subtotal'][i], totals['discount'][i]
+        if subtotal <= 0:
+            discount_percent = Decimal('0')
+        elif has_fixed[i] or totals['authoritative'][i]:
+            discount_percent = (Decimal(discount) * 100 / Decimal(subtotal)).quantize(CENTS)
+        else:
+            discount_percent = Decimal(basis_points[i]).scaleb(-2)
+        results.append({
+            'subtotal': from_cents(subtotal),
+            'discount': from_cents(discount),
+            'after_discount': from_cents(totals['after_discount'][i]),
+            'gst': from_cents(totals['gst'][i]),
+            'total': from_cents(totals['total'][i]),
+            'discount_percent': discount_percent,
+            'authoritative': totals['authoritative'][i],
+            'total_hours': Decimal(hours_sums[i]).scaleb(-3),
+            'lines': line_decimals[offsets[i]:offsets[i + 1]],
+            'scopes': {},
+        })
+    width = max(len(scope_names), 1)
+    for pair, amount in zip(pair_keys.tolist(), scope_sums):
+        results[pair // width]['scopes'][scope_names[pair % width]] = from_cents(amount)
+    return results
+
+
+def quote_rows(rows: Sequence[Dict[str, Any]], discount: Any = None,
+               authoritative_total: Any = None) -> Dict[str, Any]:
+    """Price one SOW's rows; see quote_many for the row, discount and result shapes"""
+    return quote_many([{'rows': rows, 'discount': discount, 'authoritative_total': authoritative_total}])[0]
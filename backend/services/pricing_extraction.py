@@ -0,0 +1,254 @@
+"""
+Pricing Extraction
+The one place SOW totals are read out of TipTap documents, shared by the
+backfill scripts and the backend's PDF and Excel paths.
+
+Stored JSON strings are never fully parsed: a regex locates each
+editablePricingTable's "type" key, a backward scan finds the brace opening
+that node, and raw_decode decodes just that subtree, at any nesting depth.
+Decoded documents are walked with an explicit stack instead of recursion.
+Amounts are Decimal throughout.
+
+Also the SQL both backfill scripts share: the batched sows.total_investment
+update and the (updated_at, id) watermark kept in pricing_backfill_state
+(database/migrations/add-pricing-backfill-state.sql) for incremental runs.
+
+No package-relative imports: scripts/ load this file directly (see
+scripts/extract-pricing.py), and backfill process pools pickle its functions.
+"""
+
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+PRICING_TABLE_TYPE = 'editablePricingTable'
+PRICING_TABLE_MARKER = re.compile(r'"type"\s*:\s*"editablePricingTable"')
+
+CENTS = Decimal('0.01')
+
+# SOWs the backfills price: an idx_pricing_investment seek
+# (database/migrations/add-pricing-table-flag.sql), not a LIKE over content
+HAS_PRICING_TABLE = "has_pricing_table = 1"
+UNPRICED_SOWS = f"{HAS_PRICING_TABLE} AND total_investment = 0"
+
+_decoder = json.JSONDecoder()
+
+
+def _string_start(text: str, end: int) -> int:
+    """Index of the quote opening the JSON string whose closing quote is at end"""
+    i = text.rfind('"', 0, end)
+    while i >= 0:
+        backslashes = 0
+        while i - backslashes - 1 >= 0 and text[i - backslashes - 1] == '\\':
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return i
+        i = text.rfind('"', 0, i)
+    return -1
+
+
+def _enclosing_object_start(text: str, pos: int) -> int:
+    """Index of the '{' opening the object that contains pos, or -1"""
+    depth = 0
+    i = pos - 1
+    while i >= 0:
+        char = text[i]
+        if char == '"':
+            i = _string_start(text, i)
+            if i < 0:
+                return -1
+        elif char in '}]':
+            depth += 1
+        elif char in '{[':
+            if depth == 0:
+                return i if char == '{' else -1
+            depth -= 1
+        i -= 1
+    return -1
+
+
+def iter_pricing_tables(content: Optional[str]) -> Iterator[Dict[str, Any]]:
+    """Decoded editablePricingTable nodes of a TipTap JSON string, in document order"""
+    if not content or PRICING_TABLE_TYPE not in content:
+        return
+    for match in PRICING_TABLE_MARKER.finditer(content):
+        start = _enclosing_object_start(content, match.start())
+        if start < 0:
+            continue
+        try:
+            node, _ = _decoder.raw_decode(content, start)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(node, dict) and node.get('type') == PRICING_TABLE_TYPE:
+            yield node
+
+
+def pricing_table_rows(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = (node.get('attrs') or {}).get('rows') or []
+    return [row for row in rows if isinstance(row, dict)]
+
+
+def iter_pricing_nodes(document: Any) -> Iterator[Dict[str, Any]]:
+    """editablePricingTable nodes of a decoded TipTap tree at any depth, in document order"""
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            if node.get('type') == PRICING_TABLE_TYPE:
+                yield node
+            elif node.get('content'):
+                stack.append(node['content'])
+
+
+def to_decimal(value: Any) -> Decimal:
+    """Editor numbers (int, float or numeric string) as Decimal; anything else is 0"""
+    if isinstance(value, bool) or value is None:
+        return Decimal('0')
+    try:
+        number = Decimal(value.strip() if isinstance(value, str) else str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        return Decimal('0')
+    return number if number.is_finite() else Decimal('0')
+
+
+def is_total_row(row: Dict[str, Any]) -> bool:
+    return 'total' in str(row.get('role') or '').lower()
+
+
+def price_table(node: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Priced rows and amount of one pricing table, by the frontend's rule
+    (lib/export-utils.ts): rows with a role, hours > 0 and rate > 0, skipping
+    Total/Subtotal rows; a row's own total wins over hours x rate
+
+    A table with no priced rows is worth its TOTAL row, whose hours cell
+    holds the amount (the backfill scripts' rule): 'amount' is the subtotal,
+    or that stated total when nothing is priced
+    """
+    rows = []
+    stated_total = None
+    for row in pricing_table_rows(node):
+        role = str(row.get('role') or '').strip()
+        if not role:
+            continue
+        hours, rate = to_decimal(row.get('hours')), to_decimal(row.get('rate'))
+        if is_total_row(row):
+            # The editor's TOTAL row keeps the amount in its hours cell
+            if stated_total is None and hours > 0:
+                stated_total = hours
+            continue
+        if hours > 0 and rate > 0:
+            total = to_decimal(row.get('total')) or hours * rate
+            rows.append({'role': role, 'hours': hours, 'rate': rate, 'total': total})
+    subtotal = sum((row['total'] for row in rows), Decimal('0'))
+    return {
+        'rows': rows,
+        'subtotal': subtotal,
+        'stated_total': stated_total,
+        'amount': subtotal if rows else stated_total or Decimal('0'),
+    }
+
+
+def document_pricing(content: Any) -> Dict[str, Any]:
+    """
+    Per-table and document totals (Decimal, excl. GST and discounts)
+
+    Args:
+        content: TipTap document, either the stored JSON string (only pricing
+            table subtrees are decoded) or an already decoded dict
+
+    Returns:
+        {'tables': [price_table(...) per table], 'total': sum of table amounts}
+    """
+    nodes = iter_pricing_tables(content) if isinstance(content, str) else iter_pricing_nodes(content)
+    tables = [price_table(node) for node in nodes]
+    return {'tables': tables, 'total': sum((table['amount'] for table in tables), Decimal('0'))}
+
+
+def document_total(content: Any) -> Optional[Decimal]:
+    """Document total rounded to cents, or None when it comes to nothing"""
+    total = document_pricing(content)['total']
+    return total.quantize(CENTS) if total > 0 else None
+
+
+def export_pricing_rows(content: Any) -> List[Dict[str, float]]:
+    """Priced rows of every table, in the /export-excel pricingRows shape"""
+    return [
+        {key: row[key] if key == 'role' else float(row[key]) for key in ('role', 'hours', 'rate', 'total')}
+        for table in document_pricing(content)['tables']
+        for row in table['rows']
+    ]
+
+
+def bulk_total_update(updates: List[Tuple[str, Any]],
+                      columns: Tuple[str, ...] = ('total_investment', 'pricing_total')) -> Tuple[str, List[Any]]:
+    """
+    (sql, params) setting each of `columns` to the extracted total for many ids
+    in one UPDATE ... CASE
+    updated_at is assigned to itself so ON UPDATE CURRENT_TIMESTAMP does not
+    fire: a backfill write is not an edit, and must not move rows past the
+    incremental watermark
+    """
+    cases = " ".join(["WHEN %s THEN %s"] * len(updates))
+    placeholders = ", ".join(["%s"] * len(updates))
+    params = [value for _ in columns for sow_id, total in updates for value in (sow_id, total)]
+    params.extend(sow_id for sow_id, _ in updates)
+    assignments = ", ".join(f"{column} = CASE id {cases} END" for column in columns)
+    return (
+        f"UPDATE sows SET {assignments}, updated_at = updated_at WHERE id IN ({placeholders})",
+        params,
+    )
+
+
+def load_watermark(cursor, job: str) -> Tuple[Optional[Any], str]:
+    """(updated_at, id) of the last SOW the job committed; (None, '') before its first run"""
+    cursor.execute(
+        "SELECT last_updated_at, last_id FROM pricing_backfill_state WHERE job = %s", (job,)
+    )
+    row = cursor.fetchone()
+    if not row:
+        return None, ''
+    if isinstance(row, dict):
+        return row['last_updated_at'], row['last_id'] or ''
+    return row[0], row[1] or ''
+
+
+def save_watermark(cursor, job: str, updated_at: Any, sow_id: str, scanned: int):
+    """Advance the job's watermark; run in the same transaction as the chunk's update"""
+    cursor.execute(
+        "INSERT INTO pricing_backfill_state (job, last_updated_at, last_id, rows_scanned) "
+        "VALUES (%s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE last_updated_at = VALUES(last_updated_at), "
+        "last_id = VALUES(last_id), rows_scanned = rows_scanned + VALUES(rows_scanned)",
+        (job, updated_at, sow_id, scanned),
+    )
+
+
+def changed_sows_query(watermark: Tuple[Optional[Any], str], limit: int) -> Tuple[str, List[Any]]:
+    """
+    (sql, params) for the next chunk of SOWs with a pricing table edited after
+    the watermark, in (updated_at, id) order; a keyset seek on
+    idx_updated_at_id, so each chunk costs its own rows, not a rescan of the
+    table. SOWs already priced are included: an edit can change the total
+    """
+    columns = "SELECT id, title, content, updated_at FROM sows"
+    pending = f"{HAS_PRICING_TABLE} ORDER BY updated_at, id LIMIT %s"
+    updated_at, last_id = watermark
+    if updated_at is None:
+        return f"{columns} WHERE {pending}", [limit]
+    return (
+        f"{columns} WHERE (updated_at > %s OR (updated_at = %s AND id > %s)) AND {pending}",
+        [updated_at, updated_at, last_id, limit],
+    )
+
+
+def parallel_map(fn: Callable[[Any], Any], items: List[Any], pool: Optional[ProcessPoolExecutor] = None,
+                 workers: int = 1) -> List[Any]:
+    """fn over items, in order, on a process pool of `workers` (inline without one)"""
+    if pool is None or len(items) < 2:
+        return [fn(item) for item in items]
+    return list(pool.map(fn, items, chunksize=max(1, len(items) // (workers * 4))))
@@ -0,0 +1,244 @@
+"""
+Rate Card Index
+The global rate card (rate_card_roles, served by the frontend at
+/api/rate-card) held in memory and keyed by normalized role name, so export
+line items are validated and priced server-side at a dict lookup per row.
+
+Role names are matched exactly after normalization (case, punctuation and
+spacing ignored). A miss looks up the closest rate card role (difflib,
+memoized per name) for the report only: a near-miss like "Junior Account
+Manager" vs "Senior Account Manager" is a different role, so only exact
+matches are ever repriced. Each index carries a version, a hash of its roles and
+rates. The index is refetched after RATE_CARD_TTL_SECONDS, or on the next
+use after /rate-card/invalidate (called by the frontend when the rate card
+is edited); a refetch with an unchanged version keeps the current index.
+"""
+
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from .pricing_extraction import is_total_row, to_decimal
+
+DEFAULT_RATE_CARD_URL = 'http://localhost:3001/api/rate-card'
+DEFAULT_RATE_CARD_TTL_SECONDS = 300
+DEFAULT_FUZZY_CUTOFF = 0.85
+# After a failed fetch, a stale index is kept and the fetch retried this much later
+FETCH_RETRY_SECONDS = 30
+MAX_FUZZY_MATCH_ENTRIES = 4096
+
+CENTS = Decimal('0.01')
+
+
+def normalize_role(name: Any) -> str:
+    """Lowercase alphanumerics separated by single spaces; '&' reads as 'and'"""
+    text = unicodedata.normalize('NFKC', str(name or '')).lower().replace('&', ' and ')
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def rate_card_version(roles: Dict[str, Tuple[str, Decimal]]) -> str:
+    """Content hash of a rate card: same roles and rates, same version"""
+    canonical = json.dumps(sorted((name, str(rate)) for name, rate in roles.values()), separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+class RateCardIndex:
+    """Normalized role name -> (rate card role name, hourly rate)"""
+
+    def __init__(self, roles: Iterable[Dict[str, Any]], fuzzy_cutoff: float = DEFAULT_FUZZY_CUTOFF):
+        self.roles: Dict[str, Tuple[str, Decimal]] = {}
+        for role in roles:
+            # /api/rate-card rows, or rate_card_roles columns
+            name = str(role.get('roleName') or role.get('role_name') or '').strip()
+            rate = to_decimal(role.get('hourlyRate', role.get('hourly_rate')))
+            if name and rate > 0 and normalize_role(name):
+                self.roles[normalize_role(name)] = (name, rate.quantize(CENTS, rounding=ROUND_HALF_UP))
+        self.version = rate_card_version(self.roles)
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._keys = list(self.roles)
+        # Normalized name -> normalized rate card key, or None for no match
+        self._fuzzy_matches: Dict[str, Optional[str]] = {}
+        self._fuzzy_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.roles)
+
+    def match(self, role: Any) -> Optional[Tuple[str, Decimal, bool]]:
+        """(rate card role name, hourly rate, exact match) for a line item's role, None when not on the card"""
+        key = normalize_role(role)
+        if not key:
+            return None
+        if key in self.roles:
+            name, rate = self.roles[key]
+            return name, rate, True
+
+        with self._fuzzy_lock:
+            if key in self._fuzzy_matches:
+                matched = self._fuzzy_matches[key]
+            else:
+                close = difflib.get_close_matches(key, self._keys, n=1, cutoff=self.fuzzy_cutoff)
+                matched = close[0] if close else None
+                if len(self._fuzzy_matches) >= MAX_FUZZY_MATCH_ENTRIES:
+                    del self._fuzzy_matches[next(iter(self._fuzzy_matches))]
+                self._fuzzy_matches[key] = matched
+        if matched is None:
+            return None
+        name, rate = self.roles[matched]
+        return name, rate, False
+
+    def price_rows(self, rows: Iterable[Dict[str, Any]], reprice: bool = False) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Validate line items against the rate card
+
+        Rows carry a role and hours, plus a 'rate' (pricing rows) and/or a
+        'cost' (SOW items). A rate other than the card's, or a cost other than
+        hours x the card's rate, is reported; with reprice they are replaced,
+        and an adjusted 'total' based on the old rate is dropped. Roles not on
+        the card (the closest role is named in the report, never used for
+        pricing), blank roles and TOTAL rows are left as sent.
+
+        Returns:
+            (rows, issues): copies of the rows, one message per problem found
+        """
+        priced, issues = [], []
+        for row in rows:
+            row = dict(row)
+            priced.append(row)
+            role = str(row.get('role') or '').strip()
+            if not role or is_total_row(row):
+                continue
+            found = self.match(role)
+            if found is None:
+                issues.append(f"{role}: not on the rate card")
+                continue
+            name, card_rate, exact = found
+            if not exact:
+                issues.append(f"{role}: not on the rate card (closest: '{name}' at {card_rate})")
+                continue
+            hours = to_decimal(row.get('hours'))
+            expected_cost = (hours * card_rate).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+            mismatches = []
+            if 'rate' in row:
+                if to_decimal(row.get('rate')).quantize(CENTS, rounding=ROUND_HALF_UP) != card_rate:
+                    mismatches.append(f"rate {row.get('rate')} != {card_rate}")
+            if 'cost' in row:
+                if to_decimal(row.get('cost')).quantize(CENTS, rounding=ROUND_HALF_UP) != expected_cost:
+                    mismatches.append(f"cost {row.get('cost')} != {hours} x {card_rate}")
+            if not mismatches:
+                continue
+            issues.append(f"{role}: {', '.join(mismatches)}")
+            if reprice:
+                if 'rate' in row:
+                    row['rate'] = float(card_rate)
+                    if row.get('total') is not None:
+                        row['total'] = None
+                if 'cost' in row:
+                    row['cost'] = float(expected_cost)
+        return priced, issues
+
+
+def fetch_rate_card_roles() -> List[Dict[str, Any]]:
+    """Active rate card roles from the frontend's /api/rate-card"""
+    url = os.getenv('RATE_CARD_URL', DEFAULT_RATE_CARD_URL)
+    response = requests.get(url, timeout=(3, 10))
+    response.raise_for_status()
+    body = response.json()
+    if not body.get('success'):
+        raise Exception(f"Rate card fetch failed: {body.get('error') or body}")
+    return body.get('data') or []
+
+
+class RateCardCache:
+    """The current RateCardIndex, refetched when stale or invalidated"""
+
+    def __init__(self, loader=fetch_rate_card_roles):
+        self.loader = loader
+        self.ttl = float(os.getenv('RATE_CARD_TTL_SECONDS', DEFAULT_RATE_CARD_TTL_SECONDS))
+        self.fuzzy_cutoff = float(os.getenv('RATE_CARD_FUZZY_CUTOFF', DEFAULT_FUZZY_CUTOFF))
+        self._index: Optional[RateCardIndex] = None
+        self._loaded_at = 0.0
+        self._refresh_at = 0.0
+        # One fetch at a time, outside the lock; invalidations during it are counted
+        self._refreshing = False
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[RateCardIndex]:
+        """
+        Current index; None if the rate card has never loaded
+        A stale index is refetched by the first caller, while everyone else is
+        served the index held (None before the first load completes)
+        """
+        with self._lock:
+            if self._refreshing or time.monotonic() < self._refresh_at:
+                return self._index
+            self._refreshing = True
+            invalidations = self._invalidations
+
+        try:
+            index = RateCardIndex(self.loader(), self.fuzzy_cutoff)
+        except Exception as e:
+            with self._lock:
+                print(f"⚠️ Rate card unavailable ({e}); "
+                      f"{'keeping version ' + self._index.version if self._index else 'line items not validated'}")
+                self._refresh_at = time.monotonic() + min(self.ttl, FETCH_RETRY_SECONDS)
+                self._refreshing = False
+                return self._index
+
+        with self._lock:
+            if self._index is None or index.version != self._index.version:
+                # Unchanged versions keep the old index and its fuzzy matches
+                print(f"💳 Rate card version {index.version}: {len(index)} roles")
+                self._index = index
+            now = time.monotonic()
+            self._loaded_at = now
+            # Invalidated mid-fetch: what was fetched may predate the edit
+            self._refresh_at = now + self.ttl if invalidations == self._invalidations else 0.0
+            self._refreshing = False
+            return self._index
+
+    def invalidate(self, version: Optional[str] = None) -> bool:
+        """Refetch on next use, unless the given version is the one held"""
+        with self._lock:
+            if version and self._index is not None and self._index.version == version:
+                return False
+            self._refresh_at = 0.0
+            self._invalidations += 1
+            return True
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'version': self._index.version if self._index else None,
+                'roles': len(self._index) if self._index else 0,
+                'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._index else None,
+                'fuzzy_matches_cached': len(self._index._fuzzy_matches) if self._index else 0,
+            }
+
+
+def reprice_enabled() -> bool:
+    """RATE_CARD_REPRICE=true replaces rates that disagree with the rate card; by default they are only reported"""
+    return os.getenv('RATE_CARD_REPRICE', 'false').lower() == 'true'
+
+
+_rate_card_cache: Optional[RateCardCache] = None
+_rate_card_lock = threading.Lock()
+
+
+def get_rate_card_cache() -> RateCardCache:
+    """Process-wide rate card cache"""
+    global _rate_card_cache
+    with _rate_card_lock:
+        if _rate_card_cache is None:
+            _rate_card_cache = RateCardCache()
+        return _rate_card_cache
@@ -0,0 +1,244 @@
+"""
+Request Decompression
+ASGI middleware accepting gzip (and zstd, when the zstandard package is
+installed) compressed request bodies, so the frontend can upload large
+html_content / TipTap payloads at a fraction of their size. Bodies are
+inflated incrementally under a hard output cap, so a decompression bomb is
+rejected with 413 after at most the cap has been produced.
+"""
+
+import json
+import os
+import threading
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_MAX_DECOMPRESSED_BYTES = 50 * 1024 * 1024
+ZSTD_SLICE_BYTES = 256
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class InvalidEncoding(Exception):
+    pass
+
+
+class GzipDecoder:
+    """Streaming gzip inflate; concatenated members are supported"""
+
+    def __init__(self):
+        self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._mid_member = False
+
+    def feed(self, data: bytes, limit: int) -> bytes:
+        """Inflate a chunk, producing at most limit + 1 bytes"""
+        out = []
+        produced = 0
+        try:
+            while data:
+                self._mid_member = True
+                piece = self._inflater.decompress(data, limit + 1 - produced)
+                out.append(piece)
+                produced += len(piece)
+                if produced > limit:
+                    raise BodyTooLarge()
+                if self._inflater.eof:
+                    data = self._inflater.unused_data
+                    self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    self._mid_member = False
+                else:
+                    data = self._inflater.unconsumed_tail
+        except zlib.error as e:
+            raise InvalidEncoding(f"Invalid gzip body: {e}")
+        return b"".join(out)
+
+    def finish(self, limit: int) -> bytes:
+        if self._mid_member:
+            raise InvalidEncoding("Truncated gzip body")
+        return b""
+
+
+class ZstdDecoder:
+    """
+    Streaming zstd inflate; concatenated frames are supported
+    zstandard returns everything an input chunk inflates to at once, so input
+    goes in small slices: a slice inflates to at most ZSTD_SLICE_BYTES / 4
+    RLE blocks of 128 KiB, which bounds how far past the cap we can get
+    """
+
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._inflater = self._decompressor.decompressobj()
+        self._mid_frame = False
+
+    def feed(self, data: bytes, limit: int) -> bytes:
+        out = []
+        produced = 0
+        try:
+            for start in range(0, len(data), ZSTD_SLICE_BYTES):
+                piece_in = data[start:start + ZSTD_SLICE_BYTES]
+                while piece_in:
+                    self._mid_frame = True
+                    piece = self._inflater.decompress(piece_in)
+                    out.append(piece)
+                    produced += len(piece)
+                    if produced > limit:
+                        raise BodyTooLarge()
+                    if self._inflater.eof:
+                        piece_in = self._inflater.unused_data
+                        self._inflater = self._decompressor.decompressobj()
+                        self._mid_frame = False
+                    else:
+                        piece_in = b""
+        except zstandard.ZstdError as e:
+            raise InvalidEncoding(f"Invalid zstd body: {e}")
+        return b"".join(out)
+
+    def finish(self, limit: int) -> bytes:
+        if self._mid_frame:
+            raise InvalidEncoding("Truncated zstd body")
+        return b""
+
+
+DECODERS: Dict[str, Callable[[], Any]] = {"gzip": GzipDecoder, "x-gzip": GzipDecoder}
+if zstandard is not None:
+    DECODERS["zstd"] = ZstdDecoder
+
+
+class DecompressionMetrics:
+    """Per-encoding byte counts and rejections, for /metrics/request-decompression"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encodings: Dict[str, Dict[str, int]] = {}
+        self._rejected = {"too_large": 0, "invalid": 0, "unsupported": 0}
+
+    def record(self, encoding: str, compressed: int, decompressed: int):
+        with self._lock:
+            stats = self._encodings.setdefault(encoding, {"requests": 0, "compressed_bytes": 0, "decompressed_bytes": 0})
+            stats["requests"] += 1
+            stats["compressed_bytes"] += compressed
+            stats["decompressed_bytes"] += decompressed
+
+    def reject(self, reason: str):
+        with self._lock:
+            self._rejected[reason] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            encodings = {name: dict(stats) for name, stats in self._encodings.items()}
+            rejected = dict(self._rejected)
+        for stats in encodings.values():
+            stats["compression_ratio"] = round(stats["decompressed_bytes"] / max(stats["compressed_bytes"], 1), 2)
+        return {"supported": sorted(DECODERS), "encodings": encodings, "rejected": rejected}
+
+
+_metrics = DecompressionMetrics()
+
+
+def get_decompression_metrics() -> DecompressionMetrics:
+    return _metrics
+
+
+class RequestDecompressionMiddleware:
+    """
+    Inflate Content-Encoding request bodies before the app reads them
+    400 for corrupt data, 413 past the cap (REQUEST_MAX_DECOMPRESSED_BYTES),
+    415 for encodings we cannot decode; uncompressed requests pass through
+    """
+
+    def __init__(self, app, max_body_bytes: Optional[int] = None):
+        self.app = app
+        self.max_body_bytes = max_body_bytes or int(
+            os.getenv("REQUEST_MAX_DECOMPRESSED_BYTES", DEFAULT_MAX_DECOMPRESSED_BYTES)
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = headers.get(b"content-encoding", b"").decode("latin-1").strip().lower()
+        if encoding in ("", "identity"):
+            await self.app(scope, receive, send)
+            return
+
+        if encoding not in DECODERS:
+            _metrics.reject("unsupported")
+            await self._error(send, 415, f"Unsupported Content-Encoding '{encoding}', expected one of {sorted(DECODERS)}")
+            return
+
+        try:
+            compressed, body = await self._read_body(receive, DECODERS[encoding]())
+        except BodyTooLarge:
+            _metrics.reject("too_large")
+            await self._error(send, 413, f"Decompressed request body exceeds {self.max_body_bytes} bytes")
+            return
+        except InvalidEncoding as e:
+            _metrics.reject("invalid")
+            await self._error(send, 400, str(e))
+            return
+
+        _metrics.record(encoding, compressed, len(body))
+        print(f"DEBUG: Inflated {encoding} request body {compressed} -> {len(body)} bytes")
+
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ] + [(b"content-length", str(len(body)).encode())]
+
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Later receives wait for the disconnect as usual
+            return await receive()
+
+        await self.app(scope, replay, send)
+
+    async def _read_body(self, receive, decoder):
+        """(compressed size, inflated body), inflating each chunk as it arrives"""
+        out = []
+        compressed = 0
+        produced = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise InvalidEncoding("Client disconnected mid-body")
+            chunk = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not chunk:
+                continue
+            compressed += len(chunk)
+            if compressed > self.max_body_bytes:
+                raise BodyTooLarge()
+            piece = decoder.feed(chunk, self.max_body_bytes - produced)
+            out.append(piece)
+            produced += len(piece)
+        tail = decoder.finish(self.max_body_bytes - produced)
+        out.append(tail)
+        return compressed, b"".join(out)
+
+    @staticmethod
+    async def _error(send, status: int, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
@@ -0,0 +1,205 @@
+"""
+Sheet Export Store
+Persistent SQLite state for Google Sheets exports, so repeated exports of an
+unchanged SOW can be answered without any Google API traffic and revisions
+can be synced as a diff against what was last written
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_STORE_PATH = '/tmp/sheet_exports.sqlite3'
+DEFAULT_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+
+def sow_content_hash(client_name: str, service_name: str, sow_data: Dict[str, Any], export_mode: str = '') -> str:
+    """
+    Canonical hash of an export: key order and whitespace don't matter
+    export_mode (build, upload or template:<template id>) is part of it, since
+    the same SOW exported another way is a different sheet
+    """
+    canonical = json.dumps(
+        {'client_name': client_name, 'service_name': service_name, 'sow_data': sow_data, 'export_mode': export_mode},
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class SheetExportStore:
+    """Small SQLite wrapper shared by the export state tables"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('SHEET_EXPORT_STORE_PATH', DEFAULT_STORE_PATH)
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived transaction per operation; SQLite handles cross-thread locking"""
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    self.create_schema(conn)
+                    conn.commit()
+                    self._schema_ready = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create_schema(self, conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sheet_export_cache (
+                owner TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                sheet_id TEXT NOT NULL,
+                sheet_url TEXT NOT NULL,
+                share_link TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (owner, content_hash)
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sheet_export_cache_sheet ON sheet_export_cache (sheet_id)')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sheet_snapshots (
+                sheet_id TEXT PRIMARY KEY,
+                mode TEXT NOT NULL,
+                sections TEXT NOT NULL,
+                cell_values TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+
+class SheetExportCache:
+    """Content-hash -> existing sheet mapping with TTL and invalidation"""
+
+    def __init__(self, store: SheetExportStore, ttl_seconds: Optional[float] = None):
+        self.store = store
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.getenv('SHEET_EXPORT_CACHE_TTL_SECONDS', DEFAULT_CACHE_TTL_SECONDS)
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def lookup(self, owner: str, content_hash: str) -> Optional[Dict[str, str]]:
+        """Previously exported sheet for this content, if still fresh"""
+        if not self.enabled:
+            return None
+        with self.store.connect() as conn:
+            row = conn.execute(
+                'SELECT sheet_id, sheet_url, share_link, created_at FROM sheet_export_cache '
+                'WHERE owner = ? AND content_hash = ?',
+                (owner, content_hash),
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row['created_at'] > self.ttl_seconds:
+                conn.execute(
+                    'DELETE FROM sheet_export_cache WHERE owner = ? AND content_hash = ?',
+                    (owner, content_hash),
+                )
+                return None
+            return {'sheet_id': row['sheet_id'], 'sheet_url': row['sheet_url'], 'share_link': row['share_link']}
+
+    def store_result(self, owner: str, content_hash: str, result: Dict[str, str]):
+        """Remember the sheet created for this content"""
+        if not self.enabled:
+            return
+        with self.store.connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sheet_export_cache '
+                '(owner, content_hash, sheet_id, sheet_url, share_link, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (owner, content_hash, result['sheet_id'], result['sheet_url'], result['share_link'], time.time()),
+            )
+
+    def invalidate(self, sheet_id: str) -> int:
+        """Forget every cached export pointing at a sheet; returns entries removed"""
+        with self.store.connect() as conn:
+            return conn.execute('DELETE FROM sheet_export_cache WHERE sheet_id = ?', (sheet_id,)).rowcount
+
+    def purge_expired(self) -> int:
+        """Drop entries older than the TTL; returns entries removed"""
+        with self.store.connect() as conn:
+            return conn.execute(
+                'DELETE FROM sheet_export_cache WHERE created_at < ?',
+                (time.time() - self.ttl_seconds,),
+            ).rowcount
+
+
+class SheetSnapshotStore:
+    """Last values written to each sheet, keyed by A1 or named range"""
+
+    def __init__(self, store: SheetExportStore):
+        self.store = store
+
+    def load(self, sheet_id: str) -> Optional[Dict[str, Any]]:
+        with self.store.connect() as conn:
+            row = conn.execute(
+                'SELECT mode, sections, cell_values FROM sheet_snapshots WHERE sheet_id = ?',
+                (sheet_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'mode': row['mode'],
+            'sections': json.loads(row['sections']),
+            'values': json.loads(row['cell_values']),
+        }
+
+    def save(self, sheet_id: str, mode: str, sections: List[str], values: Dict[str, Any]):
+        with self.store.connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sheet_snapshots (sheet_id, mode, sections, cell_values, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (sheet_id, mode, json.dumps(sections), json.dumps(values, default=str), time.time()),
+            )
+
+
+_export_store: Optional[SheetExportStore] = None
+_export_cache: Optional[SheetExportCache] = None
+_snapshot_store: Optional[SheetSnapshotStore] = None
+_store_lock = threading.Lock()
+
+
+def get_export_store() -> SheetExportStore:
+    """Process-wide export state store"""
+    global _export_store
+    with _store_lock:
+        if _export_store is None:
+            _export_store = SheetExportStore()
+        return _export_store
+
+
+def get_export_cache() -> SheetExportCache:
+    """Process-wide export dedupe cache"""
+    global _export_cache
+    store = get_export_store()
+    with _store_lock:
+        if _export_cache is None:
+            _export_cache = SheetExportCache(store)
+        return _export_cache
+
+
+def get_snapshot_store() -> SheetSnapshotStore:
+    """Process-wide store of last-written sheet values"""
+    global _snapshot_store
+    store = get_export_store()
+    with _store_lock:
+        if _snapshot_store is None:
+            _snapshot_store = SheetSnapshotStore(store)
+        return _snapshot_store
@@ -0,0 +1,123 @@
+from decimal import Decimal
+
+import pytest
+
+from services.pricing_engine import MAX_DISCOUNT_PERCENT, quote_many, quote_rows
+
+ROWS = [
+    {'role': 'Build', 'hours': 10, 'rate': 100, 'scope': 'A'},
+    {'role': 'Design', 'hours': '5', 'rate': '120', 'scope': 'B'},
+    {'role': 'PM', 'hours': 2, 'rate': 150, 'total': 250, 'scope': 'A'},
+]
+
+
+def test_lines_subtotal_and_scopes():
+    quote = quote_rows(ROWS)
+    assert quote['lines'] == [Decimal('1000.00'), Decimal('600.00'), Decimal('250.00')]
+    assert quote['subtotal'] == Decimal('1850.00')
+    assert quote['scopes'] == {'A': Decimal('1250.00'), 'B': Decimal('600.00')}
+    assert quote['total_hours'] == Decimal('17.000')
+
+
+def test_explicit_amount_precedence():
+    quote = quote_rows([
+        {'hours': 1, 'rate': 100, 'amount': 80, 'cost': 70},
+        {'hours': 1, 'rate': 100, 'cost': 70},
+        {'hours': 1, 'rate': 100, 'total': 'n/a', 'cost': 60},
+    ])
+    assert quote['lines'] == [Decimal('80.00'), Decimal('70.00'), Decimal('60.00')]
+
+
+class TestDiscount:
+    def test_percentage(self):
+        quote = quote_rows(ROWS, discount={'type': 'percentage', 'value': '10'})
+        assert quote['discount'] == Decimal('185.00')
+        assert quote['discount_percent'] == Decimal('10.00')
+        assert quote['after_discount'] == Decimal('1665.00')
+
+    def test_bare_number_is_a_percentage(self):
+        assert quote_rows(ROWS, discount=10)['discount'] == Decimal('185.00')
+
+    def test_percentage_capped_at_max(self):
+        quote = quote_rows(ROWS, discount={'type': 'percentage', 'value': 60})
+        assert quote['discount_percent'] == MAX_DISCOUNT_PERCENT
+        assert quote['discount'] == Decimal('925.00')
+
+    @pytest.mark.parametrize('value', [100, 150, -5, 'abc', None])
+    def test_invalid_percentage_means_no_discount(self, value):
+        quote = quote_rows(ROWS, discount={'type': 'percentage', 'value': value})
+        assert quote['discount'] == Decimal('0.00')
+        assert quote['total'] == Decimal('2035.00')
+
+    def test_fixed(self):
+        quote = quote_rows(ROWS, discount={'type': 'fixed', 'value': 370})
+        assert quote['discount'] == Decimal('370.00')
+        assert quote['discount_percent'] == Decimal('20.00')
+
+    def test_fixed_capped_at_subtotal(self):
+        quote = quote_rows(ROWS, discount={'type': 'fixed', 'value': 5000})
+        assert quote['discount'] == Decimal('1850.00')
+        assert quote['after_discount'] == Decimal('0.00')
+        assert quote['total'] == Decimal('0.00')
+
+    @pytest.mark.parametrize('discount', [{'type': 'fixed', 'value': -50}, {'type': 'other', 'value': 10}])
+    def test_ignored_discounts(self, discount):
+        assert quote_rows(ROWS, discount=discount)['discount'] == Decimal('0.00')
+
+
+class TestGST:
+    def test_gst_on_discounted_subtotal(self):
+        quote = quote_rows(ROWS, discount=10)
+        assert quote['gst'] == Decimal('166.50')
+        assert quote['total'] == Decimal('1831.50')
+
+    def test_authoritative_total_splits_gst(self):
+        quote = quote_rows(ROWS, authoritative_total='1980.00')
+        assert quote['authoritative']
+        assert quote['total'] == Decimal('1980.00')
+        assert quote['after_discount'] == Decimal('1800.00')
+        assert quote['gst'] == Decimal('180.00')
+        assert quote['discount'] == Decimal('50.00')
+
+    @pytest.mark.parametrize('authoritative', [
+        3000,  # above subtotal + GST: negative implied discount
+        -110,  # implied discount larger than the subtotal
+        'n/a',
+    ])
+    def test_invalid_authoritative_total_is_ignored(self, authoritative):
+        quote = quote_rows(ROWS, discount=10, authoritative_total=authoritative)
+        assert not quote['authoritative']
+        assert quote['total'] == Decimal('1831.50')
+
+
+class TestRounding:
+    def test_line_rounds_half_up(self):
+        # 0.5 h x $0.01 = $0.005
+        assert quote_rows([{'hours': '0.5', 'rate': '0.01'}])['lines'] == [Decimal('0.01')]
+
+    def test_inputs_round_half_up_to_the_cent(self):
+        quote = quote_rows([{'hours': 1, 'rate': '0.125'}, {'total': '2.675'}])
+        assert quote['lines'] == [Decimal('0.13'), Decimal('2.68')]
+
+    def test_discount_and_gst_round_half_up(self):
+        # 10% of $0.05 and 10% GST on $0.05 are both $0.005
+        assert quote_rows([{'total': '0.05'}], discount=10)['discount'] == Decimal('0.01')
+        assert quote_rows([{'total': '0.05'}])['gst'] == Decimal('0.01')
+
+    def test_no_float_drift(self):
+        quote = quote_rows([{'hours': '0.1', 'rate': 1}] * 3)
+        assert quote['subtotal'] == Decimal('0.30')
+
+
+def test_quote_many_matches_quote_rows():
+    quotes = [
+        {'rows': ROWS, 'discount': {'type': 'percentage', 'value': 15}},
+        {'rows': [], 'discount': 10},
+        {'rows': ROWS[:1], 'discount': {'type': 'fixed', 'value': 2000}},
+        {'rows': [dict(row, scope='C') for row in ROWS], 'authoritative_total': 1980},
+        {'rows': [{'hours': '0.5', 'rate': '0.01', 'scope': 'A'}], 'authoritative_total': 5000},
+    ]
+    batch = quote_many(quotes)
+    assert len(batch) == len(quotes)
+    for quote, result in zip(quotes, batch):
+        assert result == quote_rows(quote['rows'], quote.get('discount'), quote.get('authoritative_total'))
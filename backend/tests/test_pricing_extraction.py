@@ -0,0 +1,219 @@
+import json
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from services.pricing_extraction import (
+    PRICING_TABLE_TYPE,
+    _enclosing_object_start,
+    _string_start,
+    changed_sows_query,
+    document_pricing,
+    document_total,
+    export_pricing_rows,
+    iter_pricing_nodes,
+    iter_pricing_tables,
+    price_table,
+    to_decimal,
+)
+
+
+def table(*rows):
+    return {'type': PRICING_TABLE_TYPE, 'attrs': {'rows': list(rows)}}
+
+
+def paragraph(text):
+    return {'type': 'paragraph', 'content': [{'type': 'text', 'text': text}]}
+
+
+def doc(*nodes):
+    return {'type': 'doc', 'content': list(nodes)}
+
+
+NESTED = doc(
+    paragraph('Intro'),
+    {'type': 'columns', 'content': [
+        {'type': 'column', 'content': [table({'role': 'Design', 'hours': 2, 'rate': 100})]},
+    ]},
+    table({'role': 'Build', 'hours': 3, 'rate': 200}),
+)
+
+
+@pytest.fixture(params=['decoded', 'string'])
+def as_content(request):
+    """document_pricing takes either a decoded tree or the stored JSON string"""
+    return (lambda document: document) if request.param == 'decoded' else json.dumps
+
+
+def roles(pricing):
+    return [row['role'] for t in pricing['tables'] for row in t['rows']]
+
+
+class TestScanner:
+    def test_string_start_skips_escaped_quotes(self):
+        text = '{"text": "say \\"hi\\""}'
+        end = len(text) - 2
+        assert text[_string_start(text, end)] == '"'
+        assert _string_start(text, end) == text.index('"say')
+
+    def test_string_start_counts_backslash_runs(self):
+        # \\" is an escaped backslash then a real closing quote
+        text = '["a\\\\", "b"]'
+        end = text.index('", "b"')
+        assert _string_start(text, end) == 1
+
+    def test_string_start_without_opening_quote(self):
+        assert _string_start('abc"', 3) == -1
+
+    def test_enclosing_object_start_skips_siblings_and_strings(self):
+        text = '{"a": [1, {"b": "}{"}], "c": {"d": 2}, "e": 3}'
+        assert _enclosing_object_start(text, text.index('"e"')) == 0
+        assert _enclosing_object_start(text, text.index('"d"')) == text.index('{"d"')
+
+    def test_enclosing_object_start_inside_array_is_not_an_object(self):
+        text = '[1, 2, "x"]'
+        assert _enclosing_object_start(text, text.index('"x"')) == -1
+
+
+class TestTables:
+    def test_nested_tables_in_document_order(self, as_content):
+        assert roles(document_pricing(as_content(NESTED))) == ['Design', 'Build']
+
+    def test_walker_and_scanner_agree(self):
+        assert list(iter_pricing_tables(json.dumps(NESTED))) == list(iter_pricing_nodes(NESTED))
+
+    def test_escaped_quotes_and_braces_in_text(self, as_content):
+        document = doc(
+            paragraph('a "quoted" {brace} and } ] [ {'),
+            paragraph('"type": "editablePricingTable"'),
+            table({'role': 'Strategy "lead" {x}', 'hours': 1, 'rate': 150}),
+        )
+        pricing = document_pricing(as_content(document))
+        assert roles(pricing) == ['Strategy "lead" {x}']
+        assert pricing['total'] == Decimal('150')
+
+    def test_malformed_trailing_json_keeps_earlier_tables(self):
+        content = json.dumps(NESTED)
+        truncated = content[:content.rindex('"Build"')]
+        assert [row['role'] for node in iter_pricing_tables(truncated) for row in node['attrs']['rows']] == ['Design']
+
+    def test_no_table(self, as_content):
+        pricing = document_pricing(as_content(doc(paragraph('no pricing'))))
+        assert pricing == {'tables': [], 'total': Decimal('0')}
+        assert document_total(as_content(doc(paragraph('no pricing')))) is None
+
+    def test_empty_content(self):
+        assert list(iter_pricing_tables(None)) == []
+        assert list(iter_pricing_tables('')) == []
+
+
+class TestPricing:
+    def test_total_rows_are_skipped_and_stated(self):
+        priced = price_table(table(
+            {'role': 'Build', 'hours': 10, 'rate': 100},
+            {'role': 'Subtotal', 'hours': 0, 'rate': 0},
+            {'role': 'TOTAL', 'hours': 1000, 'rate': 0},
+        ))
+        assert [row['role'] for row in priced['rows']] == ['Build']
+        assert priced['subtotal'] == Decimal('1000')
+        assert priced['stated_total'] == Decimal('1000')
+        # Priced rows win over the stated TOTAL
+        assert priced['amount'] == Decimal('1000')
+
+    def test_table_priced_only_by_its_total_row(self, as_content):
+        document = doc(
+            table({'role': 'Build', 'hours': 0, 'rate': 0}, {'role': 'TOTAL', 'hours': '4500', 'rate': 0}),
+            table({'role': 'Design', 'hours': 2, 'rate': 100}, {'role': 'TOTAL', 'hours': 9999, 'rate': 0}),
+        )
+        pricing = document_pricing(as_content(document))
+        assert [t['amount'] for t in pricing['tables']] == [Decimal('4500'), Decimal('200')]
+        assert pricing['total'] == Decimal('4700')
+        assert document_total(as_content(document)) == Decimal('4700.00')
+
+    def test_numeric_strings(self):
+        priced = price_table(table({'role': 'PM', 'hours': ' 2.5 ', 'rate': '200.10'}))
+        assert priced['rows'][0]['hours'] == Decimal('2.5')
+        assert priced['subtotal'] == Decimal('500.250')
+
+    def test_rows_without_role_hours_or_rate_are_skipped(self):
+        priced = price_table(table(
+            {'role': '', 'hours': 1, 'rate': 100},
+            {'role': 'Idle', 'hours': 0, 'rate': 100},
+            {'role': 'Free', 'hours': 1, 'rate': 0},
+            {'role': 'Bad', 'hours': 'n/a', 'rate': 100},
+            'not a row',
+        ))
+        assert priced['rows'] == []
+        assert priced['subtotal'] == Decimal('0')
+        # An unpriced line item is not a TOTAL row
+        assert priced['stated_total'] is None
+        assert priced['amount'] == Decimal('0')
+
+    def test_row_total_wins_over_hours_times_rate(self):
+        priced = price_table(table({'role': 'Build', 'hours': 10, 'rate': 100, 'total': '900'}))
+        assert priced['subtotal'] == Decimal('900')
+
+    def test_decimal_sums_have_no_float_artefacts(self, as_content):
+        document = doc(*[table({'role': 'Copy', 'hours': '0.1', 'rate': 1}) for _ in range(3)])
+        assert document_pricing(as_content(document))['total'] == Decimal('0.3')
+
+    def test_per_table_subtotals_and_document_total(self, as_content):
+        pricing = document_pricing(as_content(NESTED))
+        assert [t['subtotal'] for t in pricing['tables']] == [Decimal('200'), Decimal('600')]
+        assert pricing['total'] == Decimal('800')
+        assert document_total(as_content(NESTED)) == Decimal('800.00')
+
+    def test_document_total_rounds_to_cents(self):
+        document = doc(table({'role': 'PM', 'hours': '1.333', 'rate': '1.5'}))
+        assert document_total(document) == Decimal('2.00')
+
+    def test_export_pricing_rows(self):
+        assert export_pricing_rows(NESTED) == [
+            {'role': 'Design', 'hours': 2.0, 'rate': 100.0, 'total': 200.0},
+            {'role': 'Build', 'hours': 3.0, 'rate': 200.0, 'total': 600.0},
+        ]
+
+    @pytest.mark.parametrize('value, expected', [
+        (True, Decimal('0')),
+        (None, Decimal('0')),
+        ('abc', Decimal('0')),
+        ('NaN', Decimal('0')),
+        (float('inf'), Decimal('0')),
+        (0.1, Decimal('0.1')),
+        (' 12 ', Decimal('12')),
+    ])
+    def test_to_decimal(self, value, expected):
+        assert to_decimal(value) == expected
+
+
+class TestIncremental:
+    @pytest.fixture
+    def sows(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute("""
+            CREATE TABLE sows (id TEXT PRIMARY KEY, title TEXT, content TEXT, updated_at TEXT,
+                               total_investment NUMERIC DEFAULT 0, has_pricing_table INTEGER)
+        """)
+        conn.executemany("INSERT INTO sows VALUES (?, ?, '{}', ?, ?, ?)", [
+            ('a', 'old', '2025-01-01', 0, 1),
+            ('b', 'edited, already priced', '2025-03-01', 500, 1),
+            ('c', 'edited, unpriced', '2025-03-01', 0, 1),
+            ('d', 'edited, no pricing table', '2025-03-02', 0, 0),
+        ])
+        yield conn
+        conn.close()
+
+    def ids(self, conn, watermark, limit=10):
+        sql, params = changed_sows_query(watermark, limit)
+        return [row[0] for row in conn.execute(sql.replace('%s', '?'), params)]
+
+    def test_first_run_visits_every_sow_with_a_pricing_table(self, sows):
+        assert self.ids(sows, (None, '')) == ['a', 'b', 'c']
+
+    def test_edited_sows_are_revisited_even_when_priced(self, sows):
+        assert self.ids(sows, ('2025-02-01', '')) == ['b', 'c']
+
+    def test_watermark_ties_break_on_id(self, sows):
+        assert self.ids(sows, ('2025-03-01', 'b')) == ['c']
+        assert self.ids(sows, ('2025-01-01', ''), limit=1) == ['a']
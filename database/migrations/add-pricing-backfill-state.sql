@@ -0,0 +1,22 @@
+-- Migration: Incremental pricing backfill watermark
+-- Purpose: Let scripts/extract-pricing.py --incremental process only SOWs
+--          edited since its last run, and resume after an interruption
+
+-- One row per backfill job: the (updated_at, id) of the last SOW committed.
+-- Written in the same transaction as each chunk's total_investment update.
+CREATE TABLE IF NOT EXISTS `pricing_backfill_state` (
+  `job` VARCHAR(64) PRIMARY KEY,
+  `last_updated_at` TIMESTAMP NULL,
+  `last_id` VARCHAR(255) NOT NULL DEFAULT '',
+  `rows_scanned` BIGINT NOT NULL DEFAULT 0,
+  `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Keyset index: each incremental chunk seeks past the watermark instead of
+-- scanning every SOW
+ALTER TABLE sows
+  ADD INDEX idx_updated_at_id (updated_at, id);
+
+-- Verify migration
+SELECT 'Migration complete! pricing_backfill_state created, idx_updated_at_id added' as status;
+SHOW INDEX FROM sows WHERE Key_name = 'idx_updated_at_id';
@@ -0,0 +1,25 @@
+-- Migration: Indexed pricing-table flag and extracted pricing total
+-- Purpose: Replace content LIKE '%editablePricingTable%' scans over
+--          sows.content (LONGTEXT, unindexable) with index seeks
+
+-- has_pricing_table: STORED generated column, so MySQL maintains it on every
+--   INSERT/UPDATE of content, and this ALTER backfills it for existing rows
+-- pricing_total: the TipTap pricing tables' total, written by
+--   PUT /api/sow/[id] and POST /api/sow/create alongside content;
+--   NULL until computed (see the backfill below)
+ALTER TABLE sows
+  ADD COLUMN has_pricing_table TINYINT(1)
+    AS (content LIKE '%editablePricingTable%') STORED AFTER total_investment,
+  ADD COLUMN pricing_total DECIMAL(12,2) NULL DEFAULT NULL AFTER has_pricing_table,
+  ADD INDEX idx_pricing_investment (has_pricing_table, total_investment);
+
+-- One-time backfill of pricing_total (totals are parsed in Python, not SQL):
+--   python3 scripts/extract-pricing.py --pricing-total
+
+-- Verify migration
+SELECT 'Migration complete! has_pricing_table, pricing_total and idx_pricing_investment added' as status;
+SELECT
+  COUNT(*) as total_sows,
+  SUM(has_pricing_table) as with_pricing_tables,
+  SUM(IF(has_pricing_table = 1 AND total_investment = 0, 1, 0)) as unpopulated_with_pricing
+FROM sows;
@@ -0,0 +1,99 @@
+-- Migration: Incrementally maintained dashboard aggregates
+-- Purpose: Dashboard totals and vertical / service line breakdowns read
+--          O(groups) rows from sow_aggregates instead of scanning sows
+-- Requires: add-pricing-table-flag.sql (pricing_total)
+--
+-- A SOW's value is the dashboard's (frontend/lib/db.ts SOW_VALUE_SQL):
+--   COALESCE(NULLIF(total_investment, 0), pricing_total, 0)
+-- Triggers keep the table in step with every insert, update and delete;
+-- scripts/reconcile-sow-aggregates.py rebuilds it and reports any drift.
+
+-- One row per (vertical, service_line, status); '' stands for NULL
+CREATE TABLE IF NOT EXISTS `sow_aggregates` (
+  `vertical` VARCHAR(64) NOT NULL DEFAULT '',
+  `service_line` VARCHAR(64) NOT NULL DEFAULT '',
+  `status` VARCHAR(32) NOT NULL DEFAULT '',
+  `sow_count` BIGINT NOT NULL DEFAULT 0,
+  `priced_count` BIGINT NOT NULL DEFAULT 0, -- SOWs with a value > 0
+  `total_value` DECIMAL(16,2) NOT NULL DEFAULT 0,
+  `updated_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`vertical`, `service_line`, `status`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Top-N SOWs by value becomes a backward index scan
+ALTER TABLE sows
+  ADD INDEX idx_total_investment (total_investment);
+
+DROP TRIGGER IF EXISTS sows_aggregates_insert;
+DROP TRIGGER IF EXISTS sows_aggregates_update;
+DROP TRIGGER IF EXISTS sows_aggregates_delete;
+
+DELIMITER //
+
+CREATE TRIGGER sows_aggregates_insert AFTER INSERT ON sows FOR EACH ROW
+BEGIN
+  DECLARE new_value DECIMAL(16,2) DEFAULT COALESCE(NULLIF(NEW.total_investment, 0), NEW.pricing_total, 0);
+  INSERT INTO sow_aggregates (vertical, service_line, status, sow_count, priced_count, total_value)
+  VALUES (COALESCE(NEW.vertical, ''), COALESCE(NEW.service_line, ''), COALESCE(NEW.status, ''),
+          1, IF(new_value > 0, 1, 0), new_value)
+  ON DUPLICATE KEY UPDATE
+    sow_count = sow_count + 1,
+    priced_count = priced_count + VALUES(priced_count),
+    total_value = total_value + VALUES(total_value);
+END//
+
+-- Content-only edits that leave the value and group unchanged do nothing
+CREATE TRIGGER sows_aggregates_update AFTER UPDATE ON sows FOR EACH ROW
+BEGIN
+  DECLARE old_value DECIMAL(16,2) DEFAULT COALESCE(NULLIF(OLD.total_investment, 0), OLD.pricing_total, 0);
+  DECLARE new_value DECIMAL(16,2) DEFAULT COALESCE(NULLIF(NEW.total_investment, 0), NEW.pricing_total, 0);
+  IF NOT (old_value = new_value
+          AND OLD.vertical <=> NEW.vertical
+          AND OLD.service_line <=> NEW.service_line
+          AND OLD.status <=> NEW.status) THEN
+    UPDATE sow_aggregates
+    SET sow_count = sow_count - 1,
+        priced_count = priced_count - IF(old_value > 0, 1, 0),
+        total_value = total_value - old_value
+    WHERE vertical = COALESCE(OLD.vertical, '')
+      AND service_line = COALESCE(OLD.service_line, '')
+      AND status = COALESCE(OLD.status, '');
+    INSERT INTO sow_aggregates (vertical, service_line, status, sow_count, priced_count, total_value)
+    VALUES (COALESCE(NEW.vertical, ''), COALESCE(NEW.service_line, ''), COALESCE(NEW.status, ''),
+            1, IF(new_value > 0, 1, 0), new_value)
+    ON DUPLICATE KEY UPDATE
+      sow_count = sow_count + 1,
+      priced_count = priced_count + VALUES(priced_count),
+      total_value = total_value + VALUES(total_value);
+  END IF;
+END//
+
+CREATE TRIGGER sows_aggregates_delete AFTER DELETE ON sows FOR EACH ROW
+BEGIN
+  DECLARE old_value DECIMAL(16,2) DEFAULT COALESCE(NULLIF(OLD.total_investment, 0), OLD.pricing_total, 0);
+  UPDATE sow_aggregates
+  SET sow_count = sow_count - 1,
+      priced_count = priced_count - IF(old_value > 0, 1, 0),
+      total_value = total_value - old_value
+  WHERE vertical = COALESCE(OLD.vertical, '')
+    AND service_line = COALESCE(OLD.service_line, '')
+    AND status = COALESCE(OLD.status, '');
+END//
+
+DELIMITER ;
+
+-- Initial fill (rerun scripts/reconcile-sow-aggregates.py if SOWs were
+-- written while this migration ran)
+DELETE FROM sow_aggregates;
+INSERT INTO sow_aggregates (vertical, service_line, status, sow_count, priced_count, total_value)
+SELECT
+  COALESCE(vertical, ''), COALESCE(service_line, ''), COALESCE(status, ''),
+  COUNT(*),
+  SUM(IF(COALESCE(NULLIF(total_investment, 0), pricing_total, 0) > 0, 1, 0)),
+  SUM(COALESCE(NULLIF(total_investment, 0), pricing_total, 0))
+FROM sows
+GROUP BY COALESCE(vertical, ''), COALESCE(service_line, ''), COALESCE(status, '');
+
+-- Verify migration
+SELECT 'Migration complete! sow_aggregates created and filled, triggers installed' as status;
+SELECT SUM(sow_count) as total_sows, SUM(total_value) as total_value, COUNT(*) as `groups` FROM sow_aggregates;
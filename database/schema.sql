@@ -36,6 +36,8 @@ CREATE TABLE sows (
   client_email VARCHAR(255),
   content LONGTEXT NOT NULL, -- Full SOW content (HTML or JSON)
   total_investment DECIMAL(12,2) DEFAULT 0, -- Allow NULL, default to 0
+  has_pricing_table TINYINT(1) AS (content LIKE '%editablePricingTable%') STORED, -- Maintained by MySQL
+  pricing_total DECIMAL(12,2) NULL, -- Pricing tables' total, written with content
   
   -- Status tracking
   status ENUM('draft', 'sent', 'viewed', 'accepted', 'declined') DEFAULT 'draft',
@@ -69,7 +71,10 @@ CREATE TABLE sows (
   INDEX idx_created_at (created_at),
   INDEX idx_expires_at (expires_at),
   INDEX idx_vertical (vertical),
-  INDEX idx_service_line (service_line)
+  INDEX idx_service_line (service_line),
+  INDEX idx_updated_at_id (updated_at, id), -- Incremental pricing backfill (keyset)
+  INDEX idx_pricing_investment (has_pricing_table, total_investment), -- Pricing backfill lookups
+  INDEX idx_total_investment (total_investment) -- Top SOWs by value
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ================================================================
@@ -367,9 +372,88 @@ CREATE TABLE IF NOT EXISTS sow_recommendations (
   INDEX idx_relevance_score (relevance_score)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- ================================================================
+-- Pricing Backfill State (scripts/extract-pricing.py --incremental)
+-- ================================================================
+CREATE TABLE IF NOT EXISTS pricing_backfill_state (
+  job VARCHAR(64) PRIMARY KEY,
+  last_updated_at TIMESTAMP NULL, -- Watermark: (updated_at, id) of the last SOW committed
+  last_id VARCHAR(255) NOT NULL DEFAULT '',
+  rows_scanned BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ================================================================
+-- Dashboard Aggregates (maintained by the sows triggers below)
+-- ================================================================
+CREATE TABLE IF NOT EXISTS sow_aggregates (
+  vertical VARCHAR(64) NOT NULL DEFAULT '', -- '' stands for NULL
+  service_line VARCHAR(64) NOT NULL DEFAULT '',
+  status VARCHAR(32) NOT NULL DEFAULT '',
+  sow_count BIGINT NOT NULL DEFAULT 0,
+  priced_count BIGINT NOT NULL DEFAULT 0, -- SOWs with a value > 0
+  total_value DECIMAL(16,2) NOT NULL DEFAULT 0, -- COALESCE(NULLIF(total_investment, 0), pricing_total, 0)
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (vertical, service_line, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DELIMITER //
+
+CREATE TRIGGER sows_aggregates_insert AFTER INSERT ON sows FOR EACH ROW
+BEGIN
+  DECLARE new_value DECIMAL(16,2) DEFAULT COALESCE(NULLIF(NEW.total_investment, 0), NEW.pricing_total, 0);
+  INSERT INTO sow_aggregates (vertical, service_line, status, sow_count, priced_count, total_value)
+  VALUES (COALESCE(NEW.vertical, ''), COALESCE(NEW.service_line, ''), COALESCE(NEW.status, ''),
+          1, IF(new_value > 0, 1, 0), new_value)
+  ON DUPLICATE KEY UPDATE
+    sow_count = sow_count + 1,
+    priced_count = priced_count + VALUES(priced_count),
+    total_value = total_value + VALUES(total_value);
+END//
+
+-- Content-only edits that leave the value and group unchanged do nothing
+CREATE TRIGGER sows_aggregates_update AFTER UPDATE ON sows FOR EACH ROW
+BEGIN
+  DECLARE old_value DECIMAL(16,2) DEFAULT COALESCE(NULLIF(OLD.total_investment, 0), OLD.pricing_total, 0);
+  DECLARE new_value DECIMAL(16,2) DEFAULT COALESCE(NULLIF(NEW.total_investment, 0), NEW.pricing_total, 0);
+  IF NOT (old_value = new_value
+          AND OLD.vertical <=> NEW.vertical
+          AND OLD.service_line <=> NEW.service_line
+          AND OLD.status <=> NEW.status) THEN
+    UPDATE sow_aggregates
+    SET sow_count = sow_count - 1,
+        priced_count = priced_count - IF(old_value > 0, 1, 0),
+        total_value = total_value - old_value
+    WHERE vertical = COALESCE(OLD.vertical, '')
+      AND service_line = COALESCE(OLD.service_line, '')
+      AND status = COALESCE(OLD.status, '');
+    INSERT INTO sow_aggregates (vertical, service_line, status, sow_count, priced_count, total_value)
+    VALUES (COALESCE(NEW.vertical, ''), COALESCE(NEW.service_line, ''), COALESCE(NEW.status, ''),
+            1, IF(new_value > 0, 1, 0), new_value)
+    ON DUPLICATE KEY UPDATE
+      sow_count = sow_count + 1,
+      priced_count = priced_count + VALUES(priced_count),
+      total_value = total_value + VALUES(total_value);
+  END IF;
+END//
+
+CREATE TRIGGER sows_aggregates_delete AFTER DELETE ON sows FOR EACH ROW
+BEGIN
+  DECLARE old_value DECIMAL(16,2) DEFAULT COALESCE(NULLIF(OLD.total_investment, 0), OLD.pricing_total, 0);
+  UPDATE sow_aggregates
+  SET sow_count = sow_count - 1,
+      priced_count = priced_count - IF(old_value > 0, 1, 0),
+      total_value = total_value - old_value
+  WHERE vertical = COALESCE(OLD.vertical, '')
+    AND service_line = COALESCE(OLD.service_line, '')
+    AND status = COALESCE(OLD.status, '');
+END//
+
+DELIMITER ;
+
 -- ================================================================
 -- Success Message
 -- ================================================================
 SELECT 'Database schema created successfully!' as status;
-SELECT 'Tables created: sows, sow_activities, sow_comments, sow_acceptances, sow_rejections, ai_conversations, service_catalog, sow_recommendations' as tables;
+SELECT 'Tables created: sows, sow_activities, sow_comments, sow_acceptances, sow_rejections, ai_conversations, service_catalog, sow_recommendations, pricing_backfill_state, sow_aggregates' as tables;
 SELECT 'View created: active_sows_dashboard' as views;
@@ -18,17 +18,20 @@ export async function GET() {
       avg_deal_size: number;
       win_rate: number;
     }>(
+      // sow_aggregates is maintained per (vertical, service_line, status)
+      // by triggers on sows, so this reads O(groups) rows
       `SELECT 
-        COALESCE(vertical, 'other') as vertical,
-        COUNT(*) as sow_count,
-        SUM(total_investment) as total_value,
-        AVG(total_investment) as avg_deal_size,
+        COALESCE(NULLIF(vertical, ''), 'other') as vertical,
+        SUM(sow_count) as sow_count,
+        SUM(total_value) as total_value,
+        SUM(total_value) / SUM(sow_count) as avg_deal_size,
         ROUND(
-          SUM(CASE WHEN status = 'accepted' THEN 1 ELSE 0 END) * 100.0 / COUNT(*),
+          SUM(CASE WHEN status = 'accepted' THEN sow_count ELSE 0 END) * 100.0 / SUM(sow_count),
           1
         ) as win_rate
-      FROM sows
-      GROUP BY vertical
+      FROM sow_aggregates
+      WHERE sow_count > 0
+      GROUP BY COALESCE(NULLIF(vertical, ''), 'other')
       ORDER BY total_value DESC`
     );
 
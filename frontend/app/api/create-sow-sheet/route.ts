@@ -1,4 +1,5 @@
 import { NextRequest, NextResponse } from 'next/server';
+import { OAUTH_SESSION_COOKIE } from '@/lib/oauth-session';
 
 const PDF_SERVICE_URL = process.env.NEXT_PUBLIC_PDF_SERVICE_URL || 'http://localhost:8000';
 
@@ -16,9 +17,11 @@ export async function POST(request: NextRequest) {
       pricing,
       assumptions,
       timeline,
-      accessToken,
     } = body;
 
+    // OAuth session handle from the httpOnly cookie set by /api/oauth/callback
+    const session = request.cookies.get(OAUTH_SESSION_COOKIE)?.value;
+
     // Validate required fields
     if (!clientName || !serviceName) {
       return NextResponse.json(
@@ -27,8 +30,8 @@ export async function POST(request: NextRequest) {
       );
     }
 
-    // Use OAuth endpoint if accessToken provided, otherwise use service account
-    const endpoint = accessToken ? '/create-sheet-oauth' : '/create-sheet';
+    // Use OAuth endpoint if the user authorized Google, otherwise use service account
+    const endpoint = session ? '/create-sheet-oauth' : '/create-sheet';
 
     // Call backend sheet creation service
     const controller = new AbortController();
@@ -47,9 +50,8 @@ export async function POST(request: NextRequest) {
         timeline: timeline || '',
       };
 
-      // Add OAuth token if provided
-      if (accessToken) {
-        payload.access_token = accessToken;
+      if (session) {
+        payload.session = session;
       }
 
       const response = await fetch(`${PDF_SERVICE_URL}${endpoint}`, {
@@ -0,0 +1,58 @@
+/**
+ * API Route: Dashboard Aggregates
+ * GET /api/dashboard/aggregates
+ * Returns SOW count and value per (vertical, service line, status) from
+ * sow_aggregates, which triggers keep current (database/migrations/add-sow-aggregates.sql),
+ * so the read costs O(groups) rather than a scan of every SOW
+ */
+
+import { NextResponse } from 'next/server';
+import { query } from '@/lib/db';
+
+interface AggregateRow {
+  vertical: string;
+  service_line: string;
+  status: string;
+  sow_count: number;
+  priced_count: number;
+  total_value: number;
+}
+
+export async function GET() {
+  try {
+    const rows = await query<AggregateRow>(
+      `SELECT
+        COALESCE(NULLIF(vertical, ''), 'other') as vertical,
+        COALESCE(NULLIF(service_line, ''), 'other') as service_line,
+        status,
+        sow_count,
+        priced_count,
+        total_value
+      FROM sow_aggregates
+      WHERE sow_count > 0`
+    );
+
+    const groups = rows.map((row) => ({
+      ...row,
+      sow_count: Number(row.sow_count),
+      priced_count: Number(row.priced_count),
+      total_value: Number(row.total_value),
+    }));
+
+    return NextResponse.json({
+      success: true,
+      groups,
+      totalSOWs: groups.reduce((sum, g) => sum + g.sow_count, 0),
+      pricedSOWs: groups.reduce((sum, g) => sum + g.priced_count, 0),
+      totalValue: groups.reduce((sum, g) => sum + g.total_value, 0),
+    }, {
+      headers: { 'Cache-Control': 'no-store' },
+    });
+  } catch (error) {
+    console.error('❌ [Dashboard/Aggregates] Error:', error);
+    return NextResponse.json(
+      { error: 'Failed to fetch dashboard aggregates', details: error instanceof Error ? error.message : 'Unknown error' },
+      { status: 500 }
+    );
+  }
+}
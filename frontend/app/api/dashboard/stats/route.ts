@@ -1,16 +1,19 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { query } from '@/lib/db';
+import { query, SOW_VALUE_SQL } from '@/lib/db';
 
 export async function GET(request: NextRequest) {
   try {
     console.log('📊 [API] /api/dashboard/stats - Fetching dashboard stats');
     
-    // Get basic stats
-    const sowCount = await query<any>('SELECT COUNT(*) as count FROM sows');
-    console.log('✅ [API] SOW count result:', sowCount);
-    
-    const totalValue = await query<any>('SELECT SUM(total_investment) as total FROM sows WHERE total_investment IS NOT NULL');
-    console.log('✅ [API] Total value result:', totalValue);
+    // Get basic stats from sow_aggregates (trigger-maintained, O(groups))
+    const totals = await query<any>(`
+      SELECT 
+        SUM(sow_count) as count,
+        SUM(total_value) as total,
+        SUM(CASE WHEN status IN ('draft', 'sent') THEN sow_count ELSE 0 END) as active
+      FROM sow_aggregates
+    `);
+    console.log('✅ [API] Aggregate totals result:', totals);
     
     // Get recent activity (last 5 SOWs)
     const recentActivity = await query<any>(`
@@ -18,7 +21,7 @@ export async function GET(request: NextRequest) {
         id,
         client_name as clientName,
         title as sowTitle,
-        total_investment as value,
+        ${SOW_VALUE_SQL} as value,
         created_at as date
       FROM sows
       ORDER BY created_at DESC
@@ -29,7 +32,7 @@ export async function GET(request: NextRequest) {
     const topClients = await query<any>(`
       SELECT 
         client_name as name,
-        SUM(total_investment) as totalValue,
+        SUM(${SOW_VALUE_SQL}) as totalValue,
         COUNT(*) as sowCount
       FROM sows
       WHERE client_name IS NOT NULL
@@ -38,13 +41,6 @@ export async function GET(request: NextRequest) {
       LIMIT 5
     `);
     
-    // Get active SOWs (status = 'draft' or 'sent')
-    const activeSOWsResult = await query<any>(`
-      SELECT COUNT(*) as count 
-      FROM sows 
-      WHERE status IN ('draft', 'sent')
-    `);
-    
     // Get this month's SOWs
     const thisMonthResult = await query<any>(`
       SELECT COUNT(*) as count 
@@ -53,8 +49,8 @@ export async function GET(request: NextRequest) {
     `);
     
     const result = {
-      totalSOWs: sowCount[0]?.count || 0,
-      totalValue: totalValue[0]?.total || 0,
+      totalSOWs: Number(totals[0]?.count) || 0,
+      totalValue: Number(totals[0]?.total) || 0,
       masterDashboard: 'sow-master-dashboard',
       recentActivity: recentActivity.map((activity: any) => ({
         id: activity.id,
@@ -69,7 +65,7 @@ export async function GET(request: NextRequest) {
         sowCount: client.sowCount || 0,
       })),
       popularServices: [], // TODO: Add services analysis from SOW content
-      activeSOWs: activeSOWsResult[0]?.count || 0,
+      activeSOWs: Number(totals[0]?.active) || 0,
       thisMonthSOWs: thisMonthResult[0]?.count || 0,
     };
     
@@ -10,7 +10,7 @@
  */
 
 import { NextRequest, NextResponse } from 'next/server';
-import { query } from '@/lib/db';
+import { query, SOW_VALUE_SQL } from '@/lib/db';
 
 interface SOW {
   id: string;
@@ -40,7 +40,7 @@ export async function GET(req: NextRequest) {
         id,
         title,
         client_name,
-        total_investment,
+        ${SOW_VALUE_SQL} as total_investment,
         status,
         created_at,
         updated_at
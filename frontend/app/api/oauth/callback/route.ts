@@ -1,4 +1,16 @@
 import { NextRequest, NextResponse } from 'next/server';
+import { OAUTH_SESSION_COOKIE } from '@/lib/oauth-session';
+
+function setSessionCookie(response: NextResponse, session: string, maxAge: number) {
+  response.cookies.set({
+    name: OAUTH_SESSION_COOKIE,
+    value: session,
+    httpOnly: true,
+    secure: process.env.NODE_ENV === 'production',
+    sameSite: 'lax',
+    maxAge,
+  });
+}
 
 export async function POST(request: NextRequest) {
   try {
@@ -31,11 +43,13 @@ export async function POST(request: NextRequest) {
 
     const data = await response.json();
 
-    // Return token to client
-    return NextResponse.json({
-      access_token: data.token,
-      expires_in: data.expires_in,
+    // Tokens stay on the backend; the session handle goes in the cookie only
+    const responseObj = NextResponse.json({
+      authorized: true,
+      expires_in: data.session_expires_in,
     });
+    setSessionCookie(responseObj, data.session, data.session_expires_in);
+    return responseObj;
   } catch (error) {
     console.error('OAuth callback error:', error);
     return NextResponse.json(
@@ -94,7 +108,7 @@ export async function GET(request: NextRequest) {
     const data = await response.json();
     console.log('✅ OAuth token received, redirecting to:', returnUrl);
 
-    // Redirect back to original page with token in URL
+    // Redirect back to original page, flagged as authorized
     const baseUrl = process.env.NEXT_PUBLIC_BASE_URL || 'http://localhost:3001';
     
     // Ensure returnUrl is relative (strip any full URL if present)
@@ -107,22 +121,13 @@ export async function GET(request: NextRequest) {
     }
     
     const redirectUrl = new URL(cleanReturnUrl, baseUrl);
-    redirectUrl.searchParams.set('oauth_token', data.token);
-    redirectUrl.searchParams.set('oauth_expires', data.expires_in || '3600');
+    redirectUrl.searchParams.set('oauth', 'connected');
     
     console.log('🔗 Final redirect URL:', redirectUrl.toString());
 
+    // The session handle outlives the access token: the backend refreshes it
     const responseObj = NextResponse.redirect(redirectUrl);
-    
-    // Also set secure HTTP-only cookie for token
-    responseObj.cookies.set({
-      name: 'oauth_access_token',
-      value: data.token,
-      httpOnly: true,
-      secure: process.env.NODE_ENV === 'production',
-      sameSite: 'lax',
-      maxAge: data.expires_in || 3600,
-    });
+    setSessionCookie(responseObj, data.session, data.session_expires_in);
 
     return responseObj;
   } catch (error) {
@@ -1,5 +1,6 @@
 import { NextRequest, NextResponse } from "next/server";
 import { query } from "@/lib/db";
+import { notifyRateCardChanged } from "@/lib/rate-card-sync";
 
 /**
  * PUT /api/rate-card/:id
@@ -78,6 +79,7 @@ export async function PUT(
              WHERE id = ?`,
             [roleName.trim(), hourlyRate, id],
         );
+        await notifyRateCardChanged();
 
         // Fetch the updated role
         const updatedRole = await query(
@@ -138,6 +140,7 @@ export async function DELETE(
              WHERE id = ?`,
             [id],
         );
+        await notifyRateCardChanged();
 
         return NextResponse.json({
             success: true,
@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from "next/server";
 import { query } from "@/lib/db";
 import { v4 as uuidv4 } from "uuid";
+import { notifyRateCardChanged } from "@/lib/rate-card-sync";
 
 /**
  * GET /api/rate-card
@@ -88,6 +89,7 @@ export async function POST(request: NextRequest) {
              VALUES (?, ?, ?, TRUE)`,
             [id, roleName.trim(), hourlyRate]
         );
+        await notifyRateCardChanged();
 
         // Fetch the newly created role
         const newRole = await query(
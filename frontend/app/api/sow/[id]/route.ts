@@ -159,6 +159,9 @@ export async function PUT(
       console.log(`💰 [SOW ${sowId}] Auto-calculated total_investment: ${calculatedInvestment}`);
       updates.push('total_investment = ?');
       values.push(calculatedInvestment);
+      // Kept with content so dashboards and backfills never parse it (add-pricing-table-flag.sql)
+      updates.push('pricing_total = ?');
+      values.push(calculatedInvestment);
     } else if (totalInvestment !== undefined) {
       // Only use the provided totalInvestment if content is not being updated
       updates.push('total_investment = ?');
@@ -209,13 +212,12 @@ export async function PUT(
         values
       );
     } catch (updateError: any) {
-      // Fallback: if columns don't exist yet, remove vertical/service_line from update
+      // Fallback: if columns don't exist yet, remove vertical/service_line/pricing_total from update
       if (updateError?.message?.includes('Unknown column')) {
         console.warn(' [SOW UPDATE] Phase 1A columns not ready, removing from update');
-        const fallbackUpdates = updates.filter(u => !u.includes('vertical') && !u.includes('service_line'));
-        const fallbackValues = values.slice(0, -1).filter((_, i) => 
-          !updates[i]?.includes('vertical') && !updates[i]?.includes('service_line')
-        );
+        const optional = (u: string) => u.includes('vertical') || u.includes('service_line') || u.includes('pricing_total');
+        const fallbackUpdates = updates.filter(u => !optional(u));
+        const fallbackValues = values.slice(0, -1).filter((_, i) => !optional(updates[i] || ''));
         fallbackValues.push(sowId);
         
         if (fallbackUpdates.length > 0) {
@@ -9,6 +9,7 @@ import { validatePricing, proposeAdjustments } from "@/lib/pricing-validation";
 import { validateMandatoryRoles } from "@/lib/mandatory-roles-enforcer";
 // import removed: enforceHeadOfRole is now a no-op
 import { extractPricingFromContent } from "@/lib/export-utils";
+import { calculateTotalInvestment } from "@/lib/sow-utils";
 
 /**
  * Extract pricing tables from TipTap JSON content
@@ -164,9 +165,9 @@ export async function POST(req: NextRequest) {
             try {
                 await query(
                     `INSERT INTO sows (
-            id, title, client_name, client_email, content, total_investment,
+            id, title, client_name, client_email, content, total_investment, pricing_total,
             status, workspace_slug, thread_slug, embed_id, folder_id, creator_email, expires_at, vertical, service_line, budget_limit
-          ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
+          ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)`,
                     [
                         sowId,
                         title,
@@ -174,6 +175,7 @@ export async function POST(req: NextRequest) {
                         clientEmail || null,
                         content,
                         totalInvestment || 0,
+                        calculateTotalInvestment(content), // 📊 pricing_total (add-pricing-table-flag.sql)
                         "draft",
                         workspaceSlug || null,
                         threadSlug || null,
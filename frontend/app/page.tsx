@@ -327,7 +327,6 @@ export default function Page() {
 
     // OAuth state for Google Sheets
     const [isOAuthAuthorized, setIsOAuthAuthorized] = useState(false);
-    const [oauthAccessToken, setOauthAccessToken] = useState<string>("");
 
     // Dashboard AI workspace selector state - Master dashboard is the default
     const [dashboardChatTarget, setDashboardChatTarget] = useState<string>(
@@ -360,7 +359,8 @@ export default function Page() {
     useEffect(() => {
         try {
             const params = new URLSearchParams(window.location.search);
-            const oauthToken = params.get("oauth_token");
+            // The session is an httpOnly cookie; the URL only flags it was set
+            const oauthConnected = params.get("oauth") === "connected";
             const error = params.get("oauth_error");
 
             if (error) {
@@ -374,9 +374,8 @@ export default function Page() {
                 return;
             }
 
-            if (oauthToken) {
-                console.log("\u2705 OAuth token received from callback");
-                setOauthAccessToken(oauthToken);
+            if (oauthConnected) {
+                console.log("\u2705 Google authorized via OAuth callback");
                 setIsOAuthAuthorized(true);
                 toast.success(
                     "\u2705 Google authorized! Will create GSheet once document loads...",
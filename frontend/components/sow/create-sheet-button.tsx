@@ -38,16 +38,16 @@ export function CreateSheetButton({
   const [sheetUrl, setSheetUrl] = useState<string>('');
   const [shareLink, setShareLink] = useState<string>('');
   const [isOAuthAuthorized, setIsOAuthAuthorized] = useState(false);
-  const [accessToken, setAccessToken] = useState<string>('');
 
   // Check for OAuth callback on mount
   useEffect(() => {
     const params = new URLSearchParams(window.location.search);
-    const oauthToken = params.get('oauth_token');
+    // The session itself is an httpOnly cookie; the URL only says it was set
+    const oauthConnected = params.get('oauth') === 'connected';
     const error = params.get('oauth_error');
 
-    console.log('🔍 Checking for OAuth token...');
-    console.log('URL params:', { oauthToken, error });
+    console.log('🔍 Checking for OAuth authorization...');
+    console.log('URL params:', { oauthConnected, error });
 
     if (error) {
       console.error('❌ OAuth error:', error);
@@ -57,16 +57,15 @@ export function CreateSheetButton({
       return;
     }
 
-    if (oauthToken) {
-      console.log('✅ OAuth token received from callback:', oauthToken);
-      setAccessToken(oauthToken);
+    if (oauthConnected) {
+      console.log('✅ Google authorized via OAuth callback');
       setIsOAuthAuthorized(true);
       toast.success('Google account authorized! Ready to create sheet.');
       
       // Clean up URL
       window.history.replaceState({}, document.title, window.location.pathname);
     } else {
-      console.log('⚠️ No oauth_token found in URL');
+      console.log('⚠️ No OAuth authorization found in URL');
     }
   }, []);
 
@@ -98,7 +97,7 @@ export function CreateSheetButton({
       return;
     }
 
-    if (!isOAuthAuthorized || !accessToken) {
+    if (!isOAuthAuthorized) {
       toast.error('Please authorize Google first');
       return;
     }
@@ -113,7 +112,6 @@ export function CreateSheetButton({
         body: JSON.stringify({
           clientName,
           serviceName,
-          accessToken,
           ...sowData,
         }),
       });
@@ -44,7 +44,7 @@ describe('calculateTotalInvestment', () => {
       expect(calculateTotalInvestment(content)).toBe(32000);
     });
 
-    test('uses first pricing table only (ignores subsequent tables)', () => {
+    test('sums every pricing table, like the backend backfill', () => {
       const content = JSON.stringify({
         type: 'doc',
         content: [
@@ -66,8 +66,43 @@ describe('calculateTotalInvestment', () => {
           }
         ]
       });
-      // Should be 10000 (first table), not 10000 + 40000
-      expect(calculateTotalInvestment(content)).toBe(10000);
+      // 10000 + 40000, as pricing_extraction.document_total sums them
+      expect(calculateTotalInvestment(content)).toBe(50000);
+    });
+
+    test("uses a row's own total over hours x rate", () => {
+      const content = JSON.stringify({
+        type: 'doc',
+        content: [{
+          type: 'editablePricingTable',
+          attrs: {
+            rows: [
+              { role: 'Designer', hours: 40, rate: 250, total: 9000 },
+              { role: 'Developer', hours: 10, rate: 300, total: '2500.50' },
+              { role: 'Project Manager', hours: 5, rate: 200 }
+            ]
+          }
+        }]
+      });
+      // 9000 + 2500.50 + 5*200 (no adjusted total) = 12500.50
+      expect(calculateTotalInvestment(content)).toBe(12500.5);
+    });
+
+    test('includes pricing tables nested in other nodes', () => {
+      const content = JSON.stringify({
+        type: 'doc',
+        content: [{
+          type: 'bulletList',
+          content: [{
+            type: 'listItem',
+            content: [{
+              type: 'editablePricingTable',
+              attrs: { rows: [{ role: 'Designer', hours: 4, rate: 250 }] }
+            }]
+          }]
+        }]
+      });
+      expect(calculateTotalInvestment(content)).toBe(1000);
     });
 
   });
@@ -108,6 +143,24 @@ describe('calculateTotalInvestment', () => {
       expect(calculateTotalInvestment(content)).toBe(10000);
     });
 
+    test('uses the total row hours when a table has no priced rows', () => {
+      const content = JSON.stringify({
+        type: 'doc',
+        content: [{
+          type: 'editablePricingTable',
+          attrs: {
+            rows: [
+              { role: 'Designer', hours: 0, rate: 0 },
+              { role: 'Unpriced line', hours: 12, rate: 0 },
+              { role: 'TOTAL', hours: 4500, rate: 0 }
+            ]
+          }
+        }]
+      });
+      // An unpriced line item is not the total row
+      expect(calculateTotalInvestment(content)).toBe(4500);
+    });
+
     test('excludes rows with zero or negative rates', () => {
       const content = JSON.stringify({
         type: 'doc',
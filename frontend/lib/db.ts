@@ -150,6 +150,13 @@ export function formatDateForMySQL(date: Date): string {
     return date.toISOString().slice(0, 19).replace("T", " ");
 }
 
+/**
+ * A SOW's dashboard value: total_investment, or the pricing tables' total
+ * kept in pricing_total when no investment has been recorded yet
+ * (database/migrations/add-pricing-table-flag.sql)
+ */
+export const SOW_VALUE_SQL = "COALESCE(NULLIF(total_investment, 0), pricing_total, 0)";
+
 // Types for database operations
 export interface SOW {
     id: string;
@@ -158,6 +165,8 @@ export interface SOW {
     client_email: string | null;
     content: string;
     total_investment: number;
+    has_pricing_table: number;
+    pricing_total: number | null;
     status: "draft" | "sent" | "viewed" | "accepted" | "declined";
     workspace_slug: string | null;
     embed_id: string | null;
@@ -0,0 +1,6 @@
+/**
+ * Google OAuth session handle from the PDF service, held only in an httpOnly
+ * cookie: it is long-lived, so it never goes into URLs (history, Referer) or
+ * client JS.
+ */
+export const OAUTH_SESSION_COOKIE = 'oauth_session';
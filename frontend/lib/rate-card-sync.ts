@@ -0,0 +1,17 @@
+/**
+ * Tell the PDF service the rate card changed, so its in-memory rate card
+ * (used to validate and reprice export line items) is refetched on the next
+ * export. Best effort: the service also refetches on its own TTL.
+ */
+export async function notifyRateCardChanged(): Promise<void> {
+    const PDF_SERVICE_URL =
+        process.env.NEXT_PUBLIC_PDF_SERVICE_URL || "http://localhost:8000";
+    try {
+        await fetch(`${PDF_SERVICE_URL}/rate-card/invalidate`, {
+            method: "POST",
+            signal: AbortSignal.timeout(2000),
+        });
+    } catch (error: any) {
+        console.warn("⚠️ Could not invalidate the PDF service rate card:", error?.message);
+    }
+}
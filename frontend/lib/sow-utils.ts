@@ -10,6 +10,7 @@ interface PricingTableRow {
   description?: string;
   hours?: number;
   rate?: number;
+  total?: number; // Adjusted line total; wins over hours * rate
 }
 
 /**
@@ -34,19 +35,21 @@ interface TipTapContent {
 /**
  * Parses the SOW's TipTap JSON content to calculate the total investment value.
  * 
- * This function robustly sums the `hours * rate` for each line item in the first
- * pricing table found, ignoring any unreliable "Total" rows. This eliminates the
+ * This function robustly sums the line items of every pricing table found
+ * (nested ones included), ignoring any unreliable "Total" rows. This eliminates the
  * need for manual financial migrations by automatically calculating and storing
  * the financial data on every SOW update.
  *
- * Algorithm:
+ * The rule is the backend's (backend/services/pricing_extraction.py price_table),
+ * which the pricing backfill scripts write to the same pricing_total column:
  * 1. Parse the JSON content
- * 2. Find the first editablePricingTable node
- * 3. For each row in the table:
- *    - Skip rows where role contains "total" (case-insensitive)
- *    - Skip rows where rate <= 0 (invalid pricing)
- *    - Sum: hours * rate for all valid line items
- * 4. Return the calculated sum, or 0 if no table found or error occurs
+ * 2. For each editablePricingTable node, at any depth:
+ *    - Skip rows without a role, and rows where role contains "total" (case-insensitive)
+ *    - Skip rows where hours <= 0 or rate <= 0 (invalid pricing)
+ *    - A row's own `total` (an adjusted line total) wins over hours * rate
+ *    - A table with no priced rows is worth its Total row's hours, where the
+ *      editor keeps the amount
+ * 3. Return the sum rounded to cents, or 0 if no table found or error occurs
  *
  * @param contentJSON - The SOW content, expected as a JSON string
  * @returns The calculated total investment as a number (in the SOW's currency, typically AUD)
@@ -80,14 +83,24 @@ export function calculateTotalInvestment(contentJSON: string | any): number {
         if (node.type === 'editablePricingTable' && node.attrs?.rows) {
           const rows = node.attrs.rows || [];
           if (Array.isArray(rows)) {
+            let subtotal = 0;
+            let priced = false;
+            let statedTotal = 0;
             for (const row of rows) {
+              if (!row || typeof row !== 'object') continue;
               const hours = Number(row.hours) || 0;
               const rate = Number(row.rate) || 0;
-              const role = String(row.role || '').toLowerCase();
-              if (rate > 0 && !role.includes('total')) {
-                totalInvestment += hours * rate;
+              const role = String(row.role || '').trim().toLowerCase();
+              if (!role) continue;
+              if (role.includes('total')) {
+                // The editor's Total row keeps the amount in its hours cell
+                if (!statedTotal && hours > 0) statedTotal = hours;
+              } else if (hours > 0 && rate > 0) {
+                subtotal += Number(row.total) || hours * rate;
+                priced = true;
               }
             }
+            totalInvestment += priced ? subtotal : statedTotal;
           }
         }
         if (Array.isArray(node.content)) walk(node.content as TipTapNode[]);
@@ -95,7 +108,7 @@ export function calculateTotalInvestment(contentJSON: string | any): number {
     };
 
     walk(content.content as TipTapNode[]);
-    return totalInvestment;
+    return Math.round(totalInvestment * 100) / 100;
 
     // No pricing table found in the document
     return 0;
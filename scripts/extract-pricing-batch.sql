@@ -7,13 +7,16 @@
 -- 3. Updates total_investment for all processable SOWs
 -- 4. Verifies results
 --
+-- Requires database/migrations/add-pricing-table-flag.sql (has_pricing_table,
+-- indexed with total_investment, replaces LIKE scans over content)
+--
 -- Run: docker exec [container] mysql -u [user] -p[pass] [db] < extract-pricing-batch.sql
 
 -- Step 1: Verify we can identify SOWs with pricing tables
 SELECT 
   COUNT(*) as total_sows,
-  SUM(IF(content LIKE '%editablePricingTable%', 1, 0)) as with_pricing_tables,
-  SUM(IF(content LIKE '%editablePricingTable%' AND total_investment = 0, 1, 0)) as unpopulated_with_pricing
+  SUM(has_pricing_table) as with_pricing_tables,
+  SUM(IF(has_pricing_table = 1 AND total_investment = 0, 1, 0)) as unpopulated_with_pricing
 FROM sows;
 
 -- Step 2: Extract and display pricing totals for debugging
@@ -35,7 +38,7 @@ SELECT
   ) as extracted_total,
   total_investment as current_value
 FROM sows 
-WHERE content LIKE '%editablePricingTable%' 
+WHERE has_pricing_table = 1
   AND total_investment = 0
 LIMIT 15;
 
@@ -56,7 +59,7 @@ SELECT
     ) AS DECIMAL(10, 2)
   ) as new_total
 FROM sows 
-WHERE content LIKE '%editablePricingTable%' 
+WHERE has_pricing_table = 1
   AND (total_investment = 0 OR total_investment IS NULL);
 
 -- Step 4: Show what will be updated
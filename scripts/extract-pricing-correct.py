@@ -5,187 +5,159 @@ Purpose: Extract pricing totals by SUMMING all rows except the final total row
 Status: Production-ready
 
 Key insight: The TOTAL row sometimes has incorrect rate values or is just a label.
-Solution: Sum all non-total rows OR use the hours value from the total row directly.
+Solution: Sum hours x rate over the priced rows of every pricing table, or
+use a table's TOTAL row hours when it has no priced rows
+(pricing_extraction.document_total, shared with extract-pricing.py).
+
+Usage: python3 scripts/extract-pricing-correct.py [--batch-size 200] [--workers N]
+
+Connects with DB_HOST / DB_PORT / DB_USER / DB_PASSWORD / DB_NAME through a
+connection pool; SOWs are fetched, parsed and updated a batch at a time with
+parameterized queries.
 """
 
-import json
-import subprocess
+import argparse
 import os
-from typing import Optional
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from decimal import Decimal
+from typing import List, Optional, Tuple
 
-def get_sow_content(sow_id: str) -> Optional[str]:
-    """Fetch SOW content from Docker MySQL container"""
-    try:
-        # Use shell string to properly handle password with special characters
-        shell_cmd = f"docker exec ahmad_mysql-database.1.r460oc4y85bii82muxefe8rpi mysql -u sg_sow_user -p'SG_sow_2025_SecurePass!' socialgarden_sow -N -e \"SELECT content FROM sows WHERE id = '{sow_id}';\" 2>/dev/null"
-        result = subprocess.run(shell_cmd, capture_output=True, timeout=10, shell=True)
-        
-        # Handle encoding manually - decode with replacement for invalid bytes
-        try:
-            content = result.stdout.decode('utf-8', errors='replace').strip()
-        except:
-            content = result.stdout.decode('latin-1', errors='replace').strip()
-        
-        return content if content else None
-    except Exception as e:
-        print(f"  ⚠️  Failed to fetch: {e}")
-        return None
+import mysql.connector
+from mysql.connector import pooling
 
-def extract_pricing_total(content_str: str) -> Optional[int]:
-    """
-    Parse TipTap JSON and extract the total investment.
-    
-    Strategy:
-    1. Find editablePricingTable node
-    2. Get all rows
-    3. Either:
-       a) Sum hours × rate for all non-total rows
-       b) Use the hours value from the total row if it's clearly the amount
-    """
-    try:
-        content = json.loads(content_str)
-    except json.JSONDecodeError:
-        return None
-    
-    if not isinstance(content, dict) or 'content' not in content:
-        return None
-    
-    # Find pricing table
-    for node in content.get('content', []):
-        if node.get('type') != 'editablePricingTable':
-            continue
-            
-        rows = node.get('attrs', {}).get('rows', [])
-        if not rows:
-            continue
-        
-        # Try to find the total row (last row with "Total" in role)
-        total_row_index = -1
-        for i in range(len(rows) - 1, -1, -1):
-            role = rows[i].get('role', '')
-            if 'Total' in role or 'TOTAL' in role or 'Subtotal' in role:
-                total_row_index = i
-                break
-        
-        # Calculate the total
-        if total_row_index >= 0:
-            # Sum all rows EXCEPT the total row
-            total = 0
-            for i, row in enumerate(rows):
-                if i == total_row_index:
-                    continue  # Skip the total row itself
-                
-                hours = row.get('hours', 0)
-                rate = row.get('rate', 0)
-                total += hours * rate
-            
-            return int(total) if total > 0 else None
-        else:
-            # No total row found, sum all rows
-            total = 0
-            for row in rows:
-                hours = row.get('hours', 0)
-                rate = row.get('rate', 0)
-                if rate > 0:  # Skip any totals or invalid rows
-                    total += hours * rate
-            
-            return int(total) if total > 0 else None
-    
-    return None
+# Pricing table scanning is shared with the backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'backend' / 'services'))
+from pricing_extraction import UNPRICED_SOWS, bulk_total_update, document_total, parallel_map
 
-def update_sow(sow_id: str, amount: int):
-    """Update SOW in Docker MySQL container"""
-    try:
-        shell_cmd = f"docker exec ahmad_mysql-database.1.r460oc4y85bii82muxefe8rpi mysql -u sg_sow_user -p'SG_sow_2025_SecurePass!' socialgarden_sow -e \"UPDATE sows SET total_investment = {amount} WHERE id = '{sow_id}';\" 2>/dev/null"
-        result = subprocess.run(shell_cmd, capture_output=True, timeout=10, shell=True)
-        return result.returncode == 0
-    except Exception as e:
-        print(f"  ⚠️  Failed to update: {e}")
-        return False
+DEFAULT_BATCH_SIZE = 200
 
-def get_unpopulated_sows():
-    """Get list of SOWs with pricing tables and zero investment"""
-    try:
-        shell_cmd = "docker exec ahmad_mysql-database.1.r460oc4y85bii82muxefe8rpi mysql -u sg_sow_user -p'SG_sow_2025_SecurePass!' socialgarden_sow -N -e \"SELECT id, title FROM sows WHERE content LIKE '%editablePricingTable%' AND total_investment = 0;\" 2>/dev/null"
-        result = subprocess.run(shell_cmd, capture_output=True, text=True, timeout=10, shell=True, errors='replace')
-        
-        sows = []
-        for line in result.stdout.strip().split('\n'):
-            if line.strip():
-                parts = line.split('\t', 1)
-                if len(parts) == 2:
-                    sows.append((parts[0].strip(), parts[1].strip()))
-        return sows
-    except Exception as e:
-        print(f"Failed to fetch SOWs: {e}")
-        return []
+_pool: Optional[pooling.MySQLConnectionPool] = None
+
+def get_db_connection():
+    """Connection from the process-wide pool (created on first use)"""
+    global _pool
+    if _pool is None:
+        host = os.getenv('DB_HOST', '168.231.115.219')
+        user = os.getenv('DB_USER', 'sg_sow_user')
+        database = os.getenv('DB_NAME', 'socialgarden_sow')
+        print(f"   Connecting to {user}@{host}:{database}")
+        _pool = pooling.MySQLConnectionPool(
+            pool_name='pricing_backfill',
+            pool_size=int(os.getenv('DB_POOL_SIZE', 2)),
+            host=host,
+            port=int(os.getenv('DB_PORT', 3306)),
+            user=user,
+            password=os.getenv('DB_PASSWORD', 'SG_sow_2025_SecurePass!'),
+            database=database,
+            autocommit=False,
+        )
+    return _pool.get_connection()
+
+def get_unpopulated_sows(cursor) -> List[Tuple[str, str]]:
+    """(id, title) of SOWs with pricing tables and zero investment"""
+    # has_pricing_table / total_investment index seek, no LIKE over content
+    cursor.execute(f"SELECT id, title FROM sows WHERE {UNPRICED_SOWS}")
+    return [(sow_id, title or '') for sow_id, title in cursor.fetchall()]
+
+def fetch_contents(cursor, sow_ids: List[str]) -> dict:
+    """id -> content for a batch of SOWs, in one query"""
+    placeholders = ", ".join(["%s"] * len(sow_ids))
+    cursor.execute(f"SELECT id, content FROM sows WHERE id IN ({placeholders})", sow_ids)
+    return {sow_id: content for sow_id, content in cursor.fetchall()}
 
 def main():
+    parser = argparse.ArgumentParser(description="Backfill sows.total_investment by summing pricing table rows")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='SOWs fetched and updated per round trip')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Parser processes (1 parses inline)')
+    args = parser.parse_args()
+
     print("=" * 80)
     print("🔄 Financial Data Migration - Corrected Extraction")
     print("=" * 80)
     print()
     
-    # Get list of SOWs to process
-    sows = get_unpopulated_sows()
-    print(f"📊 Found {len(sows)} SOWs with pricing tables to process\n")
-    
-    if not sows:
-        print("✅ No SOWs with zero investment and pricing tables found.")
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error as e:
+        print(f"Failed to connect: {e}")
         return
+    cursor = conn.cursor()
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
     
-    success_count = 0
-    total_extracted = 0
-    
-    for i, (sow_id, title) in enumerate(sows, 1):
-        print(f"[{i}/{len(sows)}] {title[:60]}")
+    try:
+        # Get list of SOWs to process
+        sows = get_unpopulated_sows(cursor)
+        print(f"📊 Found {len(sows)} SOWs with pricing tables to process\n")
         
-        # Fetch content
-        content = get_sow_content(sow_id)
-        if not content:
-            print(f"  ⚠️  Could not fetch content")
-            continue
+        if not sows:
+            print("✅ No SOWs with zero investment and pricing tables found.")
+            return
         
-        # Extract total
-        amount = extract_pricing_total(content)
-        if not amount or amount <= 0:
-            print(f"  ⚠️  No valid pricing found")
-            continue
+        success_count = 0
+        total_extracted = Decimal('0')
         
-        # Update database
-        if update_sow(sow_id, amount):
-            print(f"  ✅ Updated: ${amount:,}")
-            success_count += 1
-            total_extracted += amount
-        else:
-            print(f"  ❌ Failed to update database")
-    
-    print()
-    print("=" * 80)
-    print("✅ MIGRATION COMPLETE")
-    print("=" * 80)
-    print()
-    print(f"📊 Results:")
-    print(f"   Processed:       {success_count}/{len(sows)}")
-    print(f"   Total Extracted: ${total_extracted:,.0f}")
-    print()
-    
-    # Show final state
-    try:
-        shell_cmd = "docker exec ahmad_mysql-database.1.r460oc4y85bii82muxefe8rpi mysql -u sg_sow_user -p'SG_sow_2025_SecurePass!' socialgarden_sow -N -e \"SELECT COUNT(*), SUM(total_investment) FROM sows WHERE total_investment > 0;\" 2>/dev/null"
-        result = subprocess.run(shell_cmd, capture_output=True, text=True, timeout=10, shell=True)
-        parts = result.stdout.strip().split('\t')
-        if len(parts) == 2:
-            count = parts[0]
-            total = parts[1]
-            print(f"📈 Final Dashboard Summary:")
-            print(f"   SOWs with values: {count}")
-            print(f"   Total Investment: ${int(float(total)):,} AUD")
-    except:
-        pass
-    
-    print()
+        for start in range(0, len(sows), args.batch_size):
+            batch = sows[start:start + args.batch_size]
+            
+            # Fetch content for the whole batch, parse it across the pool
+            contents = fetch_contents(cursor, [sow_id for sow_id, _ in batch])
+            amounts = parallel_map(
+                document_total, [contents.get(sow_id) for sow_id, _ in batch], pool, args.workers
+            )
+            
+            updates = []
+            for i, ((sow_id, title), amount) in enumerate(zip(batch, amounts), start + 1):
+                print(f"[{i}/{len(sows)}] {title[:60]}")
+                if not contents.get(sow_id):
+                    print(f"  ⚠️  Could not fetch content")
+                    continue
+                if not amount or amount <= 0:
+                    print(f"  ⚠️  No valid pricing found")
+                    continue
+                updates.append((sow_id, amount))
+            
+            # Update database: one statement per batch
+            if updates:
+                try:
+                    cursor.execute(*bulk_total_update(updates))
+                    conn.commit()
+                except mysql.connector.Error as e:
+                    conn.rollback()
+                    print(f"  ❌ Failed to update database: {e}")
+                    continue
+                for sow_id, amount in updates:
+                    print(f"  ✅ Updated {sow_id}: ${amount:,.2f}")
+                success_count += len(updates)
+                total_extracted += sum(amount for _, amount in updates)
+        
+        print()
+        print("=" * 80)
+        print("✅ MIGRATION COMPLETE")
+        print("=" * 80)
+        print()
+        print(f"📊 Results:")
+        print(f"   Processed:       {success_count}/{len(sows)}")
+        print(f"   Total Extracted: ${total_extracted:,.2f}")
+        print()
+        
+        # Show final state
+        # sow_aggregates is trigger-maintained: one row per group, not per SOW
+        cursor.execute("SELECT SUM(priced_count), SUM(total_value) FROM sow_aggregates")
+        count, total = cursor.fetchone()
+        print(f"📈 Final Dashboard Summary:")
+        print(f"   SOWs with values: {count}")
+        print(f"   Total Investment: ${int(float(total or 0)):,} AUD")
+        
+        print()
+    finally:
+        if pool:
+            pool.shutdown()
+        cursor.close()
+        conn.close()  # Returns the connection to the pool
 
 if __name__ == '__main__':
     main()
@@ -2,19 +2,50 @@
 """
 Financial Data Migration - Extract Pricing from SOWs
 Purpose: Parse TipTap JSON content and extract pricing totals
+(pricing_extraction.document_total: every pricing table, nested ones
+included, summed the same way the app's exports price them)
 Status: Production-ready CLI tool
 
-Usage: python3 scripts/extract-pricing.py
+Usage: python3 scripts/extract-pricing.py [--chunk-size 500] [--workers N] [--verbose]
+       python3 scripts/extract-pricing.py --incremental [--job nightly] [--reset]
+       python3 scripts/extract-pricing.py --pricing-total
+
+SOWs are selected by the has_pricing_table flag, an index seek with
+total_investment (database/migrations/add-pricing-table-flag.sql).
+--pricing-total is that migration's one-time backfill: it fills
+sows.pricing_total wherever it is still NULL and leaves total_investment alone.
+
+Rows stream through an unbuffered (server-side) cursor in chunks, each chunk
+is parsed across a process pool, and written back with one CASE update on a
+second connection, so memory stays flat at any table size.
+
+--incremental only visits SOWs edited since the job's last run, priced or
+not, so edits to a SOW's pricing reach its total: chunks are
+read in (updated_at, id) order past a watermark kept in
+pricing_backfill_state, and each chunk's updates commit together with the
+advanced watermark, so an interrupted run resumes where it stopped.
+Requires database/migrations/add-pricing-backfill-state.sql.
 """
 
-import json
+import argparse
 import mysql.connector
 import os
-from typing import Optional, Tuple
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from decimal import Decimal
 
+# Pricing table scanning is shared with the backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'backend' / 'services'))
+from pricing_extraction import (
+    UNPRICED_SOWS, bulk_total_update, changed_sows_query, document_total, load_watermark, parallel_map,
+    save_watermark,
+)
+
+DEFAULT_CHUNK_SIZE = 500
+
 # Database connection
-def get_db_connection():
+def get_db_connection(autocommit: bool = True):
     # Get credentials from environment or use defaults
     host = os.getenv('DB_HOST', '168.231.115.219')
     user = os.getenv('DB_USER', 'sg_sow_user')
@@ -28,112 +59,167 @@ def get_db_connection():
         user=user,
         password=password,
         database=database,
-        autocommit=True
+        autocommit=autocommit
     )
 
-def extract_pricing_total(content_json_str: str) -> Optional[Decimal]:
+def run_incremental(args, pool):
     """
-    Parse TipTap JSON and extract the total from editablePricingTable nodes.
-    
-    The TOTAL row is identified by:
-    - rate = 0
-    - role contains "Total" or similar
-    - hours field contains the total amount
+    Process SOWs edited since the job's watermark, one committed chunk at a time
+    Returns (processed, updated, total extracted)
     """
+    conn = get_db_connection(autocommit=False)
+    cursor = conn.cursor(dictionary=True)
     try:
-        content = json.loads(content_json_str)
-    except json.JSONDecodeError:
-        return None
-    
-    if not isinstance(content, dict) or 'content' not in content:
-        return None
-    
-    # Find editablePricingTable nodes
-    for node in content.get('content', []):
-        if node.get('type') == 'editablePricingTable':
-            rows = node.get('attrs', {}).get('rows', [])
+        if args.reset:
+            cursor.execute("DELETE FROM pricing_backfill_state WHERE job = %s", (args.job,))
+            conn.commit()
+            print(f"   Watermark for '{args.job}' reset")
+        
+        watermark = load_watermark(cursor, args.job)
+        conn.commit()
+        print(f"   Resuming '{args.job}' after {watermark[0] or 'the beginning'} / {watermark[1] or '-'}")
+        
+        processed = 0
+        success_count = 0
+        total_extracted = Decimal('0')
+        
+        while True:
+            cursor.execute(*changed_sows_query(watermark, args.chunk_size))
+            sows = cursor.fetchall()
+            if not sows:
+                break
             
-            # Find the TOTAL row (where rate = 0)
-            for row in rows:
-                if row.get('rate') == 0 and row.get('role'):
-                    # The TOTAL row has the total amount in 'hours' field
-                    total = row.get('hours', 0)
-                    if total > 0:
-                        return Decimal(str(total))
+            totals = parallel_map(document_total, [sow['content'] for sow in sows], pool, args.workers)
+            updates = [(sow['id'], total) for sow, total in zip(sows, totals) if total and total > 0]
+            if args.verbose:
+                for sow, total in zip(sows, totals):
+                    print(f"{'✅' if total else '⚠️ '} {sow['title']} ({sow['id']}): ${float(total or 0):,.2f}")
             
-            # If no rate=0 found, return None (not a complete pricing table)
-    
-    return None
+            # Updates and the advanced watermark commit together: a crash
+            # replays at most the chunk in flight
+            watermark = (sows[-1]['updated_at'], sows[-1]['id'])
+            try:
+                if updates:
+                    cursor.execute(*bulk_total_update(updates))
+                save_watermark(cursor, args.job, watermark[0], watermark[1], len(sows))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            
+            processed += len(sows)
+            success_count += len(updates)
+            total_extracted += sum(total for _, total in updates)
+            print(f"📝 {processed} SOWs scanned, {success_count} updated (watermark {watermark[0]} / {watermark[1]})")
+        
+        return processed, success_count, total_extracted
+    finally:
+        cursor.close()
+        conn.close()
 
 def main():
+    parser = argparse.ArgumentParser(description="Backfill sows.total_investment from TipTap pricing tables")
+    parser.add_argument('--chunk-size', type=int,
+                        default=int(os.getenv('PRICING_BACKFILL_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)),
+                        help='Rows fetched and written per batch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Parser processes (1 parses inline)')
+    parser.add_argument('--verbose', action='store_true', help='Print every SOW, not just chunk totals')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only SOWs edited since the last run, resuming from the stored watermark')
+    parser.add_argument('--job', default='extract-pricing', help='Watermark name for --incremental')
+    parser.add_argument('--reset', action='store_true', help='Forget the --incremental watermark and start over')
+    parser.add_argument('--pricing-total', action='store_true',
+                        help='Backfill sows.pricing_total where it is NULL (total_investment is untouched)')
+    args = parser.parse_args()
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+
     print("=" * 80)
     print("🔄 Financial Data Migration - Pricing Extraction")
     print("=" * 80)
     
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get all SOWs with zero investment and pricing tables
-        query_str = """
-            SELECT id, title, content 
-            FROM sows 
-            WHERE total_investment = 0 
-            AND content LIKE '%editablePricingTable%'
-            ORDER BY created_at DESC
-        """
+        if args.incremental:
+            processed, success_count, total_extracted = run_incremental(args, pool)
+            print("\n" + "=" * 80)
+            print("✅ INCREMENTAL RUN COMPLETE")
+            print("=" * 80)
+            print(f"   Processed:         {success_count}/{processed}")
+            print(f"   Total Extracted:   ${float(total_extracted):,.2f} AUD")
+            return 0
         
-        cursor.execute(query_str)
-        sows = cursor.fetchall()
+        # An unbuffered result set holds its connection until fully read,
+        # so reads and writes use separate connections
+        conn = get_db_connection()
+        write_conn = get_db_connection(autocommit=False)
+        cursor = conn.cursor(dictionary=True, buffered=False)
+        write_cursor = write_conn.cursor()
         
-        print(f"\n📊 Found {len(sows)} SOWs with pricing tables to process\n")
+        # Get all SOWs with zero investment and pricing tables (no ORDER BY:
+        # sorting would materialise every content column server side)
+        if args.pricing_total:
+            pending, columns = "has_pricing_table = 1 AND pricing_total IS NULL", ('pricing_total',)
+        else:
+            pending, columns = UNPRICED_SOWS, ('total_investment', 'pricing_total')
         
-        if not sows:
-            print("✅ No SOWs with zero investment and pricing tables found.")
-            cursor.close()
-            conn.close()
-            return
+        cursor.execute(f"SELECT id, title, content FROM sows WHERE {pending}")
         
+        processed = 0
         success_count = 0
         total_extracted = Decimal('0')
-        updates = []
         
-        # Process each SOW
-        for i, sow in enumerate(sows, 1):
-            sow_id = sow['id']
-            title = sow['title']
-            content = sow['content']
+        # Process SOWs a chunk at a time as the server sends them
+        while True:
+            sows = cursor.fetchmany(args.chunk_size)
+            if not sows:
+                break
             
-            # Extract pricing total
-            total = extract_pricing_total(content)
+            totals = parallel_map(document_total, [sow['content'] for sow in sows], pool, args.workers)
             
-            if total and total > 0:
-                print(f"✅ [{i}/{len(sows)}] {title}")
-                print(f"   ID: {sow_id} | Total: ${float(total):,.2f} AUD")
-                updates.append((float(total), sow_id))
-                success_count += 1
-                total_extracted += total
-            else:
-                print(f"⚠️  [{i}/{len(sows)}] {title} - No valid total found")
-        
-        # Execute batch update
-        if updates:
-            print(f"\n📝 Applying {len(updates)} updates to database...")
-            for total, sow_id in updates:
-                update_query = "UPDATE sows SET total_investment = %s WHERE id = %s"
-                cursor.execute(update_query, (total, sow_id))
+            updates = []
+            for sow, total in zip(sows, totals):
+                processed += 1
+                
+                if total and total > 0:
+                    if args.verbose:
+                        print(f"✅ [{processed}] {sow['title']}")
+                        print(f"   ID: {sow['id']} | Total: ${float(total):,.2f} AUD")
+                    updates.append((sow['id'], total))
+                    total_extracted += total
+                else:
+                    if args.verbose:
+                        print(f"⚠️  [{processed}] {sow['title']} - No valid total found")
+                    if args.pricing_total:
+                        # Recorded as 0 so the next run does not parse it again
+                        updates.append((sow['id'], Decimal('0.00')))
             
-            conn.commit()
-            print("✅ All updates applied successfully")
+            if updates:
+                write_cursor.execute(*bulk_total_update(updates, columns))
+                write_conn.commit()
+                success_count += len(updates)
+            
+            print(f"📝 {processed} SOWs scanned, {success_count} updated")
         
-        # Verify results
+        if not processed:
+            print("✅ No SOWs with zero investment and pricing tables found.")
+            cursor.close()
+            conn.close()
+            write_cursor.close()
+            write_conn.close()
+            return
+        
+        print("✅ All updates applied successfully")
+        cursor.close()
+        cursor = conn.cursor(dictionary=True)
+        
+        # Verify results (sow_aggregates: trigger-maintained, one row per group)
         cursor.execute("""
             SELECT 
-                COUNT(*) as total_sows,
-                SUM(total_investment) as total_value,
-                SUM(IF(total_investment > 0, 1, 0)) as sows_with_values,
-                SUM(IF(total_investment = 0, 1, 0)) as sows_with_zero
-            FROM sows
+                SUM(sow_count) as total_sows,
+                SUM(total_value) as total_value,
+                SUM(priced_count) as sows_with_values,
+                SUM(sow_count - priced_count) as sows_with_zero
+            FROM sow_aggregates
         """)
         
         result = cursor.fetchone()
@@ -142,7 +228,7 @@ def main():
         print("✅ MIGRATION COMPLETE")
         print("=" * 80)
         print(f"\n📊 Migration Results:")
-        print(f"   Processed:         {success_count}/{len(sows)}")
+        print(f"   Processed:         {success_count}/{processed}")
         print(f"   Total Extracted:   ${float(total_extracted):,.2f} AUD")
         
         print(f"\n📈 Final Dashboard Summary:")
@@ -151,7 +237,7 @@ def main():
         print(f"   SOWs with $0:      {result['sows_with_zero']}")
         print(f"   Total Investment:  ${float(result['total_value'] or 0):,.2f} AUD")
         
-        # Show top SOWs
+        # Show top SOWs (idx_total_investment, read backwards)
         print(f"\n🏆 Top 5 SOWs by Value:")
         cursor.execute("""
             SELECT title, total_investment, vertical, service_line
@@ -168,6 +254,8 @@ def main():
         
         cursor.close()
         conn.close()
+        write_cursor.close()
+        write_conn.close()
         
     except Exception as e:
         print(f"\n🔴 ERROR: {str(e)}")
@@ -176,6 +264,9 @@ def main():
         print("  2. Database credentials in environment variables")
         print("  3. python3-mysql connector installed: pip install mysql-connector-python")
         return 1
+    finally:
+        if pool:
+            pool.shutdown()
     
     return 0
 
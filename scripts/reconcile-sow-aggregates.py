@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Dashboard Aggregates Reconciliation
+Purpose: Rebuild sow_aggregates from sows and report any drift
+Status: Production-ready CLI tool (run nightly, and after bulk imports)
+
+Usage: python3 scripts/reconcile-sow-aggregates.py [--dry-run]
+
+sow_aggregates is kept current by the sows triggers
+(database/migrations/add-sow-aggregates.sql). Writes that bypass them
+(trigger-less restores, manual edits to the table) are caught here: the
+stored groups are compared with a GROUP BY over sows, then replaced in one
+transaction.
+"""
+
+import argparse
+import os
+from decimal import Decimal
+
+import mysql.connector
+
+SOW_VALUE = "COALESCE(NULLIF(total_investment, 0), pricing_total, 0)"
+
+GROUPED_SOWS = f"""
+    SELECT
+      COALESCE(vertical, '') AS vertical,
+      COALESCE(service_line, '') AS service_line,
+      COALESCE(status, '') AS status,
+      COUNT(*) AS sow_count,
+      SUM(IF({SOW_VALUE} > 0, 1, 0)) AS priced_count,
+      SUM({SOW_VALUE}) AS total_value
+    FROM sows
+    GROUP BY COALESCE(vertical, ''), COALESCE(service_line, ''), COALESCE(status, '')
+"""
+
+# Database connection
+def get_db_connection():
+    host = os.getenv('DB_HOST', '168.231.115.219')
+    user = os.getenv('DB_USER', 'sg_sow_user')
+    database = os.getenv('DB_NAME', 'socialgarden_sow')
+
+    print(f"   Connecting to {user}@{host}:{database}")
+
+    return mysql.connector.connect(
+        host=host,
+        port=int(os.getenv('DB_PORT', 3306)),
+        user=user,
+        password=os.getenv('DB_PASSWORD', 'SG_sow_2025_SecurePass!'),
+        database=database,
+        autocommit=False,
+    )
+
+def grouped(cursor, sql: str) -> dict:
+    """(vertical, service_line, status) -> (sow_count, priced_count, total_value)"""
+    cursor.execute(sql)
+    return {
+        (vertical, service_line, status): (int(count), int(priced or 0), Decimal(str(total or 0)))
+        for vertical, service_line, status, count, priced, total in cursor.fetchall()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild sow_aggregates from sows and report drift")
+    parser.add_argument('--dry-run', action='store_true', help='Report drift without rewriting the table')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("🔄 Dashboard Aggregates Reconciliation")
+    print("=" * 80)
+
+    try:
+        conn = get_db_connection()
+    except mysql.connector.Error as e:
+        print(f"Failed to connect: {e}")
+        return 1
+    cursor = conn.cursor()
+
+    try:
+        expected = grouped(cursor, GROUPED_SOWS)
+        stored = grouped(
+            cursor,
+            "SELECT vertical, service_line, status, sow_count, priced_count, total_value "
+            "FROM sow_aggregates WHERE sow_count <> 0 OR total_value <> 0",
+        )
+        conn.commit()
+
+        drift = sorted(key for key in expected.keys() | stored.keys() if expected.get(key) != stored.get(key))
+        for key in drift:
+            print(f"  ⚠️  {'/'.join(part or '-' for part in key)}: stored {stored.get(key)} expected {expected.get(key)}")
+        print(f"\n📊 {len(expected)} groups, {sum(c for c, _, _ in expected.values())} SOWs, "
+              f"{len(drift)} drifted")
+
+        if args.dry_run or not drift:
+            return 0
+
+        # Rebuilt from one consistent read; INSERT ... SELECT holds shared
+        # locks on what it reads, so concurrent trigger updates queue behind it
+        try:
+            cursor.execute("DELETE FROM sow_aggregates")
+            cursor.execute(
+                "INSERT INTO sow_aggregates (vertical, service_line, status, sow_count, priced_count, total_value) "
+                + GROUPED_SOWS
+            )
+            conn.commit()
+        except mysql.connector.Error as e:
+            conn.rollback()
+            print(f"  ❌ Failed to rebuild sow_aggregates: {e}")
+            return 1
+        print("✅ sow_aggregates rebuilt")
+        return 0
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == '__main__':
+    exit(main())